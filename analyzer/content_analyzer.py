@@ -1,121 +1,390 @@
 import logging
 import json
-import requests
+import itertools
 import re
-from config.settings import LLM_CONFIG
-from config.keywords import AI_CORE_KEYWORDS
+import requests
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config.settings import LLM_CONFIG, ANALYSIS_CONFIG, LLM_CACHE_CONFIG
+from analyzer.keyword_matcher import get_keyword_matcher
+from analyzer.llm_cache import LLMResponseCache
+from utils.http_client import get_http_client
+from utils.metrics import get_metrics, timed
+from utils.report_renderer import render_feishu, render_html
+
+# 中日韩字符，用于粗略估算 token 数
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_REPORT_FORMAT = """**重要要求**：请按**话题**聚合相关内容，而不是逐条列出。
+
+输出格式示例：
+## 话题1: DeepSeek R1 开源
+**核心观点**: DeepSeek发布R1模型，性能超越GPT-4，引发业界关注
+**相关帖子**:
+- [@AI科技评论](链接1): 详细测评数据
+- [@机器之心](链接2): 技术架构解读
+- [@量子位](链接3): 行业影响分析
+
+## 话题2: Sora 视频生成更新
+**核心观点**: OpenAI更新Sora模型，视频生成质量提升
+**相关帖子**:
+- [@作者A](链接): 观点摘要
+"""
+
+
+SYSTEM_PROMPT = "你是一个专业的科技情报分析师，擅长从社交媒体数据中提取AI热点。"
+TEMPERATURE = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 token/字，其余约 4 字符/token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
 
 class ContentAnalyzer:
-    def __init__(self, api_key=None, provider="openai"):
+    def __init__(self, api_key=None, provider="openai", cache=None):
         self.logger = logging.getLogger(__name__)
         # 优先使用传入的 api_key，否则使用配置文件
         self.api_key = api_key if api_key else LLM_CONFIG.get("api_key")
         self.base_url = LLM_CONFIG.get("base_url")
         self.model = LLM_CONFIG.get("model_name")
+        # 最近一次分析的统计 (帖子总数 / 相关帖子数)
+        self.last_stats = {"total_posts": 0, "relevant_posts": 0, "keyword_hits": Counter()}
+        # 最近一次保存的报告ID (用于补写运行指标)
+        self.last_report_id = None
+        self.analysis_mode = ANALYSIS_CONFIG.get("mode", "map_reduce")
+        # LLM 响应缓存，未显式传入时在 analyze_posts 中按 storage 创建
+        self.cache = cache
+        self.http = get_http_client()
 
-    def analyze_posts(self, posts, storage=None, time_range_start=None, time_range_end=None, source='weibo'):
+    @timed("analysis_seconds")
+    def analyze_posts(
+        self, posts, storage=None, time_range_start=None, time_range_end=None, source='weibo', total_posts=None
+    ):
         """
         使用 LLM 分析帖子列表并返回结构化报告。
         
+        posts 可以是列表，也可以是任意可迭代对象 (如 StorageManager.iter_posts 的生成器)，
+        过滤、简化、序列化均按流式处理，内存占用与帖子总数无关。
+        
         Args:
-            posts: 帖子列表
+            posts: 帖子列表或帖子迭代器
             storage: StorageManager 实例，用于保存分析结果
             time_range_start: 分析的起始时间
             time_range_end: 分析的结束时间
             source: 数据来源
+            total_posts: posts 已在 SQL 中按 post_keywords 预筛选时，传入时间窗口内的帖子总数
         """
-        self.logger.info(f"正在分析 {len(posts)} 篇帖子...")
+        if hasattr(posts, "__len__"):
+            self.logger.info(f"正在分析 {len(posts)} 篇帖子...")
+        else:
+            self.logger.info("正在流式分析帖子...")
         
-        if not posts:
+        stats = {"total_posts": 0, "relevant_posts": 0, "keyword_hits": Counter()}
+        self.last_stats = stats
+        self.last_report_id = None
+
+        if self.cache is None and storage and LLM_CACHE_CONFIG.get("enabled"):
+            self.cache = LLMResponseCache(storage)
+
+        # 1. 本地关键词过滤 -> 简化 -> 序列化 (流式)
+        if total_posts is not None:
+            # 帖子已在 SQL 中预筛选，总数由调用方给出
+            stats["total_posts"] = total_posts
+            counted = posts
+        else:
+            counted = self._count_stream(posts, stats, "total_posts")
+        relevant = self._count_stream(
+            self.iter_filter_posts(counted, stats["keyword_hits"]), stats, "relevant_posts"
+        )
+        simplified = self.iter_simplify_posts(relevant)
+        if self.analysis_mode == "map_reduce":
+            # 按 token 预算分块，覆盖全部相关帖子而不是截断；分块边生成边提交给 LLM，
+            # 这里只预取第一块判断是否有相关帖子 (没有时迭代器已耗尽，计数完整)
+            chunks = self._iter_chunks(simplified)
+            first_chunk = next(chunks, None)
+            has_relevant = first_chunk is not None
+            if has_relevant:
+                chunks = itertools.chain([first_chunk], chunks)
+        else:
+            posts_text = self._serialize_posts(simplified, max_chars=10000)
+            has_relevant = stats["relevant_posts"] > 0
+
+        if stats["total_posts"] == 0:
             return "本次没有采集到任何帖子。"
 
-        # 1. 本地关键词过滤
-        filtered_posts = self._filter_posts(posts)
-        if not filtered_posts:
+        if not has_relevant:
             self.logger.info("本地过滤后无 AI 相关内容，跳过 LLM 分析。")
             report = "本地过滤后无 AI/科技相关热点。"
             if storage:
-                storage.save_analysis_report(
-                    report, len(posts), 
-                    time_range_start=time_range_start,
-                    time_range_end=time_range_end,
-                    source=source
+                self._save_report(
+                    storage, report, stats["total_posts"], time_range_start, time_range_end, source
                 )
             return report
             
-        self.logger.info(f"过滤后剩余 {len(filtered_posts)}/{len(posts)} 篇相关帖子，准备发送给 LLM...")
+        try:
+            if self.analysis_mode == "map_reduce":
+                report = self._map_reduce(chunks, time_range_start, time_range_end)
+            else:
+                report = self._call_llm(self._build_prompt(posts_text, time_range_start, time_range_end))
+            # 流式分块时相关帖子数在全部分块生成后才完整
+            self.logger.info(f"本次分析相关帖子 {stats['relevant_posts']}/{stats['total_posts']} 篇")
+            top_keywords = ", ".join(f"{kw}({n})" for kw, n in stats["keyword_hits"].most_common(10))
+            self.logger.info(f"命中关键词: {top_keywords}")
+            if self.cache:
+                cache_stats = self.cache.stats()
+                self.logger.info(f"LLM缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次")
+            llm_metrics = self.http.metrics().get("llm")
+            if llm_metrics:
+                self.logger.info(
+                    f"LLM 请求: {llm_metrics['requests']} 次, 失败 {llm_metrics['errors']} 次, "
+                    f"重试 {llm_metrics['retries']} 次, p50 {llm_metrics['p50_seconds']}s, "
+                    f"p95 {llm_metrics['p95_seconds']}s"
+                )
+            # 保存分析结果到数据库
+            if storage:
+                self._save_report(
+                    storage, report, stats["relevant_posts"], time_range_start, time_range_end, source
+                )
+            return report
+        except Exception as e:
+            self.logger.error(f"LLM 分析失败: {e}")
+            error_report = f"报告生成失败。错误信息: {e}\n\n(请检查 settings.py 中的 API Key配置)"
+            if storage:
+                self._save_report(
+                    storage, error_report, stats["total_posts"], time_range_start, time_range_end, source
+                )
+            return error_report
 
-        # 简化数据以节省 Context
-        simplified_posts = []
-        for p in filtered_posts:
-            simplified_posts.append({
+    def _save_report(self, storage, report, post_count, time_range_start, time_range_end, source):
+        """保存报告 (同时保存预渲染的 HTML 和飞书文本)，并附上截至目前的运行指标"""
+        self.last_report_id = storage.save_analysis_report(
+            report, post_count,
+            time_range_start=time_range_start,
+            time_range_end=time_range_end,
+            source=source,
+            run_metrics=get_metrics().snapshot(),
+            report_html=render_html(report),
+            report_feishu=render_feishu(report)
+        )
+
+    @staticmethod
+    def _count_stream(items, stats, key):
+        """透传迭代器并计数"""
+        for item in items:
+            stats[key] += 1
+            yield item
+
+    @staticmethod
+    def iter_simplify_posts(posts):
+        """简化数据以节省 Context (流式)"""
+        for p in posts:
+            yield {
                 "author": p.get("author"),
                 "content": p.get("content"),
                 "url": p.get("url"),
                 "time": p.get("publish_time", p.get("scraped_at"))
-            })
-            
-        posts_text = json.dumps(simplified_posts, ensure_ascii=False, indent=2)
-        
+            }
+
+    @staticmethod
+    def _serialize_posts(simplified_posts, max_chars=10000):
+        """
+        流式序列化为 JSON 数组文本，超过 max_chars 后截断
+
+        达到上限后仍会耗尽迭代器 (保证上游计数完整)，但不再序列化。
+        """
+        parts = []
+        length = 2
+        truncated = False
+        for item in simplified_posts:
+            if truncated:
+                continue
+            item_text = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            parts.append(item_text)
+            length += len(item_text) + 4
+            if length > max_chars:
+                truncated = True
+
+        posts_text = "[\n  " + ",\n  ".join(parts) + "\n]" if parts else "[]"
         # 防止过长 (简单截断，生产环境应更严谨)
-        if len(posts_text) > 10000:
-            posts_text = posts_text[:10000] + "...(truncated)"
-        
+        if len(posts_text) > max_chars:
+            posts_text = posts_text[:max_chars] + "...(truncated)"
+        return posts_text
+
+    def _build_prompt(self, posts_text, time_range_start=None, time_range_end=None):
         time_range_info = ""
         if time_range_start and time_range_end:
             time_range_info = f"\n分析时间段: {time_range_start} ~ {time_range_end}\n"
         
-        prompt = f"""
+        return f"""
 请分析以下微博帖子数据，提取与 "AI", "人工智能", "大模型", "LLM", "Agent", "ChatGPT", "DeepSeek", "Sora" 等科技前沿相关的热点内容。
 {time_range_info}
 数据如下:
 {posts_text}
 
-**重要要求**：请按**话题**聚合相关内容，而不是逐条列出。
-
-输出格式示例：
-## 话题1: DeepSeek R1 开源
-**核心观点**: DeepSeek发布R1模型，性能超越GPT-4，引发业界关注
-**相关帖子**:
-- [@AI科技评论](链接1): 详细测评数据
-- [@机器之心](链接2): 技术架构解读
-- [@量子位](链接3): 行业影响分析
-
-## 话题2: Sora 视频生成更新
-**核心观点**: OpenAI更新Sora模型，视频生成质量提升
-**相关帖子**:
-- [@作者A](链接): 观点摘要
-
+{_REPORT_FORMAT}
 **注意事项**:
 1. 如果多个帖子讨论同一个话题（如"DeepSeek R1"），请合并到一个话题下
 2. 每个话题下列出所有相关帖子的作者和链接
 3. 忽略与 AI/科技无关的内容
 4. 如果所有帖子均无关，输出 "**今日无 AI 相关热点**"
 """
+
+    def _iter_chunks(self, simplified_posts, token_budget=None):
+        """
+        将帖子紧凑序列化 (每行一条: @作者 | 时间 | 链接 | 正文)，并按 token 预算打包成分块
+        """
+        token_budget = token_budget or ANALYSIS_CONFIG.get("chunk_token_budget", 6000)
+        max_content_chars = ANALYSIS_CONFIG.get("max_content_chars", 500)
+
+        lines = []
+        tokens = 0
+        for p in simplified_posts:
+            content = _WHITESPACE_RE.sub(" ", p.get("content") or "").strip()[:max_content_chars]
+            line = f"@{p.get('author')} | {p.get('time')} | {p.get('url')} | {content}"
+            line_tokens = estimate_tokens(line)
+            if lines and tokens + line_tokens > token_budget:
+                yield "\n".join(lines)
+                lines, tokens = [], 0
+            lines.append(line)
+            tokens += line_tokens
+        if lines:
+            yield "\n".join(lines)
+
+    def _map_reduce(self, chunks, time_range_start=None, time_range_end=None):
+        """
+        分块分析 (map) 后合并 (reduce) 为最终报告
+
+        chunks 可以是生成器：分块边生成边提交，同时在途的分块数不超过 max_inflight_chunks。
+        只有一个分块时直接生成最终报告；部分分块失败时用其余分块的结果继续合并。
+        合并失败的组保留原报告参与下一轮合并，某一轮完全无法缩减时退回为各报告的拼接。
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            raise RuntimeError("没有可分析的帖子分块")
+        second = next(chunks, None)
+        if second is None:
+            return self._call_llm(self._build_prompt(first, time_range_start, time_range_end))
+
+        max_parallel = ANALYSIS_CONFIG.get("max_parallel", 4)
+        max_in_flight = ANALYSIS_CONFIG.get("max_inflight_chunks", max_parallel * 2)
+        self.logger.info(f"帖子数据分块分析，并发度 {max_parallel}，在途分块上限 {max_in_flight}...")
+
+        def analyze_chunk(chunk):
+            # 分块提示词不带时间段，相同分块在重复/重叠窗口中可命中 LLM 缓存
+            return self._call_llm(self._build_prompt(chunk))
+
+        chunk_stats = {"chunks": 0}
+        partial_reports = self._run_parallel(
+            analyze_chunk,
+            self._count_stream(itertools.chain([first, second], chunks), chunk_stats, "chunks"),
+            max_parallel, "分块分析", max_in_flight
+        )
+        self.logger.info(f"分块分析完成: 成功 {len(partial_reports)}/{chunk_stats['chunks']} 块")
+        if not partial_reports:
+            raise RuntimeError("所有分块的 LLM 分析均失败")
+
+        # 分层合并，直到只剩一份报告；合并失败的组保留原报告进入下一轮，不丢失任何分块的分析
+        reduce_budget = ANALYSIS_CONFIG.get("reduce_token_budget", 12000)
+
+        def reduce_group(group):
+            if len(group) == 1:
+                return group
+            try:
+                merged_report = self._call_llm(self._build_reduce_prompt(group, time_range_start, time_range_end))
+            except Exception as e:
+                self.logger.error(f"合并 {len(group)} 份报告失败，保留原报告: {e}")
+                return group
+            return [merged_report] if merged_report else group
+
+        def reduce_round(groups):
+            results = self._run_parallel(reduce_group, groups, max_parallel, "合并报告")
+            return [report for group_reports in results for report in group_reports]
+
+        while len(partial_reports) > 1:
+            groups = self._group_by_budget(partial_reports, reduce_budget)
+            self.logger.info(f"合并 {len(partial_reports)} 份分块报告 -> {len(groups)} 份...")
+            merged = reduce_round(groups)
+            if len(merged) >= len(partial_reports):
+                # 无法继续缩减 (单份报告已超出预算或合并全部失败)，强制两两合并
+                merged = reduce_round([partial_reports[i:i + 2] for i in range(0, len(partial_reports), 2)])
+            if len(merged) >= len(partial_reports):
+                self.logger.warning(f"合并分块报告全部失败，直接拼接 {len(merged)} 份分块报告")
+                return "\n\n".join(merged)
+            partial_reports = merged
+
+        return partial_reports[0]
+
+    def _run_parallel(self, func, items, max_parallel, desc, max_in_flight=None):
+        """
+        并发执行并按原顺序返回成功的结果
+
+        items 按需取出后提交，同时在途的任务不超过 max_in_flight 个 (默认为并发度)，
+        items 为生成器时不会被一次性展开到内存。
+        """
+        max_parallel = max(1, max_parallel)
+        max_in_flight = max(max_parallel, max_in_flight or max_parallel)
+        results = {}
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self.logger.error(f"{desc}第 {i + 1} 块失败: {e}")
+
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            for i, item in enumerate(items):
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(func, item)] = i
+            collect(wait(pending)[0])
+        return [results[i] for i in sorted(results) if results[i]]
+
+    @staticmethod
+    def _group_by_budget(reports, token_budget):
+        """按 token 预算将报告分组"""
+        groups = []
+        current, tokens = [], 0
+        for report in reports:
+            report_tokens = estimate_tokens(report)
+            if current and tokens + report_tokens > token_budget:
+                groups.append(current)
+                current, tokens = [], 0
+            current.append(report)
+            tokens += report_tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    def _build_reduce_prompt(self, reports, time_range_start=None, time_range_end=None):
+        time_range_info = ""
+        if time_range_start and time_range_end:
+            time_range_info = f"\n分析时间段: {time_range_start} ~ {time_range_end}\n"
         
-        try:
-            report = self._call_llm(prompt)
-            # 保存分析结果到数据库
-            if storage:
-                storage.save_analysis_report(
-                    report, len(filtered_posts),
-                    time_range_start=time_range_start,
-                    time_range_end=time_range_end,
-                    source=source
-                )
-            return report
-        except Exception as e:
-            self.logger.error(f"LLM 分析失败: {e}")
-            error_report = f"报告生成失败。错误信息: {e}\n\n(请检查 settings.py 中的 API Key配置)"
-            if storage:
-                storage.save_analysis_report(
-                    error_report, len(posts),
-                    time_range_start=time_range_start,
-                    time_range_end=time_range_end,
-                    source=source
-                )
-            return error_report
+        reports_text = "\n\n".join(
+            f"===== 分块报告 {i + 1} =====\n{report}" for i, report in enumerate(reports)
+        )
+        
+        return f"""
+以下是对同一时间段内微博帖子分批分析得到的多份 AI 热点话题报告，请将它们合并为一份完整报告。
+{time_range_info}
+{reports_text}
 
+{_REPORT_FORMAT}
+**注意事项**:
+1. 不同分块中讨论同一个话题的内容必须合并到同一个话题下，核心观点综合各分块的信息
+2. 保留每个话题下所有相关帖子的作者和链接，去掉重复的链接
+3. 按话题热度 (相关帖子数量) 从高到低排列
+4. 如果所有分块报告均无 AI 相关热点，输出 "**今日无 AI 相关热点**"
+"""
+
+    @timed("llm_call_seconds")
     def _call_llm(self, prompt):
         # 检查是否是默认占位符
         if not self.api_key or "YOUR_API_KEY" in self.api_key:
@@ -135,21 +404,36 @@ class ContentAnalyzer:
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": "你是一个专业的科技情报分析师，擅长从社交媒体数据中提取AI热点。"},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.3
+            "temperature": TEMPERATURE
         }
         
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(self.model, SYSTEM_PROMPT, prompt, TEMPERATURE)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info(f"LLM 缓存命中: {cache_key[:12]}")
+                get_metrics().inc("llm_cache_hits")
+                return cached
+        
         self.logger.info(f"正在调用 LLM: {self.model} at {base}")
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=200)
+            # 对话补全请求没有副作用，显式开启 POST 重试
+            response = self.http.post(
+                url, headers=headers, json=payload, endpoint="llm", retries=self.http.max_retries
+            )
             response.raise_for_status()
             result = response.json()
-            return result['choices'][0]['message']['content']
+            content = result['choices'][0]['message']['content']
+            if self.cache and content:
+                self.cache.put(cache_key, self.model, content)
+            return content
         except requests.exceptions.RequestException as e:
             self.logger.error(f"API 请求异常: {e}")
-            if hasattr(e, 'response') and e.response:
+            if getattr(e, 'response', None) is not None:
                 self.logger.error(f"服务端返回: {e.response.text}")
             raise
 
@@ -167,34 +451,31 @@ class ContentAnalyzer:
         """
         基于本地关键词库过滤帖子
         """
-        filtered = []
-        
-        # 预编译关键词正则
-        patterns = []
-        for kw in AI_CORE_KEYWORDS:
-            try:
-                # 尝试直接编译，使用 IGNORECASE 忽略大小写
-                pattern = re.compile(kw, re.IGNORECASE)
-                patterns.append(pattern)
-            except re.error:
-                # 如果编译失败，回退到转义字符串匹配，同样忽略大小写
-                self.logger.warning(f"关键词 '{kw}' 正则编译失败，降级为普通字符串匹配")
-                patterns.append(re.compile(re.escape(kw), re.IGNORECASE))
+        return list(self.iter_filter_posts(posts))
+
+    def iter_filter_posts(self, posts, keyword_hits=None):
+        """
+        基于本地关键词库过滤帖子 (流式)
+
+        帖子带有入库时计算的 keywords 列表 (StorageManager.iter_posts(relevant_only=True)) 时直接使用，不再重新匹配。
+
+        Args:
+            posts: 帖子迭代器
+            keyword_hits: 可选的 Counter，传入时统计相关帖子命中的关键词
+        """
+        # 匹配器按关键词集合版本缓存，只编译一次
+        matcher = get_keyword_matcher()
 
         for post in posts:
-            content = post.get("content", "") or ""
-            author = post.get("author", "") or ""
-            
-            # 组合搜索文本
-            text_to_search = f"{content} {author}"
-            
-            is_relevant = False
-            for pattern in patterns:
-                if pattern.search(text_to_search):
-                    is_relevant = True
-                    break
-            
-            if is_relevant:
-                filtered.append(post)
-                
-        return filtered
+            keywords = post.get('keywords')
+            if keywords is not None:
+                if keywords:
+                    if keyword_hits is not None:
+                        keyword_hits.update(keywords)
+                    yield post
+                continue
+            text_to_search = matcher.post_text(post)
+            if matcher.is_relevant(text_to_search):
+                if keyword_hits is not None:
+                    keyword_hits.update(matcher.find_keywords(text_to_search))
+                yield post
@@ -0,0 +1,178 @@
+"""
+关键词匹配引擎 - 关键词表只编译一次，按关键词集合版本缓存
+
+- 普通关键词统一转小写后构建成前缀树，再展开为一条共享前缀的正则
+  (效果等同 Aho-Corasick，但匹配循环在 re 的 C 实现中完成，比纯 Python 自动机快得多；
+  文本先转小写再做区分大小写的匹配，re 才能启用首字符集优化)
+- 真正的正则关键词 (如 GPT-[345]) 合并为一条带命名分组的多选正则，
+  并用其固定前缀做快速预检，文本中不含前缀时直接跳过
+- 均忽略大小写，且能报告具体命中了哪些关键词
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from config.keywords import AI_CORE_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# 出现这些字符的关键词按正则处理
+_REGEX_CHARS = set("\\[](){}*+?|^$.")
+
+
+def keyword_set_version(keywords: Iterable[str] = None) -> str:
+    """关键词集合的版本号 (关键词列表的内容哈希)"""
+    if keywords is None:
+        keywords = AI_CORE_KEYWORDS
+    data = json.dumps(list(keywords), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def _is_regex_keyword(keyword: str) -> bool:
+    if not any(ch in _REGEX_CHARS for ch in keyword):
+        return False
+    try:
+        re.compile(keyword)
+        return True
+    except re.error:
+        logger.warning(f"关键词 '{keyword}' 正则编译失败，降级为普通字符串匹配")
+        return False
+
+
+def _literal_prefix(pattern: str) -> str:
+    """提取正则必然以之开头的固定前缀 (无法确定时返回空串)"""
+    depth = 0
+    escaped = False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ""
+
+    prefix = []
+    for ch in pattern:
+        if ch in _REGEX_CHARS:
+            if ch in "*?{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(ch)
+    return "".join(prefix).lower()
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """将一组字符串构建成前缀树，并展开为等价的正则"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # 贪婪可选：优先匹配更长的关键词
+            if len(branches) == 1 and len(body) > 1:
+                body = "(?:" + body + ")"
+            body += "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """编译后的关键词匹配器"""
+
+    def __init__(self, keywords: Iterable[str] = None):
+        keywords = list(AI_CORE_KEYWORDS if keywords is None else keywords)
+        self.version = keyword_set_version(keywords)
+
+        self.regex_keywords: List[str] = []
+        self._literals: Dict[str, str] = {}  # 小写 -> 原始关键词
+        for kw in keywords:
+            if not kw:
+                continue
+            if _is_regex_keyword(kw):
+                self.regex_keywords.append(kw)
+            else:
+                self._literals.setdefault(kw.lower(), kw)
+
+        # 命中较长关键词时，同时记为命中其包含的较短关键词 (如 ChatGPT -> GPT)
+        self._implied: Dict[str, Set[str]] = {
+            lit: {self._literals[other] for other in self._literals if other in lit}
+            for lit in self._literals
+        }
+
+        self._literal_re: Optional[re.Pattern] = None
+        if self._literals:
+            self._literal_re = re.compile(_trie_pattern(self._literals))
+
+        self._regex_re: Optional[re.Pattern] = None
+        self._regex_prefixes: List[str] = []
+        if self.regex_keywords:
+            alternation = "|".join(
+                f"(?P<k{i}>{kw})" for i, kw in enumerate(self.regex_keywords)
+            )
+            self._regex_re = re.compile(alternation, re.IGNORECASE)
+            self._regex_prefixes = [_literal_prefix(kw) for kw in self.regex_keywords]
+
+    def _regex_may_match(self, lowered: str) -> bool:
+        """正则关键词的前缀预检"""
+        return any(prefix in lowered for prefix in self._regex_prefixes)
+
+    @staticmethod
+    def post_text(post: Dict) -> str:
+        """帖子参与匹配的文本 (正文 + 作者)"""
+        return f"{post.get('content', '') or ''} {post.get('author', '') or ''}"
+
+    def is_relevant(self, text: str) -> bool:
+        """是否命中任一关键词"""
+        lowered = text.lower()
+        if self._literal_re and self._literal_re.search(lowered):
+            return True
+        if self._regex_re and self._regex_may_match(lowered):
+            return bool(self._regex_re.search(text))
+        return False
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """返回命中的关键词集合 (原始写法)"""
+        hits: Set[str] = set()
+        lowered = text.lower()
+        if self._literal_re:
+            for match in self._literal_re.finditer(lowered):
+                hits.update(self._implied.get(match.group(0), ()))
+        if self._regex_re and self._regex_may_match(lowered):
+            for match in self._regex_re.finditer(text):
+                hits.add(self.regex_keywords[int(match.lastgroup[1:])])
+        return hits
+
+
+_matchers: Dict[str, KeywordMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_keyword_matcher(keywords: Iterable[str] = None) -> KeywordMatcher:
+    """按关键词集合版本获取 (并缓存) 匹配器"""
+    keywords = list(AI_CORE_KEYWORDS if keywords is None else keywords)
+    version = keyword_set_version(keywords)
+    matcher = _matchers.get(version)
+    if matcher is None:
+        with _matchers_lock:
+            matcher = _matchers.get(version)
+            if matcher is None:
+                matcher = KeywordMatcher(keywords)
+                _matchers[version] = matcher
+    return matcher
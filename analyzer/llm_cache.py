@@ -0,0 +1,67 @@
+"""
+LLM 响应缓存 - 以 (模型, 系统提示词, 用户提示词, temperature) 的内容哈希为键，存储在 SQLite
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, Optional
+
+from config.settings import LLM_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """带 TTL 和 LRU 淘汰的 LLM 响应缓存，统计命中/未命中次数"""
+
+    def __init__(
+        self,
+        storage,
+        ttl_seconds: float = None,
+        max_entries: int = None,
+        max_bytes: int = None
+    ):
+        self.storage = storage
+        self.ttl_seconds = ttl_seconds or LLM_CACHE_CONFIG.get("ttl_seconds")
+        self.max_entries = max_entries or LLM_CACHE_CONFIG.get("max_entries")
+        self.max_bytes = max_bytes or LLM_CACHE_CONFIG.get("max_bytes")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str, temperature: float) -> str:
+        """计算缓存键"""
+        data = json.dumps(
+            [model, system_prompt, prompt, temperature], ensure_ascii=False
+        ).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            response = self.storage.get_llm_cache(key, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"读取LLM缓存失败: {e}")
+            response = None
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def put(self, key: str, model: str, response: str):
+        try:
+            self.storage.put_llm_cache(
+                key, model, response,
+                ttl_seconds=self.ttl_seconds,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes
+            )
+        except Exception as e:
+            logger.warning(f"写入LLM缓存失败: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
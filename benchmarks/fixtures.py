@@ -0,0 +1,168 @@
+"""
+合成微博时间线数据 - 生成结构与 groupstimeline 接口一致的响应，用于性能基准
+
+可配置微博条数、作者数和关键词密度；相同参数和随机种子生成的数据完全一致。
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from config.keywords import AI_CORE_KEYWORDS
+
+# 不含任何关键词的普通文本片段
+_FILLER = [
+    "今天天气不错，下午出去走了走。",
+    "周末推荐一本好书，读完很有收获。",
+    "这家店的咖啡味道很好，环境也安静。",
+    "刚看完一场球赛，比分很接近。",
+    "晚上做了红烧肉，家人都说好吃。",
+    "城市夜景真美，拍了几张照片分享一下。",
+    "最近在学做面包，第三次终于成功了。",
+    "旅行途中遇到了很热情的当地人。",
+    "这部电影的配乐非常动人。",
+    "早起跑步五公里，状态不错。",
+]
+
+_TOPICS = [
+    "{kw} 发布了新版本，评测结果很亮眼",
+    "关于 {kw} 的一些思考，欢迎讨论",
+    "{kw} 相关论文解读，附代码链接",
+    "实测 {kw}：优缺点都很明显",
+    "行业观察：{kw} 正在改变工作方式",
+]
+
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+_WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+_EPOCH = datetime(1970, 1, 1)
+_UTC_OFFSET = 8 * 3600
+
+# 只用普通字符串关键词生成文本 (正则关键词无法直接写进文本)
+_LITERAL_KEYWORDS = [kw for kw in AI_CORE_KEYWORDS if not any(ch in kw for ch in "\\[](){}*+?|^$.")]
+
+
+def weibo_time(dt: datetime) -> str:
+    """格式化为微博 created_at 格式 (东八区)"""
+    return (
+        f"{_WEEKDAYS[dt.weekday()]} {_MONTHS[dt.month - 1]} {dt.day:02d} "
+        f"{dt:%H:%M:%S} +0800 {dt.year}"
+    )
+
+
+class TimelineFixture:
+    """合成时间线生成器"""
+
+    def __init__(
+        self,
+        total_statuses: int,
+        users: int = 200,
+        keyword_density: float = 0.3,
+        page_size: int = 20,
+        seed: int = 42,
+        end_time: datetime = None,
+        interval_seconds: int = 30
+    ):
+        """
+        Args:
+            total_statuses: 微博总条数
+            users: 作者数
+            keyword_density: 含 AI 关键词的微博比例
+            page_size: 每个响应包含的微博数
+            seed: 随机种子
+            end_time: 最新一条微博的时间 (东八区)
+            interval_seconds: 相邻微博的平均时间间隔
+        """
+        self.total_statuses = total_statuses
+        self.users = max(1, users)
+        self.keyword_density = keyword_density
+        self.page_size = page_size
+        self.seed = seed
+        self.end_time = end_time or datetime(2026, 1, 1, 12, 0, 0)
+        self.interval_seconds = interval_seconds
+
+    @property
+    def end_ts(self) -> int:
+        """最新一条微博的 Unix 时间戳"""
+        return int((self.end_time - _EPOCH).total_seconds()) - _UTC_OFFSET
+
+    @property
+    def start_ts(self) -> int:
+        """最早一条微博的 Unix 时间戳"""
+        return self.end_ts - (self.total_statuses - 1) * self.interval_seconds
+
+    def _user(self, rng: random.Random, index: int) -> Dict:
+        return {
+            "id": 5000000000 + index,
+            "idstr": str(5000000000 + index),
+            "screen_name": f"用户{index:05d}",
+            "profile_image_url": f"https://tvax1.sinaimg.cn/crop.0.0.180.180.50/{index:08x}.jpg",
+            "verified": rng.random() < 0.2,
+            "followers_count": rng.randint(10, 2000000),
+        }
+
+    def _text(self, rng: random.Random) -> str:
+        filler = "".join(rng.choice(_FILLER) for _ in range(rng.randint(1, 4)))
+        if rng.random() < self.keyword_density:
+            topic = rng.choice(_TOPICS).format(kw=rng.choice(_LITERAL_KEYWORDS))
+            return f"{topic}。{filler}"
+        return filler
+
+    def _status(self, rng: random.Random, index: int, users: List[Dict]) -> Dict:
+        created = self.end_time - timedelta(seconds=index * self.interval_seconds)
+        mid = 5200000000000000 + self.seed * 10000000 + index
+        text = self._text(rng)
+        pic_count = rng.choice([0, 0, 0, 1, 3, 9])
+        status = {
+            "created_at": weibo_time(created),
+            "id": mid,
+            "idstr": str(mid),
+            "mid": str(mid),
+            "mblogid": f"P{self.seed:02d}{index:09d}",
+            "user": users[rng.randrange(len(users))],
+            "text": f"<span>{text}</span>",
+            "text_raw": text,
+            "textLength": len(text) * 2,
+            "source": rng.choice(["iPhone客户端", "Android", "微博网页版"]),
+            "pic_ids": [f"{mid:x}{i:02d}" for i in range(pic_count)],
+            "pic_num": pic_count,
+            "reposts_count": rng.randint(0, 5000),
+            "comments_count": rng.randint(0, 3000),
+            "attitudes_count": rng.randint(0, 50000),
+            "isLongText": len(text) > 140,
+        }
+        if rng.random() < 0.05:
+            status["page_info"] = {
+                "type": "video",
+                "media_info": {"play_url": f"https://f.video.weibocdn.com/{mid}.mp4"},
+            }
+        return status
+
+    def iter_pages(self) -> Iterator[Dict]:
+        """按时间倒序逐页生成响应 (惰性生成，内存占用只与 page_size 有关)"""
+        rng = random.Random(self.seed)
+        users = [self._user(rng, i) for i in range(self.users)]
+        produced = 0
+        while produced < self.total_statuses:
+            count = min(self.page_size, self.total_statuses - produced)
+            statuses = [self._status(rng, produced + i, users) for i in range(count)]
+            produced += count
+            yield {
+                "ok": 1,
+                "statuses": statuses,
+                "since_id": statuses[0]["idstr"],
+                "max_id": statuses[-1]["id"] - 1,
+                "max_id_str": str(statuses[-1]["id"] - 1),
+                "total_number": self.total_statuses,
+            }
+
+    def iter_chunks(self, chunk_statuses: int = 10000) -> Iterator[List[Dict]]:
+        """将响应按约 chunk_statuses 条微博分组，便于分段计时"""
+        chunk: List[Dict] = []
+        size = 0
+        for page in self.iter_pages():
+            chunk.append(page)
+            size += len(page["statuses"])
+            if size >= chunk_statuses:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
@@ -0,0 +1,186 @@
+"""
+性能基准 - 用合成时间线数据测量解析、过滤、入库和范围查询的吞吐 (帖子/秒)
+
+用法:
+    python benchmarks/run_benchmarks.py                      # 默认 1k,100k
+    python benchmarks/run_benchmarks.py --sizes 1k,100k,1m
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/bench_xxx.json --threshold 0.2
+
+结果写入 JSON 文件；指定 --baseline 时任一指标低于基线的 (1 - threshold) 倍即以退出码 1 结束。
+"""
+import argparse
+import json
+import logging
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from analyzer.content_analyzer import ContentAnalyzer
+from benchmarks.fixtures import TimelineFixture
+from crawlers.weibo_parser import parse_api_response
+from data_manager.storage import SQLiteManager
+from utils.time_parser import parse_time_with_epoch
+
+RESULTS_DIR = Path(__file__).parent / "results"
+STAGES = ("parse", "filter", "ingest", "range_query")
+CHUNK_STATUSES = 10000
+
+
+def parse_size(text: str) -> int:
+    """解析 1k / 100k / 1m 形式的规模"""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def size_label(size: int) -> str:
+    if size >= 1000000 and size % 1000000 == 0:
+        return f"{size // 1000000}m"
+    if size >= 1000 and size % 1000 == 0:
+        return f"{size // 1000}k"
+    return str(size)
+
+
+def run_size(size: int, args) -> Dict[str, Dict]:
+    """对一个数据规模运行全部阶段，数据生成时间不计入"""
+    fixture = TimelineFixture(
+        size,
+        users=args.users,
+        keyword_density=args.keyword_density,
+        seed=args.seed
+    )
+    analyzer = ContentAnalyzer()
+    seconds = {stage: 0.0 for stage in STAGES}
+    counts = {stage: 0 for stage in STAGES}
+    relevant = 0
+
+    # 不同规模的时间戳有重叠，清空缓存避免后一轮命中前一轮的解析结果
+    parse_time_with_epoch.cache_clear()
+
+    with tempfile.TemporaryDirectory(prefix="pulseai_bench_") as tmp_dir:
+        db = SQLiteManager(str(Path(tmp_dir) / "bench.db"))
+        try:
+            for chunk in fixture.iter_chunks(CHUNK_STATUSES):
+                started = time.perf_counter()
+                posts: List[Dict] = []
+                for page in chunk:
+                    posts.extend(parse_api_response(page))
+                seconds["parse"] += time.perf_counter() - started
+                counts["parse"] += len(posts)
+
+                started = time.perf_counter()
+                relevant += len(analyzer._filter_posts(posts))
+                seconds["filter"] += time.perf_counter() - started
+                counts["filter"] += len(posts)
+
+                started = time.perf_counter()
+                db.bulk_save_posts(posts, date_key="bench")
+                seconds["ingest"] += time.perf_counter() - started
+                counts["ingest"] += len(posts)
+
+            started = time.perf_counter()
+            for _ in db.iter_posts_by_time_range(fixture.start_ts, fixture.end_ts):
+                counts["range_query"] += 1
+            seconds["range_query"] += time.perf_counter() - started
+        finally:
+            db.close()
+
+    if counts["range_query"] != counts["ingest"]:
+        print(f"警告: 范围查询返回 {counts['range_query']} 条，入库 {counts['ingest']} 条")
+
+    results = {}
+    for stage in STAGES:
+        elapsed = seconds[stage]
+        results[stage] = {
+            "posts": counts[stage],
+            "seconds": round(elapsed, 4),
+            "posts_per_sec": round(counts[stage] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+    results["filter"]["relevant_posts"] = relevant
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """返回低于基线阈值的指标描述"""
+    regressions = []
+    for stage, by_size in current.items():
+        for label, metrics in by_size.items():
+            base = baseline.get(stage, {}).get(label)
+            if not base or not base.get("posts_per_sec"):
+                continue
+            floor = base["posts_per_sec"] * (1 - threshold)
+            if metrics["posts_per_sec"] < floor:
+                change = metrics["posts_per_sec"] / base["posts_per_sec"] - 1
+                regressions.append(
+                    f"{stage}@{label}: {metrics['posts_per_sec']:.0f}/s, "
+                    f"基线 {base['posts_per_sec']:.0f}/s ({change:+.1%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PulseAI 性能基准")
+    parser.add_argument("--sizes", default="1k,100k", help="数据规模，逗号分隔 (如 1k,100k,1m)")
+    parser.add_argument("--users", type=int, default=500, help="合成数据的作者数")
+    parser.add_argument("--keyword-density", type=float, default=0.3, help="含AI关键词的微博比例")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 路径 (默认 benchmarks/results/bench_<时间>.json)")
+    parser.add_argument("--baseline", help="用于对比的基线结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的最大吞吐下降比例")
+    args = parser.parse_args()
+
+    # 入库等模块按批输出 INFO 日志，基准中只保留警告
+    logging.getLogger().setLevel(logging.WARNING)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    results: Dict[str, Dict] = {stage: {} for stage in STAGES}
+
+    for size in sizes:
+        label = size_label(size)
+        print(f"运行规模 {label} ...")
+        for stage, metrics in run_size(size, args).items():
+            results[stage][label] = metrics
+            print(f"  {stage:<12} {metrics['posts_per_sec']:>12,.0f} 帖子/秒  ({metrics['seconds']:.2f}s)")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "users": args.users,
+            "keyword_density": args.keyword_density,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已保存: {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")).get("results", {})
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"性能回退 (阈值 {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"未发现超过 {args.threshold:.0%} 的性能回退")
+
+
+if __name__ == "__main__":
+    main()
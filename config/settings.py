@@ -29,6 +29,8 @@ WEIBO_ACCOUNT = {
 # 微博 API 端点配置
 WEIBO_API_ENDPOINTS = {
     "friends_timeline": "ajax/feed/groupstimeline",  # 特别关注时间线
+    "groups_timeline_url": "https://weibo.com/ajax/feed/groupstimeline",  # 直连分页接口
+    "all_groups_url": "https://weibo.com/ajax/feed/allGroups",  # 分组列表 (查找分组ID)
 }
 
 # 采集配置
@@ -38,6 +40,56 @@ COLLECTOR_CONFIG = {
     "scroll_interval": (1, 3),  # 滚动间隔(秒)
     "no_new_data_timeout": 300,  # 无新数据超时时间(秒)
     "relevance_threshold": 0.6,  # 相关性阈值
+    # 采集方式: browser 滚动页面拦截接口; http 复用浏览器 Cookie 直接分页请求接口
+    "fetch_mode": os.getenv("WEIBO_FETCH_MODE", "browser"),
+    "group_name": "特别关注",  # 默认采集的关注分组
+    "special_follow_list_id": os.getenv("WEIBO_LIST_ID", ""),  # 特别关注分组ID，留空时自动查找
+    "page_size": 25,  # 直连模式每页条数
+    "max_pages": 200,  # 直连模式最多翻页数
+    # 数据包解析: inline 采集线程内解析 / thread 线程池 / process 进程池 (大批量回填时与滚动并行)
+    "parse_mode": os.getenv("WEIBO_PARSE_MODE", "inline"),
+    "parse_workers": 2,
+    # 滚动调度: 有新数据时立即继续滚动，信息流停滞时才退避
+    "scroll_scheduler": {
+        "response_timeout": 3.0,  # 滚动后等待首个接口响应的时间(秒)
+        "drain_timeout": 0.05,  # 取走后续已到达数据包时的等待时间(秒)
+        "min_backoff": 0.5,  # 停滞时的初始退避(秒)
+        "max_backoff": 8.0,  # 退避上限(秒)
+        "backoff_factor": 2.0,
+    },
+}
+
+# SQLite 配置
+SQLITE_CONFIG = {
+    "pool_size": 8,  # 连接池大小，0 表示每次操作新建连接(旧行为)
+    "journal_mode": "WAL",  # WAL 模式下读写互不阻塞
+    "synchronous": "NORMAL",  # WAL 下 NORMAL 已足够安全
+    "cache_size": -64000,  # 页缓存大小，负数单位为 KiB (约64MB)
+    "mmap_size": 256 * 1024 * 1024,  # 内存映射大小(字节)
+    "busy_timeout": 5000,  # 锁等待超时(毫秒)
+    "batch_size": 500,  # 批量写入时每个 executemany 分块的行数
+}
+
+# 异步写入(write-behind)配置
+WRITE_BEHIND_CONFIG = {
+    "max_queue_size": 256,  # 队列容量，满时产生背压
+    "batch_size": 64,  # 单次组提交最多合并的任务数
+    "flush_interval": 0.5,  # 队列空闲时的最长提交间隔(秒)
+    "enqueue_timeout": 2.0,  # 队列满时入队最长阻塞时间(秒)
+}
+
+# 跨运行的已采集ID索引 (布隆过滤器 + SQLite 精确校验)
+SEEN_INDEX_CONFIG = {
+    "false_positive_rate": 0.001,  # 布隆过滤器目标误判率
+    "min_capacity": 100000,  # 最小容量，实际容量取 max(此值, 已有帖子数 x 2)
+}
+
+# 运行指标配置 (计时/计数，/metrics 以 Prometheus 文本格式输出)
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no"),
+    "sample_window": 1000,  # 每个直方图保留最近的样本数，用于计算 p50/p95
+    # 直方图桶上界 (秒)
+    "buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
 }
 
 # 日志配置
@@ -54,6 +106,23 @@ BROWSER_CONFIG = {
     "user_data_path": os.getenv("BROWSER_USER_DATA_PATH", None),
 }
 
+# 多分组/多账号并行采集配置
+CRAWL_ORCHESTRATOR_CONFIG = {
+    # 关注分组，逗号分隔
+    "groups": [g.strip() for g in os.getenv("WEIBO_GROUPS", "特别关注").split(",") if g.strip()],
+    # 账号 -> 浏览器用户数据目录，格式 "name=path;name2=path2"，留空时只使用默认账号
+    "accounts": {
+        name.strip(): path.strip()
+        for name, _, path in (
+            item.partition("=") for item in os.getenv("WEIBO_ACCOUNTS", "").split(";") if "=" in item
+        )
+    },
+    "max_concurrency": int(os.getenv("CRAWL_MAX_CONCURRENCY", "2")),  # 全局同时运行的采集任务数
+    "account_rate": 1.0,  # 每个账号每秒最多滚动/请求次数
+    "account_burst": 3,  # 令牌桶容量
+    "base_port": 9300,  # 多账号时各浏览器的调试端口从此递增
+}
+
 # LLM 大模型配置（从环境变量读取）
 LLM_CONFIG = {
     "api_key": os.getenv("LLM_API_KEY", ""),
@@ -61,5 +130,71 @@ LLM_CONFIG = {
     "model_name": os.getenv("LLM_MODEL_NAME", ""),
 }
 
+# LLM 分析配置
+ANALYSIS_CONFIG = {
+    "mode": os.getenv("ANALYSIS_MODE", "map_reduce"),  # map_reduce: 分块并发分析后合并; single: 单次调用(截断)
+    "chunk_token_budget": 6000,  # 每个分块的帖子数据预估 token 上限
+    "reduce_token_budget": 12000,  # 合并阶段单次输入的预估 token 上限，超出时分层合并
+    "max_parallel": 4,  # 并发调用 LLM 的最大数量
+    "max_inflight_chunks": 8,  # 已生成但尚未完成分析的分块上限，控制流式分块的内存占用
+    "max_content_chars": 500,  # 单条帖子正文保留的最大字符数
+}
+
+# LLM 响应缓存配置 (存储在 SQLite 的 llm_cache 表)
+LLM_CACHE_CONFIG = {
+    "enabled": os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false",
+    "ttl_seconds": 7 * 24 * 3600,  # 缓存有效期
+    "max_entries": 2000,  # 最多缓存条数，超出按最近访问时间淘汰 (LRU)
+    "max_bytes": 50 * 1024 * 1024,  # 缓存内容总大小上限
+}
+
+# 报告读取缓存 (Web 进程内)，本进程写入报告时立即失效，其他进程写入在 TTL 内可见
+REPORT_CACHE_CONFIG = {
+    "ttl_seconds": float(os.getenv("REPORT_CACHE_TTL", "30")),
+    "max_entries": 256,  # 最多缓存条数，超出按最近访问淘汰 (LRU)
+    "version_check_seconds": 1.0,  # 检查报告表版本的最小间隔，其他进程写入的报告至多延迟这么久可见
+    "page_size": 20,  # 报告列表默认每页条数
+    "max_page_size": 100,
+    "gzip_min_bytes": 1024,  # 响应体超过该大小且客户端支持时 gzip 压缩
+}
+
+# 全文检索 (SQLite FTS5)，trigram 分词对中英文混排都能做子串匹配，但查询词至少 3 个字符
+SEARCH_CONFIG = {
+    "tokenizer": "trigram",
+    "default_limit": 20,
+    "max_limit": 100,
+    "snippet_tokens": 24,  # 摘要片段长度 (trigram 下约为字符数)
+    "highlight": ("[", "]"),  # 摘要中命中词的标记
+}
+
+# Web 生产部署配置 (web/serve.py / web/gunicorn.conf.py)
+WEB_CONFIG = {
+    "host": os.getenv("WEB_HOST", "0.0.0.0"),
+    "port": int(os.getenv("WEB_PORT", "8000")),
+    # 工作进程数，默认 CPU 核数 x 2 + 1 (waitress 为单进程，只使用 threads)
+    "workers": int(os.getenv("WEB_WORKERS", "0")) or (os.cpu_count() or 1) * 2 + 1,
+    "threads": int(os.getenv("WEB_THREADS", "4")),  # 每个工作进程的线程数
+    "timeout": int(os.getenv("WEB_TIMEOUT", "30")),  # 请求超时 (秒)
+}
+
+# HTTP 客户端配置 (LLM / Webhook 共用连接池)
+HTTP_CLIENT_CONFIG = {
+    "pool_connections": 10,  # 连接池数量 (按主机)
+    "pool_maxsize": 10,  # 每个主机的最大连接数
+    # (连接超时, 读取超时)，按端点名配置
+    "timeouts": {
+        "default": (5, 30),
+        "llm": (5, 200),
+        "webhook": (5, 10),
+        "weibo": (5, 15),
+    },
+    "max_retries": 3,  # 最大重试次数
+    "backoff_base": 1.0,  # 指数退避基数(秒)
+    "backoff_max": 30.0,  # 单次退避上限(秒)
+    "retry_statuses": (429, 500, 502, 503, 504),
+    "failure_threshold": 5,  # 连续失败多少次后熔断
+    "reset_timeout": 60,  # 熔断持续时间(秒)
+}
+
 # 飞书 Webhook 配置
 WEBHOOK_ADDRESS = os.getenv("WEBHOOK_ADDRESS", "")
@@ -0,0 +1,182 @@
+"""
+采集编排 - 多个关注分组/多个账号并行采集，共享去重集合与存储写入线程
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+
+from analyzer.keyword_matcher import get_keyword_matcher
+from config.settings import BROWSER_CONFIG, CRAWL_ORCHESTRATOR_CONFIG
+from crawlers.weibo_crawler import WeiboCrawler
+from data_manager.seen_index import SeenIdIndex
+from utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlOrchestrator:
+    """
+    并行运行 账号 x 分组 个采集任务
+
+    - 每个账号一个浏览器 (独立的 user_data_path 和调试端口)，账号下每个分组一个标签页
+    - 所有任务共用一个 SeenIdIndex 去重 (含历史已入库帖子)，共用一个 AsyncStorageWriter 写库
+    - 全局并发数由线程池大小限制；同一账号的所有任务共用一个令牌桶限速
+    """
+
+    def __init__(
+        self,
+        accounts: Dict[str, str] = None,
+        groups: List[str] = None,
+        max_concurrency: int = None,
+        headless: bool = False,
+        account_rate: float = None,
+        account_burst: int = None
+    ):
+        """
+        Args:
+            accounts: 账号名 -> 浏览器用户数据目录，默认读取配置；为空时只使用默认账号
+            groups: 要采集的分组名列表
+            max_concurrency: 全局最多同时运行的采集任务数
+            headless: 无头模式
+            account_rate: 每个账号每秒最多滚动/请求次数
+            account_burst: 令牌桶容量
+        """
+        config = CRAWL_ORCHESTRATOR_CONFIG
+        self.accounts = accounts or config.get("accounts") or {
+            "default": BROWSER_CONFIG.get("user_data_path")
+        }
+        self.groups = groups or config.get("groups") or ["特别关注"]
+        self.max_concurrency = max(1, max_concurrency or config.get("max_concurrency", 2))
+        self.headless = headless
+        self.account_rate = account_rate or config.get("account_rate", 1.0)
+        self.account_burst = account_burst or config.get("account_burst", 3)
+
+        self.crawlers: Dict[Tuple[str, str], WeiboCrawler] = {}
+        self.seen_ids = None
+        self.last_stats: Dict[str, Any] = {}
+
+    def _open_crawlers(self):
+        """为每个账号打开浏览器并登录，再为其余分组开标签页"""
+        multi_account = len(self.accounts) > 1
+        base_port = CRAWL_ORCHESTRATOR_CONFIG.get("base_port", 9300)
+
+        for index, (account, user_data_path) in enumerate(self.accounts.items()):
+            limiter = TokenBucket(self.account_rate, self.account_burst)
+            first = None
+            try:
+                first = WeiboCrawler(
+                    headless=self.headless,
+                    user_data_path=user_data_path or None,
+                    account=account,
+                    group_name=self.groups[0],
+                    local_port=base_port + index if multi_account else None,
+                    rate_limiter=limiter
+                )
+                # 同一浏览器的标签页共享登录态，每个账号只登录一次
+                first.login()
+            except Exception as e:
+                logger.error(f"账号 {account} 初始化失败，跳过: {e}")
+                if first:
+                    first.close()
+                continue
+
+            self.crawlers[(account, self.groups[0])] = first
+            for group in self.groups[1:]:
+                try:
+                    self.crawlers[(account, group)] = WeiboCrawler(
+                        account=account,
+                        group_name=group,
+                        browser=first.browser,
+                        rate_limiter=limiter
+                    )
+                except Exception as e:
+                    logger.error(f"账号 {account} 打开分组 '{group}' 标签页失败: {e}")
+
+    def run(self, storage=None, **fetch_kwargs) -> Dict[str, List[Dict]]:
+        """
+        并行采集所有任务
+
+        Args:
+            storage: 调用方的 StorageManager，未传入时新建并在结束后关闭
+            fetch_kwargs: 传给 WeiboCrawler.fetch_latest_posts 的参数
+
+        Returns:
+            {"账号/分组": 帖子列表}
+        """
+        from data_manager.storage import create_storage_manager
+        from data_manager.write_behind import AsyncStorageWriter, WriteBehindError
+
+        if not self.crawlers:
+            self._open_crawlers()
+        if not self.crawlers:
+            raise RuntimeError("没有可用的采集任务 (所有账号初始化失败)")
+
+        started = time.time()
+        results: Dict[str, List[Dict]] = {}
+        errors: Dict[str, str] = {}
+        logger.info(
+            f"开始并行采集: {len(self.accounts)} 个账号 x {len(self.groups)} 个分组，"
+            f"共 {len(self.crawlers)} 个任务，并发 {self.max_concurrency}"
+        )
+
+        owns_storage = storage is None
+        if owns_storage:
+            storage = create_storage_manager(keyword_matcher=get_keyword_matcher())
+        try:
+            self.seen_ids = SeenIdIndex(storage).warm()
+            writer = AsyncStorageWriter(storage).start()
+        except Exception:
+            if owns_storage:
+                storage.close()
+            raise
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="crawl") as executor:
+                futures = {
+                    executor.submit(
+                        crawler.fetch_latest_posts,
+                        seen_ids=self.seen_ids,
+                        writer=writer,
+                        storage=storage,
+                        **fetch_kwargs
+                    ): f"{account}/{group}"
+                    for (account, group), crawler in self.crawlers.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        errors[name] = str(e)
+                        logger.error(f"采集任务 {name} 失败: {e}")
+        finally:
+            writer.close(raise_on_error=False)
+            if owns_storage:
+                storage.close()
+        write_failures = writer.failures()
+
+        self.last_stats = {
+            "tasks": len(futures),
+            "failed": len(errors),
+            "errors": errors,
+            "posts": {name: len(posts) for name, posts in results.items()},
+            "unique_posts": len(self.seen_ids),
+            "skipped_known": sum(c.last_run_stats["skipped_known"] for c in self.crawlers.values()),
+            "seen_index": self.seen_ids.stats(),
+            "write_failures": write_failures,
+            "seconds": round(time.time() - started, 2),
+        }
+        logger.info(
+            f"并行采集完成: {self.last_stats['tasks']} 个任务 ({self.last_stats['failed']} 个失败)，"
+            f"去重后共 {self.last_stats['unique_posts']} 条新帖子，跳过已入库 {self.last_stats['skipped_known']} 条，"
+            f"耗时 {self.last_stats['seconds']}s"
+        )
+        if write_failures:
+            raise WriteBehindError(write_failures)
+        return results
+
+    def close(self):
+        """关闭所有标签页和浏览器 (先关共用浏览器的标签页)"""
+        for crawler in sorted(self.crawlers.values(), key=lambda c: c.owns_browser):
+            crawler.close()
+        self.crawlers.clear()
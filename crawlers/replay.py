@@ -0,0 +1,143 @@
+"""
+离线回放 - 从 raw_api_responses 重放历史采集，无需浏览器
+
+原始响应 -> parse_api_response -> bulk_save_posts (-> 分析)，全程按 CPU 速度运行，
+同时作为解析/入库链路的可复现吞吐基准。
+"""
+import logging
+import time
+from typing import Any, Dict, Iterator, List
+
+from crawlers.weibo_parser import parse_api_response
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayEngine:
+    """回放存储中的原始API响应"""
+
+    def __init__(self, storage, batch_size: int = 500, dry_run: bool = False):
+        """
+        Args:
+            storage: StorageManager 实例
+            batch_size: 每次批量写入的帖子数
+            dry_run: 只读取和解析，不写入数据库 (纯解析基准)
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.last_stats: Dict[str, Any] = {}
+
+    def _new_stats(self) -> Dict[str, Any]:
+        return {
+            "responses": 0,
+            "statuses": 0,
+            "posts": 0,
+            "duplicates": 0,
+            "inserted": 0,
+            "updated": 0,
+            "failed": 0,
+            "read_seconds": 0.0,
+            "parse_seconds": 0.0,
+            "save_seconds": 0.0,
+        }
+
+    def _save_batch(self, batch: List[Dict], stats: Dict[str, Any]):
+        if not batch or self.dry_run:
+            return
+        started = time.perf_counter()
+        # 回放的帖子保留各自原始响应的 date_key
+        by_date: Dict[str, List[Dict]] = {}
+        for post in batch:
+            by_date.setdefault(post.get("date_key"), []).append(post)
+        with self.storage.transaction():
+            for date_key, posts in by_date.items():
+                result = self.storage.bulk_save_posts(posts, date_key=date_key)
+                for key in ("inserted", "updated", "failed"):
+                    stats[key] += result.get(key, 0)
+        stats["save_seconds"] += time.perf_counter() - started
+
+    def iter_posts(
+        self,
+        date_key: str = None,
+        start_time: str = None,
+        end_time: str = None
+    ) -> Iterator[Dict]:
+        """
+        回放并逐条产出帖子 (生成器)，帖子按批写入数据库
+
+        同一帖子在多个响应中重复出现时只产出第一次。统计结果在 last_stats 中。
+
+        Args:
+            date_key: 只回放该日期的响应
+            start_time / end_time: 按响应的 collected_at 过滤
+        """
+        stats = self._new_stats()
+        self.last_stats = stats
+        seen = set()
+        batch: List[Dict] = []
+        started = time.perf_counter()
+
+        responses = self.storage.iter_raw_api_responses(date_key, start_time, end_time)
+        while True:
+            read_started = time.perf_counter()
+            record = next(responses, None)
+            stats["read_seconds"] += time.perf_counter() - read_started
+            if record is None:
+                break
+
+            data = record.get("response_data")
+            stats["responses"] += 1
+            if not isinstance(data, dict):
+                continue
+
+            parse_started = time.perf_counter()
+            statuses = data.get("statuses") or []
+            stats["statuses"] += len(statuses)
+            posts = parse_api_response(data)
+            stats["parse_seconds"] += time.perf_counter() - parse_started
+
+            for post in posts:
+                mblog_id = post.get("mblog_id")
+                if not mblog_id or mblog_id in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(mblog_id)
+                post["collected_at"] = record.get("collected_at")
+                post["date_key"] = record.get("date_key")
+                stats["posts"] += 1
+                batch.append(post)
+                yield post
+
+            if len(batch) >= self.batch_size:
+                self._save_batch(batch, stats)
+                batch = []
+
+        self._save_batch(batch, stats)
+        self._finish(stats, time.perf_counter() - started)
+
+    def run(self, date_key: str = None, start_time: str = None, end_time: str = None) -> Dict[str, Any]:
+        """回放并入库 (不分析)，返回统计"""
+        for _ in self.iter_posts(date_key, start_time, end_time):
+            pass
+        return self.last_stats
+
+    def _finish(self, stats: Dict[str, Any], total_seconds: float):
+        stats["total_seconds"] = total_seconds
+
+        def per_second(count: int) -> float:
+            return round(count / total_seconds, 1) if total_seconds > 0 else 0.0
+
+        stats["responses_per_second"] = per_second(stats["responses"])
+        stats["statuses_per_second"] = per_second(stats["statuses"])
+        stats["posts_per_second"] = per_second(stats["posts"])
+        for key in ("read_seconds", "parse_seconds", "save_seconds", "total_seconds"):
+            stats[key] = round(stats[key], 4)
+
+        logger.info(
+            f"回放完成: 响应 {stats['responses']} 个，微博 {stats['statuses']} 条，"
+            f"去重后帖子 {stats['posts']} 条 (新增 {stats['inserted']}，更新 {stats['updated']})；"
+            f"耗时 {stats['total_seconds']:.2f}s (读取 {stats['read_seconds']:.2f}s / "
+            f"解析 {stats['parse_seconds']:.2f}s / 入库 {stats['save_seconds']:.2f}s)，"
+            f"{stats['statuses_per_second']} 条/秒"
+        )
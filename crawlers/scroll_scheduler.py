@@ -0,0 +1,113 @@
+"""
+自适应滚动调度 - 有数据时立即继续滚动，只在信息流停滞时指数退避，并记录每轮耗时
+"""
+import logging
+import random
+from typing import Any, Dict, List
+
+from config.settings import COLLECTOR_CONFIG
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ScrollScheduler:
+    """
+    滚动节奏控制
+
+    - 本轮拿到新帖子: 退避清零，解析完立即进行下一次滚动
+    - 本轮无响应或响应中没有新帖子 (停滞): 等待 backoff 秒后再滚动，
+      backoff 从 min_backoff 开始按 backoff_factor 倍增，上限 max_backoff，并加入抖动
+    """
+
+    def __init__(
+        self,
+        response_timeout: float = None,
+        drain_timeout: float = None,
+        min_backoff: float = None,
+        max_backoff: float = None,
+        backoff_factor: float = None
+    ):
+        config = COLLECTOR_CONFIG.get("scroll_scheduler", {})
+        self.response_timeout = response_timeout or config.get("response_timeout", 3.0)
+        self.drain_timeout = drain_timeout or config.get("drain_timeout", 0.05)
+        self.min_backoff = min_backoff or config.get("min_backoff", 0.5)
+        self.max_backoff = max_backoff or config.get("max_backoff", 8.0)
+        self.backoff_factor = backoff_factor or config.get("backoff_factor", 2.0)
+
+        self._backoff = 0.0
+        self.stalls = 0
+        self.timings: List[Dict[str, Any]] = []
+
+    def next_delay(self, new_count: int) -> float:
+        """根据本轮新增帖子数返回下一次滚动前的等待时间"""
+        if new_count > 0:
+            self._backoff = 0.0
+            return 0.0
+        self.stalls += 1
+        if self._backoff <= 0:
+            self._backoff = self.min_backoff
+        else:
+            self._backoff = min(self._backoff * self.backoff_factor, self.max_backoff)
+        # 抖动范围 [backoff/2, backoff]，避免固定节奏
+        return random.uniform(self._backoff / 2, self._backoff)
+
+    def record(
+        self,
+        scroll_seconds: float,
+        wait_seconds: float,
+        parse_seconds: float,
+        idle_seconds: float,
+        packets: int,
+        new_posts: int
+    ):
+        """记录一轮 滚动 -> 等待响应 -> 解析 -> 退避 的耗时"""
+        self.timings.append({
+            "iteration": len(self.timings) + 1,
+            "scroll_seconds": round(scroll_seconds, 4),
+            "wait_seconds": round(wait_seconds, 4),
+            "parse_seconds": round(parse_seconds, 4),
+            "idle_seconds": round(idle_seconds, 4),
+            "packets": packets,
+            "new_posts": new_posts,
+        })
+        metrics = get_metrics()
+        metrics.observe("crawler_scroll_seconds", scroll_seconds)
+        metrics.observe("crawler_response_wait_seconds", wait_seconds)
+        metrics.observe("crawler_packet_parse_seconds", parse_seconds)
+        if idle_seconds:
+            metrics.observe("crawler_backoff_seconds", idle_seconds)
+        metrics.inc("crawler_packets", packets)
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总各阶段耗时"""
+        if not self.timings:
+            return {"iterations": 0}
+        totals = {
+            key: round(sum(t[key] for t in self.timings), 4)
+            for key in ("scroll_seconds", "wait_seconds", "parse_seconds", "idle_seconds")
+        }
+        return {
+            "iterations": len(self.timings),
+            "packets": sum(t["packets"] for t in self.timings),
+            "new_posts": sum(t["new_posts"] for t in self.timings),
+            "stalls": self.stalls,
+            **totals,
+        }
+
+
+def drain_packets(listener, first_timeout: float, drain_timeout: float) -> List[Any]:
+    """
+    等待第一个数据包 (最多 first_timeout 秒)，随后取走已到达的全部数据包
+
+    DrissionPage 的 wait(timeout=0) 会无限阻塞，因此用很短的超时逐个取出。
+    """
+    packets = []
+    try:
+        packet = listener.wait(timeout=first_timeout)
+        while packet:
+            packets.append(packet)
+            packet = listener.wait(timeout=drain_timeout)
+    except Exception as e:
+        logger.debug(f"等待API响应: {e}")
+    return packets
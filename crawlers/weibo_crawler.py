@@ -3,15 +3,21 @@
 """
 import os
 import time
-import json
+from collections import deque
 import pickle
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
-import random
 from DrissionPage import ChromiumOptions, Chromium
 
+from analyzer.keyword_matcher import get_keyword_matcher
 from crawlers.base_crawler import BaseCrawler
+from crawlers.scroll_scheduler import ScrollScheduler, drain_packets
+from crawlers.weibo_parser import PacketParsePool, decode_body, parse_api_response
+from data_manager.seen_index import SeenIdIndex
+from crawlers.weibo_timeline_client import WeiboTimelineClient, WeiboAuthError, WeiboGroupNotFoundError
 from utils.action_click import HumanAction
+from utils.metrics import get_metrics, timed
+from utils.time_parser import parse_time, to_epoch
 from utils.logger_config import setup_logging
 from config.settings import WEIBO_API_ENDPOINTS, COLLECTOR_CONFIG
 import logging
@@ -21,12 +27,50 @@ logger = logging.getLogger(__name__)
 
 
 class WeiboCrawler(BaseCrawler):
-    def __init__(self, headless: bool = False, user_data_path: str = None):
+    def __init__(
+        self,
+        headless: bool = False,
+        user_data_path: str = None,
+        account: str = "default",
+        group_name: str = None,
+        browser: Chromium = None,
+        local_port: int = None,
+        rate_limiter=None
+    ):
+        """
+        Args:
+            headless: 无头模式
+            user_data_path: 浏览器用户数据目录 (不同账号使用不同目录)
+            account: 账号名，用于区分 Cookie 文件和日志
+            group_name: 要采集的关注分组，默认读取 COLLECTOR_CONFIG['group_name']
+            browser: 已打开的浏览器，传入时在其中新开标签页 (同账号多分组共用一个浏览器)
+            local_port: 浏览器调试端口，同时运行多个浏览器时需各不相同
+            rate_limiter: 限速器 (TokenBucket)，每次滚动/翻页前取令牌
+        """
         super().__init__()
+        self.account = account
+        self.group_name = group_name or COLLECTOR_CONFIG.get("group_name", "特别关注")
+        self.rate_limiter = rate_limiter
+        
+        if browser is not None:
+            # 复用已登录的浏览器，为本分组单独开一个标签页
+            self.co = None
+            self.browser = browser
+            self.owns_browser = False
+            self.tab = self.browser.new_tab(url="https://weibo.com")
+            time.sleep(2)
+            self.bot = HumanAction(self.tab)
+            self._init_cookie_file()
+            self.last_crawl_timings = []
+            self.last_run_stats = {"new_posts": 0, "skipped_known": 0}
+            return
+        
         self.co = ChromiumOptions()
         
         if user_data_path:
             self.co.set_user_data_path(user_data_path)
+        if local_port:
+            self.co.set_local_port(local_port)
         
         self.co.set_argument("--mute-audio")
         # 禁用图片加载以提升速度
@@ -36,15 +80,25 @@ class WeiboCrawler(BaseCrawler):
             self.co.headless(True)
             
         self.browser = Chromium(self.co)
+        self.owns_browser = True
         
         # 尝试复用已有的微博标签页或创建新标签页
         self.tab = self._get_tab("https://weibo.com")
             
         self.bot = HumanAction(self.tab)
         
-        # cookies 文件路径改为 data/cookies/weibo.pkl
+        self._init_cookie_file()
+        
+        # 最近一次滚动采集的每轮耗时记录
+        self.last_crawl_timings = []
+        # 最近一次采集的新增/跳过(已入库)帖子数
+        self.last_run_stats = {"new_posts": 0, "skipped_known": 0}
+
+    def _init_cookie_file(self):
+        """cookies 文件路径: data/cookies/weibo.pkl，非默认账号为 weibo_<账号>.pkl"""
         from config.settings import COOKIES_DIR
-        self.cookie_file = str(COOKIES_DIR / "weibo.pkl")
+        name = "weibo.pkl" if self.account == "default" else f"weibo_{self.account}.pkl"
+        self.cookie_file = str(COOKIES_DIR / name)
 
     def _get_tab(self, url: str):
         """智能获取 or 创建 Tab，并确保加载"""
@@ -82,6 +136,7 @@ class WeiboCrawler(BaseCrawler):
         """数据源名称"""
         return 'weibo'
 
+    @timed("crawler_login_seconds")
     def login(self, force_relogin: bool = False) -> None:
         """
         处理登录逻辑
@@ -151,6 +206,7 @@ class WeiboCrawler(BaseCrawler):
             pickle.dump(full_cookies, f)
         logger.info("Cookie 已保存。")
 
+    @timed("crawler_fetch_seconds")
     def fetch_latest_posts(
         self,
         lookback_hours: int = 8,
@@ -158,10 +214,15 @@ class WeiboCrawler(BaseCrawler):
         resume_from_id: str = None,
         scroll_interval: tuple = None,
         no_new_data_timeout: int = 300,
-        strict_time_mode: bool = False
+        strict_time_mode: bool = False,
+        fetch_mode: str = None,
+        seen_ids=None,
+        writer=None,
+        full_refetch: bool = False,
+        storage=None
     ) -> List[Dict[str, Any]]:
         """
-        抓取"特别关注"的帖子(滚动加载版)
+        抓取关注分组 (默认"特别关注") 的帖子
         
         Args:
             lookback_hours: 回溯时间(小时)，默认8小时
@@ -170,6 +231,13 @@ class WeiboCrawler(BaseCrawler):
             scroll_interval: 滚动间隔(秒)，默认从配置读取
             no_new_data_timeout: 无新数据超时时间(秒)
             strict_time_mode: 严格时间模式，True时仅根据时间判断停止，忽略checkpoint ID
+            fetch_mode: 采集方式，browser 滚动页面 / http 复用 Cookie 直接分页请求接口，
+                默认读取 COLLECTOR_CONFIG['fetch_mode']
+            seen_ids: 共享的已采集ID索引 (SeenIdIndex)，多任务并行时跨任务去重；
+                默认新建一个用已入库帖子预热的 SeenIdIndex
+            writer: 共享的 AsyncStorageWriter，传入时由调用方负责关闭
+            full_refetch: 忽略上次采集的高水位，重新采集整个回溯窗口
+            storage: 调用方的 StorageManager，默认使用 writer 的存储实例，都未传入时新建并在结束后关闭
             
         Returns:
             帖子列表
@@ -181,31 +249,134 @@ class WeiboCrawler(BaseCrawler):
             self.login(force_relogin=True)
         
         from data_manager.storage import create_storage_manager
-        storage = create_storage_manager()
+        from data_manager.write_behind import AsyncStorageWriter, WriteBehindError
+        # 复用调用方的存储实例 (连接池)，只有自行创建时才在结束后关闭
+        owns_storage = storage is None and writer is None
+        if storage is None:
+            storage = writer.storage if writer is not None else create_storage_manager(
+                keyword_matcher=get_keyword_matcher()
+            )
+        try:
+            # 原始响应与帖子由后台线程写入，采集循环只入队
+            owns_writer = writer is None
+            if owns_writer:
+                writer = AsyncStorageWriter(storage).start()
         
-        date_key = datetime.now().strftime("%Y-%m-%d")
-        api_target = WEIBO_API_ENDPOINTS['friends_timeline']
+            date_key = datetime.now().strftime("%Y-%m-%d")
+            fetch_mode = fetch_mode or COLLECTOR_CONFIG.get("fetch_mode", "browser")
+        
+            if scroll_interval is None:
+                scroll_interval = COLLECTOR_CONFIG.get("scroll_interval", (2, 4))
+        
+            logger.info(
+                f"[{self.account}] 开始采集分组 '{self.group_name}' ({fetch_mode} 模式)，回溯{lookback_hours}小时..."
+            )
         
-        if scroll_interval is None:
-            scroll_interval = COLLECTOR_CONFIG.get("scroll_interval", (2, 4))
+            cutoff_time = datetime.now() - timedelta(hours=lookback_hours)
         
-        logger.info(f"开始采集特别关注，回溯{lookback_hours}小时...")
+            # 增量采集: 到达上次已入库的最新帖子即停止
+            if not full_refetch:
+                state = storage.get_crawl_state(self.source_name, self.group_name)
+                hwm_time = self._parse_time(state.get("newest_publish_time")) if state else None
+                if hwm_time and hwm_time > cutoff_time:
+                    cutoff_time = hwm_time
+                    resume_from_id = resume_from_id or state.get("newest_mblog_id")
+                    logger.info(f"[{self.account}] 增量采集，高水位 {state['newest_mblog_id']} @ {hwm_time}")
         
-        cutoff_time = datetime.now() - timedelta(hours=lookback_hours)
-        seen_ids = set()
-        collected_posts = []
-        api_sequence = 0
+            if seen_ids is None:
+                seen_ids = SeenIdIndex(storage).warm()
+            self.last_run_stats = {"new_posts": 0, "skipped_known": 0}
+            collected_posts = []
+            crawl_args = (
+                writer, seen_ids, collected_posts, cutoff_time,
+                resume_from_id, date_key, strict_time_mode
+            )
+        
+            completed = False
+            try:
+                if fetch_mode == "http":
+                    try:
+                        completed = self._fetch_via_http(*crawl_args, max_duration_seconds=max_duration_seconds)
+                    except (WeiboAuthError, WeiboGroupNotFoundError) as e:
+                        logger.warning(f"直连接口不可用: {e}，改用浏览器滚动采集")
+                        fetch_mode = "browser"
+            
+                if fetch_mode != "http":
+                    completed = self._fetch_by_scrolling(
+                        *crawl_args,
+                        max_duration_seconds=max_duration_seconds,
+                        no_new_data_timeout=no_new_data_timeout
+                    )
+            finally:
+                if owns_writer:
+                    writer.close(raise_on_error=False)
+                else:
+                    writer.flush()
+        
+            logger.info(
+                f"[{self.account}] 分组 '{self.group_name}' 共采集 {len(collected_posts)} 篇帖子，"
+                f"跳过已入库 {self.last_run_stats['skipped_known']} 条"
+            )
+        
+            # 有帖子未能入库时不能推进高水位，否则下次增量采集会越过这些帖子
+            # (共享写入器无法区分失败属于哪个任务，保守地都不推进)
+            write_failures = writer.failures()
+            if write_failures:
+                completed = False
+                logger.error(f"[{self.account}] {len(write_failures)} 个写入任务失败，高水位保持不变")
+            storage.update_crawl_state(
+                self.source_name, self.group_name, collected_posts, advance=completed
+            )
+            if not completed and not write_failures:
+                logger.warning(f"[{self.account}] 本次未采集到时间边界，高水位保持不变")
+            if owns_writer and write_failures:
+                raise WriteBehindError(write_failures)
+        
+            return collected_posts
+        finally:
+            if owns_storage:
+                storage.close()
+
+    def _fetch_by_scrolling(
+        self,
+        writer,
+        seen_ids,
+        collected_posts,
+        cutoff_time,
+        resume_from_id,
+        date_key,
+        strict_time_mode: bool = False,
+        max_duration_seconds: int = None,
+        no_new_data_timeout: int = 300
+    ) -> bool:
+        """
+        滚动页面并拦截 groupstimeline 接口数据
+
+        Returns:
+            是否完整采集 (到达时间边界/断点)；达到最大时长或长时间无新数据时不算完整
+        """
+        completed = False
+        parse_pool = None
+        api_target = WEIBO_API_ENDPOINTS['friends_timeline']
         last_new_post_time = time.time()
         start_time = time.time()
         
         try:
             self.tab.listen.start(api_target)
             
-            if not self._click_special_follow():
-                logger.error("无法点击特别关注按钮")
-                return collected_posts
+            if not self._click_group(self.group_name):
+                logger.error(f"无法点击分组 '{self.group_name}'")
+                return False
             
             # 主采集循环
+            parse_pool = PacketParsePool()
+            pending = deque()
+            process_args = (
+                writer, seen_ids, collected_posts, cutoff_time,
+                resume_from_id, date_key, strict_time_mode
+            )
+            scheduler = ScrollScheduler()
+            self.last_crawl_timings = scheduler.timings
             reached_time_boundary = False
             time_boundary_reached_at = None
             grace_period_seconds = 10  # 到达时间边界后继续滚动的时间
@@ -221,49 +392,65 @@ class WeiboCrawler(BaseCrawler):
                 if reached_time_boundary:
                     if time.time() - time_boundary_reached_at > grace_period_seconds:
                         logger.info(f"已到达时间边界，宽限期{grace_period_seconds}秒已过，停止采集")
+                        completed = True
                         break
                 
                 # 检查无新数据超时
                 if time.time() - last_new_post_time > no_new_data_timeout:
+                    # 可能只是加载卡住，未确认到达时间边界
                     logger.info(f"{no_new_data_timeout}秒无新数据，停止采集")
                     break
                 
                 # 先滚动页面（触发新数据加载）
                 scroll_count += 1
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                started = time.perf_counter()
                 self.tab.scroll.down()
+                scroll_seconds = time.perf_counter() - started
+                
+                # 等待响应到达后取走全部已到达的数据包，不做固定等待
+                started = time.perf_counter()
+                packets = drain_packets(
+                    self.tab.listen, scheduler.response_timeout, scheduler.drain_timeout
+                )
+                wait_seconds = time.perf_counter() - started
                 
-                # 短暂等待让页面加载（减少等待时间）
-                time.sleep(0.5)
+                # 响应体交给解析池，已完成的结果按提交顺序处理 (未完成的留到下一轮，与滚动并行)
+                started = time.perf_counter()
+                for packet in packets:
+                    pending.append((packet.url, parse_pool.submit(packet.response.body)))
+                new_count, hit_time_boundary = self._consume_parsed(pending, False, *process_args)
+                parse_seconds = time.perf_counter() - started
                 
-                # 尝试获取API响应（非阻塞，快速检查）
-                try:
-                    packet = self.tab.listen.wait(timeout=1)  # 减少超时时间
-                    if packet:
-                        new_count, hit_time_boundary = self._process_packet(
-                            packet, storage, seen_ids, collected_posts,
-                            cutoff_time, resume_from_id, api_sequence, date_key,
-                            strict_time_mode
-                        )
-                        
-                        # 首次到达时间边界
-                        if hit_time_boundary and not reached_time_boundary:
-                            reached_time_boundary = True
-                            time_boundary_reached_at = time.time()
-                            logger.info(f"到达时间边界，继续滚动{grace_period_seconds}秒以确保完整性")
-                            
-                        if new_count > 0:
-                            last_new_post_time = time.time()
-                            api_sequence += 1
-                except Exception as e:
-                    logger.debug(f"等待API响应: {e}")
+                # 首次到达时间边界
+                if hit_time_boundary and not reached_time_boundary:
+                    reached_time_boundary = True
+                    time_boundary_reached_at = time.time()
+                    logger.info(f"到达时间边界，继续滚动{grace_period_seconds}秒以确保完整性")
                 
-                # 随机等待（减少等待时间）
-                time.sleep(random.uniform(0.5, 1.5))
+                if new_count > 0:
+                    last_new_post_time = time.time()
+                
+                # 只有信息流停滞时才退避 (解析中的数据包也算有进展)
+                delay = scheduler.next_delay(new_count + len(pending))
+                if delay:
+                    time.sleep(delay)
+                scheduler.record(scroll_seconds, wait_seconds, parse_seconds, delay, len(packets), new_count)
                 
                 if scroll_count % 10 == 0:
                     logger.info(f"已滚动 {scroll_count} 次，采集 {len(collected_posts)} 条帖子")
             
+            # 处理解析池中剩余的数据包
+            self._consume_parsed(pending, True, *process_args)
             
+            summary = scheduler.summary()
+            if summary["iterations"]:
+                logger.info(
+                    f"滚动 {summary['iterations']} 轮，数据包 {summary['packets']} 个，停滞 {summary['stalls']} 次；"
+                    f"耗时 滚动 {summary['scroll_seconds']:.1f}s / 等待响应 {summary['wait_seconds']:.1f}s / "
+                    f"解析 {summary['parse_seconds']:.1f}s / 退避 {summary['idle_seconds']:.1f}s"
+                )
             
         except Exception as e:
             logger.error(f"采集过程出错: {e}")
@@ -271,99 +458,249 @@ class WeiboCrawler(BaseCrawler):
             traceback.print_exc()
         finally:
             self.tab.listen.stop()
+            if parse_pool is not None:
+                parse_pool.close()
+        return completed
+
+    def _fetch_via_http(
+        self,
+        writer,
+        seen_ids,
+        collected_posts,
+        cutoff_time,
+        resume_from_id,
+        date_key,
+        strict_time_mode: bool = False,
+        max_duration_seconds: int = None
+    ) -> bool:
+        """
+        复用浏览器登录态，按 max_id 游标直接分页请求 groupstimeline
+
+        Cookie 失效时用浏览器重新登录刷新一次；仍失败则抛出 WeiboAuthError。
+        分组列表中找不到分组时抛出 WeiboGroupNotFoundError，由调用方改用浏览器采集。
+
+        Returns:
+            是否完整采集 (到达时间边界/断点，或时间线已无更多数据)；达到最大页数或最大时长时不算完整
+        """
+        start_time = time.time()
+        client = self._create_timeline_client()
         
-        logger.info(f"共采集 {len(collected_posts)} 篇帖子")
-        
-        if collected_posts:
-            last_post = collected_posts[-1]
-            storage.save_checkpoint(last_post.get('mblog_id', ''), date_key)
-        
-        return collected_posts
+        for attempt in range(2):
+            try:
+                page_count = 0
+                for url, raw_data in client.iter_pages():
+                    page_count += 1
+                    new_count, hit_time_boundary = self._process_response(
+                        raw_data, url, writer, seen_ids, collected_posts,
+                        cutoff_time, resume_from_id, date_key, strict_time_mode
+                    )
+                    
+                    # 时间线按时间倒序，越过边界的这一页已包含边界附近的乱序帖子
+                    if hit_time_boundary:
+                        logger.info(f"到达时间边界，共请求 {page_count} 页")
+                        return True
+                    if max_duration_seconds and (time.time() - start_time) > max_duration_seconds:
+                        logger.info("达到最大采集时长，停止")
+                        return False
+                if client.reached_end:
+                    logger.info(f"时间线已无更多数据，共请求 {page_count} 页")
+                    return True
+                logger.warning(f"达到最大页数 {page_count}，未到达时间边界，停止")
+                return False
+            except WeiboAuthError:
+                if attempt > 0:
+                    raise
+                logger.warning("直连接口登录态失效，使用浏览器刷新 Cookie...")
+                self.login()
+                self._save_cookies()
+                client = self._create_timeline_client(list_id=client.list_id)
+
+    def _create_timeline_client(self, list_id: str = None) -> WeiboTimelineClient:
+        """使用浏览器当前的 Cookie 和 UA 创建直连客户端 (浏览器不可用时读取 Cookie 文件)"""
+        options = {
+            "list_id": list_id,
+            "group_name": self.group_name,
+            "rate_limiter": self.rate_limiter,
+        }
+        try:
+            cookies = self.tab.cookies(all_info=True)
+            user_agent = self.tab.user_agent
+        except Exception as e:
+            logger.debug(f"读取浏览器 Cookie 失败: {e}，改用 Cookie 文件")
+            return WeiboTimelineClient.from_cookie_file(self.cookie_file, **options)
+        return WeiboTimelineClient(cookies, user_agent=user_agent, **options)
+
+    def _consume_parsed(self, pending: deque, wait: bool, *process_args) -> tuple[int, bool]:
+        """
+        按提交顺序处理解析池的结果
+
+        Args:
+            pending: [(url, Future)] 队列
+            wait: True 时等待全部完成；False 时只处理队首已完成的部分
+        """
+        new_count = 0
+        hit_time_boundary = False
+        while pending and (wait or pending[0][1].done()):
+            url, future = pending.popleft()
+            try:
+                raw_data, posts = future.result()
+                if raw_data is None:
+                    continue
+                packet_new, packet_boundary = self._process_response(
+                    raw_data, url, *process_args, parsed_posts=posts
+                )
+            except Exception as e:
+                logger.warning(f"处理数据包失败: {e}")
+                continue
+            new_count += packet_new
+            hit_time_boundary = hit_time_boundary or packet_boundary
+        return new_count, hit_time_boundary
 
     def _process_packet(
         self,
         packet,
-        storage,
+        writer,
         seen_ids,
         collected_posts,
         cutoff_time,
         resume_from_id,
-        api_sequence,
         date_key,
         strict_time_mode: bool = False
     ) -> tuple[int, bool]:
         """处理单个数据包，返回 (新增帖子数, 是否到达时间边界)"""
         try:
-            raw_data = packet.response.body
-            
-            if isinstance(raw_data, str):
-                try:
-                    raw_data = json.loads(raw_data)
-                except:
-                    return 0, False
-            
-            if not isinstance(raw_data, dict):
+            raw_data = decode_body(packet.response.body)
+            if raw_data is None:
                 return 0, False
             
-            # 保存原始API响应
-            storage.save_api_response_batch(
-                url=packet.url,
-                response_data=raw_data,
-                sequence=api_sequence,
-                date_key=date_key
+            return self._process_response(
+                raw_data, packet.url, writer, seen_ids, collected_posts,
+                cutoff_time, resume_from_id, date_key, strict_time_mode
             )
             
-            # 解析帖子
-            posts = self._parse_api_response(raw_data)
-            new_count = 0
-            hit_time_boundary = False
+        except Exception as e:
+            logger.warning(f"处理数据包失败: {e}")
+            return 0, False
+
+    def _process_response(
+        self,
+        raw_data: Dict,
+        url: str,
+        writer,
+        seen_ids,
+        collected_posts,
+        cutoff_time,
+        resume_from_id,
+        date_key,
+        strict_time_mode: bool = False,
+        parsed_posts: List[Dict] = None
+    ) -> tuple[int, bool]:
+        """
+        处理一页 groupstimeline 响应，返回 (新增帖子数, 是否到达时间边界)
+
+        parsed_posts 为解析池已解析好的帖子；为 None 时在此处解析。
+        """
+        # 原始API响应入队，由后台线程保存
+        writer.submit_raw_response(url, raw_data, date_key)
+        cutoff_ts = to_epoch(cutoff_time)
+        skipped = 0
+        hit_time_boundary = False
+        
+        if parsed_posts is None:
+            # 已入库/已采集的帖子在解析前跳过，只检查是否已到达边界
+            statuses = [s for s in raw_data.get('statuses', []) if isinstance(s, dict)]
+            new_ids = set(seen_ids.filter_new(s.get('mblogid', '') for s in statuses))
+            fresh_statuses = []
+            for status in statuses:
+                mblog_id = status.get('mblogid', '')
+                if mblog_id in new_ids:
+                    fresh_statuses.append(status)
+                    continue
+                skipped += 1
+                if self._is_boundary(mblog_id, to_epoch(status.get('created_at')),
+                                     cutoff_ts, resume_from_id, strict_time_mode):
+                    hit_time_boundary = True
             
-            for post in posts:
+            # 解析帖子
+            posts = self._parse_api_response({'statuses': fresh_statuses}) if fresh_statuses else []
+        else:
+            new_ids = set(seen_ids.filter_new(p.get('mblog_id', '') for p in parsed_posts))
+            posts = []
+            for post in parsed_posts:
                 mblog_id = post.get('mblog_id', '')
-                
-                if mblog_id in seen_ids:
+                if mblog_id in new_ids:
+                    posts.append(post)
                     continue
-                
-                # 检查时间回溯
-                post_time = self._parse_time(post.get('publish_time', ''))
-                if post_time and post_time < cutoff_time:
-                    logger.debug(f"帖子 {mblog_id} 时间 {post_time} 早于截止时间 {cutoff_time}")
-                    hit_time_boundary = True
-                    # 不再continue，仍然保存这条帖子，因为可能是乱序
-                
-                # 检查断点（严格时间模式下跳过）
-                if not strict_time_mode and resume_from_id and mblog_id == resume_from_id:
-                    logger.info(f"遇到断点ID {resume_from_id}")
+                skipped += 1
+                if self._is_boundary(mblog_id, post.get('publish_ts'),
+                                     cutoff_ts, resume_from_id, strict_time_mode):
                     hit_time_boundary = True
-                    continue
-                
-                seen_ids.add(mblog_id)
-                post['collected_at'] = datetime.now().isoformat()
-                post['date_key'] = date_key
-                collected_posts.append(post)
-                new_count += 1
+        
+        new_count = 0
+        
+        new_posts = []
+        for post in posts:
+            mblog_id = post.get('mblog_id', '')
             
-            if new_count > 0:
-                logger.info(f"新增 {new_count} 条帖子，累计 {len(collected_posts)} 条")
+            # 检查时间回溯 (解析时已得到时间戳，直接做整数比较)
+            publish_ts = post.get('publish_ts')
+            if publish_ts is not None and publish_ts < cutoff_ts:
+                logger.debug(f"帖子 {mblog_id} 时间 {post.get('publish_time')} 早于截止时间 {cutoff_time}")
+                hit_time_boundary = True
+                # 不再continue，仍然保存这条帖子，因为可能是乱序
             
-            return new_count, hit_time_boundary
+            # 检查断点（严格时间模式下跳过）
+            if not strict_time_mode and resume_from_id and mblog_id == resume_from_id:
+                logger.info(f"遇到断点ID {resume_from_id}")
+                hit_time_boundary = True
+                continue
             
-        except Exception as e:
-            logger.warning(f"处理数据包失败: {e}")
-            return 0, False
+            # 原子地登记ID，并行任务之间不会重复采集同一条
+            if not seen_ids.add_if_new(mblog_id):
+                continue
+            post['collected_at'] = datetime.now().isoformat()
+            post['date_key'] = date_key
+            collected_posts.append(post)
+            new_posts.append(post)
+            new_count += 1
+        
+        writer.submit_posts(new_posts, date_key)
+        self.last_run_stats["new_posts"] += new_count
+        self.last_run_stats["skipped_known"] += skipped
+        get_metrics().inc("crawler_new_posts", new_count, group=self.group_name)
+        get_metrics().inc("crawler_skipped_known", skipped, group=self.group_name)
+        
+        if new_count > 0:
+            logger.info(f"新增 {new_count} 条帖子，累计 {len(collected_posts)} 条")
+        
+        return new_count, hit_time_boundary
+
+    @staticmethod
+    def _is_boundary(mblog_id: str, publish_ts, cutoff_ts: int, resume_from_id, strict_time_mode: bool) -> bool:
+        """被跳过的已知帖子是否已到达时间边界或断点"""
+        if not strict_time_mode and resume_from_id and mblog_id == resume_from_id:
+            logger.info(f"遇到断点ID {resume_from_id}")
+            return True
+        return publish_ts is not None and publish_ts < cutoff_ts
 
     def _click_special_follow(self) -> bool:
         """点击特别关注按钮"""
+        return self._click_group("特别关注")
+
+    @timed("crawler_click_group_seconds")
+    def _click_group(self, group_name: str) -> bool:
+        """点击左侧导航中的关注分组"""
+        locator = f'text:{group_name}'
         try:
-            # 显式等待页面加载关键元素 (左侧导航栏或特别关注按钮)
+            # 显式等待页面加载关键元素 (左侧导航栏中的分组按钮)
             # 尝试等待最多 5 秒
-            logger.info("等待'特别关注'按钮出现...")
-            if self.tab.ele('text:特别关注', timeout=5):
-                if self.bot.human_click(loc='text:特别关注', desc="特别关注分组"):
-                    logger.info("成功点击'特别关注'")
+            logger.info(f"等待'{group_name}'按钮出现...")
+            if self.tab.ele(locator, timeout=5):
+                if self.bot.human_click(loc=locator, desc=f"{group_name}分组"):
+                    logger.info(f"成功点击'{group_name}'")
                     return True
             else:
-                logger.warning("未找到'特别关注'按钮 (超时)")
+                logger.warning(f"未找到'{group_name}'按钮 (超时)")
         except Exception as e:
             logger.debug(f"首次查找/点击失败: {e}")
             pass
@@ -377,94 +714,30 @@ class WeiboCrawler(BaseCrawler):
         
         try:
             # 刷新后等待时间稍长一点
-            if self.tab.ele('text:特别关注', timeout=8):
-                if self.bot.human_click(loc='text:特别关注', desc="特别关注分组"):
+            if self.tab.ele(locator, timeout=8):
+                if self.bot.human_click(loc=locator, desc=f"{group_name}分组"):
                     logger.info("重试点击成功")
                     return True
         except Exception:
             pass
         
-        logger.error("无法找到并点击'特别关注'按钮")
+        logger.error(f"无法找到并点击'{group_name}'按钮")
         return False
 
     def _parse_api_response(self, data: Dict) -> List[Dict]:
         """解析API响应数据"""
-        posts = []
-        statuses = data.get('statuses', [])
-        
-        for status in statuses:
-            if not isinstance(status, dict):
-                continue
-            try:
-                user = status.get('user', {})
-                author = user.get('screen_name', 'Unknown')
-                user_id = user.get('id', '')
-                mblog_id = status.get('mblogid', '')
-                
-                content = status.get('text_raw', '') or status.get('text', '')
-                
-                post_url = f"https://weibo.com/{user_id}/{mblog_id}"
-                
-                created_at = status.get('created_at', '')
-                try:
-                    dt = self._parse_time(created_at)
-                    if dt:
-                        created_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    pass
-                
-                # 安全解析图片列表
-                pic_ids = status.get('pic_ids', [])
-                images = []
-                if isinstance(pic_ids, list):
-                    images = [img.get('url', '') for img in pic_ids if isinstance(img, dict)]
-                
-                posts.append({
-                    "mblog_id": mblog_id,
-                    "author": author,
-                    "author_id": user_id,
-                    "content": content,
-                    "publish_time": created_at,
-                    "url": post_url,
-                    "images": images,
-                    "video": status.get('page_info', {}).get('media_info', {}).get('play_url', ''),
-                    "reposts_count": status.get('attitudes_count', 0),
-                    "comments_count": status.get('comments_count', 0),
-                    "attitudes_count": status.get('attitudes_count', 0),
-                })
-            except Exception as e:
-                logger.warning(f"解析单条微博失败: {e}, status类型: {type(status)}, 前100字符: {str(status)[:100]}")
-        
-        return posts
+        return parse_api_response(data)
 
     def _parse_time(self, time_str: str) -> Optional[datetime]:
-        """解析微博时间字符串"""
-        if not time_str:
-            return None
-        
-        try:
-            formats = [
-                "%a %b %d %H:%M:%S %z %Y",
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%d",
-            ]
-            for fmt in formats:
-                try:
-                    dt = datetime.strptime(time_str, fmt)
-                    # 统一转换为 naive datetime (忽略时区差异，简化比较)
-                    if dt.tzinfo:
-                        dt = dt.replace(tzinfo=None)
-                    return dt
-                except:
-                    continue
-        except:
-            pass
-        
-        return None
+        """解析微博时间字符串 (本地时间)"""
+        return parse_time(time_str)
 
     def close(self) -> None:
-        """关闭浏览器"""
+        """关闭浏览器 (共用浏览器时只关闭本标签页)"""
         try:
-            self.browser.quit()
+            if self.owns_browser:
+                self.browser.quit()
+            else:
+                self.tab.close()
         except:
             pass
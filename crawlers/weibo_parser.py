@@ -0,0 +1,149 @@
+"""
+微博接口响应解析 - 纯函数实现，不依赖浏览器，可在线程池/进程池中运行
+"""
+import json
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import COLLECTOR_CONFIG
+from utils.metrics import timed
+from utils.time_parser import format_time, parse_time_with_epoch
+
+logger = logging.getLogger(__name__)
+
+
+def parse_status(status: Dict) -> Dict:
+    """将一条原始微博转换为统一的帖子格式"""
+    user = status.get('user', {})
+    author = user.get('screen_name', 'Unknown')
+    user_id = user.get('id', '')
+    mblog_id = status.get('mblogid', '')
+
+    content = status.get('text_raw', '') or status.get('text', '')
+
+    post_url = f"https://weibo.com/{user_id}/{mblog_id}"
+
+    created_at = status.get('created_at', '')
+    publish_ts = None
+    parsed = parse_time_with_epoch(created_at)
+    if parsed:
+        created_at = format_time(parsed[0])
+        publish_ts = parsed[1]
+
+    # 安全解析图片列表
+    pic_ids = status.get('pic_ids', [])
+    images = []
+    if isinstance(pic_ids, list):
+        images = [img.get('url', '') for img in pic_ids if isinstance(img, dict)]
+
+    return {
+        "mblog_id": mblog_id,
+        "author": author,
+        "author_id": user_id,
+        "content": content,
+        "publish_time": created_at,
+        "publish_ts": publish_ts,
+        "url": post_url,
+        "images": images,
+        "video": status.get('page_info', {}).get('media_info', {}).get('play_url', ''),
+        "reposts_count": status.get('attitudes_count', 0),
+        "comments_count": status.get('comments_count', 0),
+        "attitudes_count": status.get('attitudes_count', 0),
+    }
+
+
+@timed("parse_response_seconds")
+def parse_api_response(data: Dict) -> List[Dict]:
+    """解析 groupstimeline 响应中的全部微博"""
+    posts = []
+    statuses = data.get('statuses', [])
+
+    for status in statuses:
+        if not isinstance(status, dict):
+            continue
+        try:
+            posts.append(parse_status(status))
+        except Exception as e:
+            logger.warning(f"解析单条微博失败: {e}, status类型: {type(status)}, 前100字符: {str(status)[:100]}")
+
+    return posts
+
+
+def decode_body(body: Any) -> Optional[Dict]:
+    """数据包响应体转换为字典 (DrissionPage 可能已自动解析 JSON)"""
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8', errors='replace')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return None
+    return body if isinstance(body, dict) else None
+
+
+def parse_body(body: Any, parse_posts: bool = True) -> Tuple[Optional[Dict], Optional[List[Dict]]]:
+    """
+    解码并解析一个数据包的响应体
+
+    Returns:
+        (原始响应, 帖子列表)；无法解码时原始响应为 None，parse_posts=False 时帖子列表为 None
+    """
+    raw_data = decode_body(body)
+    if raw_data is None or not parse_posts:
+        return raw_data, None
+    return raw_data, parse_api_response(raw_data)
+
+
+class PacketParsePool:
+    """
+    数据包解析阶段
+
+    - inline: 在采集线程中只做 JSON 解码，帖子解析留给 _process_response
+      (先按已采集ID过滤再解析，适合日常增量采集)
+    - thread / process: 解码和解析都交给工作池，与浏览器滚动并行，适合大批量回填；
+      process 模式可绕开 GIL，但响应体需要在进程间传递
+
+    submit 返回 Future，调用方按提交顺序取结果以保持时间边界判断的顺序。
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode: str = None, workers: int = None):
+        self.mode = mode or COLLECTOR_CONFIG.get("parse_mode", "inline")
+        if self.mode not in self.MODES:
+            logger.warning(f"未知的解析模式 {self.mode}，使用 inline")
+            self.mode = "inline"
+        self.workers = workers or COLLECTOR_CONFIG.get("parse_workers", 2)
+
+        self._executor = None
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        elif self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    @property
+    def parses_posts(self) -> bool:
+        """结果中是否已包含解析好的帖子"""
+        return self.mode != "inline"
+
+    def submit(self, body: Any) -> Future:
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(parse_body(body, parse_posts=False))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(parse_body, body)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
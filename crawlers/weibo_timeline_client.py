@@ -0,0 +1,151 @@
+"""
+微博时间线直连客户端 - 复用浏览器登录后的 Cookie，直接分页请求 groupstimeline 接口
+"""
+import logging
+import os
+import pickle
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import COLLECTOR_CONFIG, WEIBO_API_ENDPOINTS
+from utils.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class WeiboAuthError(Exception):
+    """Cookie 无效或已过期，需要浏览器重新登录"""
+
+
+class WeiboGroupNotFoundError(ValueError):
+    """分组列表中找不到指定的分组"""
+
+
+class WeiboTimelineClient:
+    """按 max_id 游标分页拉取分组时间线"""
+
+    def __init__(
+        self,
+        cookies: List[Dict[str, Any]],
+        list_id: str = None,
+        user_agent: str = None,
+        group_name: str = "特别关注",
+        rate_limiter=None
+    ):
+        """
+        Args:
+            cookies: 浏览器 Cookie 列表 (tab.cookies(all_info=True) 的格式)
+            list_id: 分组ID，留空时按分组名自动查找
+            user_agent: 与浏览器保持一致的 UA
+            group_name: 分组名
+            rate_limiter: 限速器 (TokenBucket)，每次请求前取令牌
+        """
+        # 每个客户端 (账号) 独立的 Session：响应中的 Set-Cookie 只写回本账号的 Cookie，
+        # 并行采集多个账号时登录态不会互相串用
+        self.http = HttpClient()
+        self.group_name = group_name
+        self.rate_limiter = rate_limiter
+        if not list_id and group_name == "特别关注":
+            list_id = COLLECTOR_CONFIG.get("special_follow_list_id")
+        self.list_id = list_id or None
+        # iter_pages 是否因时间线已无更多数据而结束 (而不是达到 max_pages 上限)
+        self.reached_end = False
+
+        self.cookies = self.http.session.cookies
+        xsrf_token = ""
+        for cookie in cookies or []:
+            name, value = cookie.get("name"), cookie.get("value")
+            if not name:
+                continue
+            self.cookies.set(name, value, domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+            if name == "XSRF-TOKEN":
+                xsrf_token = value
+
+        self.headers = {
+            "User-Agent": user_agent or DEFAULT_USER_AGENT,
+            "Referer": "https://weibo.com/",
+            "Accept": "application/json, text/plain, */*",
+            "X-Requested-With": "XMLHttpRequest",
+        }
+        if xsrf_token:
+            self.headers["X-XSRF-TOKEN"] = xsrf_token
+
+    @classmethod
+    def from_cookie_file(cls, cookie_file: str, **kwargs) -> "WeiboTimelineClient":
+        """从 _save_cookies 保存的 pickle 文件创建"""
+        if not os.path.exists(cookie_file):
+            raise WeiboAuthError(f"Cookie 文件不存在: {cookie_file}")
+        with open(cookie_file, "rb") as f:
+            return cls(pickle.load(f), **kwargs)
+
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Tuple[str, Dict]:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        response = self.http.get(
+            url, params=params, headers=self.headers,
+            endpoint="weibo", allow_redirects=False
+        )
+        # 未登录时会被重定向到登录页
+        if response.status_code in (301, 302, 401, 403):
+            raise WeiboAuthError(f"接口返回 {response.status_code}，Cookie 可能已过期")
+        response.raise_for_status()
+        try:
+            data = response.json()
+        except ValueError:
+            raise WeiboAuthError("接口未返回 JSON，Cookie 可能已过期")
+        if not isinstance(data, dict) or data.get("ok") not in (1, "1", True):
+            raise WeiboAuthError(f"接口返回异常: {str(data)[:200]}")
+        return response.url, data
+
+    def discover_list_id(self, group_name: str = None) -> str:
+        """从分组列表中查找分组ID"""
+        group_name = group_name or self.group_name
+        _, data = self._get_json(
+            WEIBO_API_ENDPOINTS["all_groups_url"],
+            {"is_new_segment": 1, "fetch_hot": 1}
+        )
+        for segment in data.get("groups", []):
+            for group in segment.get("group", []) if isinstance(segment, dict) else []:
+                if isinstance(group, dict) and group.get("title") == group_name:
+                    gid = str(group.get("gid") or group.get("idstr") or "")
+                    if gid:
+                        logger.info(f"找到分组 '{group_name}' ID: {gid}")
+                        return gid
+        raise WeiboGroupNotFoundError(f"未找到分组 '{group_name}'")
+
+    def fetch_page(self, max_id: Optional[str] = None, count: int = None) -> Tuple[str, Dict]:
+        """
+        拉取一页时间线
+
+        Returns:
+            (请求URL, 原始响应)，响应格式与浏览器拦截到的 groupstimeline 完全一致
+        """
+        if not self.list_id:
+            self.list_id = self.discover_list_id()
+        params = {
+            "list_id": self.list_id,
+            "refresh": 4,
+            "fast_refresh": 1,
+            "count": count or COLLECTOR_CONFIG.get("page_size", 25),
+        }
+        if max_id:
+            params["max_id"] = max_id
+        return self._get_json(WEIBO_API_ENDPOINTS["groups_timeline_url"], params)
+
+    def iter_pages(self, max_pages: int = None) -> Iterator[Tuple[str, Dict]]:
+        """按 max_id 游标依次拉取各页，直到没有更多数据 (reached_end 置为 True) 或达到 max_pages"""
+        max_pages = max_pages or COLLECTOR_CONFIG.get("max_pages", 200)
+        max_id = None
+        self.reached_end = False
+        for _ in range(max_pages):
+            url, data = self.fetch_page(max_id)
+            yield url, data
+            next_max_id = data.get("max_id_str") or data.get("max_id")
+            if not data.get("statuses") or not next_max_id or str(next_max_id) in ("0", str(max_id)):
+                self.reached_end = True
+                return
+            max_id = str(next_max_id)
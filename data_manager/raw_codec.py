@@ -0,0 +1,104 @@
+"""
+原始API响应编解码 - 按条去重的压缩存储格式
+
+一条 groupstimeline 响应被拆成两部分：
+- envelope: 去掉 statuses 后的响应外壳 (压缩)
+- statuses: 每条微博单独序列化、按内容哈希去重后压缩存储，
+  响应中只保留按顺序排列的哈希引用列表 (每个引用 16 字节)
+"""
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, List, Tuple
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 zlib
+    zstandard = None
+
+DIGEST_SIZE = 16
+DEFAULT_CODEC = "zstd" if zstandard else "zlib"
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def compress(data: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    """压缩字节串"""
+    if codec == "zstd":
+        if not _zstd_compressor:
+            raise RuntimeError("未安装 zstandard，无法使用 zstd 压缩")
+        return _zstd_compressor.compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    raise ValueError(f"未知的压缩格式: {codec}")
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    """解压字节串"""
+    if codec == "zstd":
+        if not _zstd_decompressor:
+            raise RuntimeError("未安装 zstandard，无法解压 zstd 数据")
+        return _zstd_decompressor.decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    raise ValueError(f"未知的压缩格式: {codec}")
+
+
+def dumps(obj: Any) -> bytes:
+    """紧凑序列化 (保持原有键顺序，保证重建后与原响应一致)"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def content_hash(data: bytes) -> bytes:
+    """内容哈希 (blake2b-128)"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def split_response(response_data: Any) -> Tuple[Any, List[Tuple[bytes, bytes]]]:
+    """
+    拆分响应
+
+    Returns:
+        (envelope, statuses): envelope 中 statuses 的位置以 None 占位；
+        statuses 为 [(hash, 序列化字节), ...]，保持原顺序
+    """
+    if not isinstance(response_data, dict) or not isinstance(response_data.get("statuses"), list):
+        return response_data, []
+
+    envelope = dict(response_data)
+    envelope["statuses"] = None
+    statuses = []
+    for status in response_data["statuses"]:
+        data = dumps(status)
+        statuses.append((content_hash(data), data))
+    return envelope, statuses
+
+
+def pack_refs(hashes: List[bytes]) -> bytes:
+    """将哈希列表打包为定长字节串"""
+    return b"".join(hashes)
+
+
+def unpack_refs(refs: bytes) -> List[bytes]:
+    """解包哈希引用列表"""
+    if not refs:
+        return []
+    return [refs[i:i + DIGEST_SIZE] for i in range(0, len(refs), DIGEST_SIZE)]
+
+
+def rebuild_response(envelope: Any, statuses: List[Any]) -> Any:
+    """用外壳和按顺序解码的 statuses 重建原始响应"""
+    if isinstance(envelope, dict) and "statuses" in envelope and envelope["statuses"] is None:
+        response = dict(envelope)
+        response["statuses"] = statuses
+        return response
+    return envelope
+
+
+def encode_envelope(envelope: Any, codec: str = DEFAULT_CODEC) -> bytes:
+    return compress(dumps(envelope), codec)
+
+
+def decode_blob(blob: bytes, codec: str) -> Dict:
+    return json.loads(decompress(blob, codec).decode("utf-8"))
@@ -0,0 +1,118 @@
+"""
+报告读取缓存 - 进程内 TTL + LRU 缓存
+
+报告写入 (save_analysis_report / update_report_run_metrics) 时由 StorageManager 调用
+invalidate() 清空；其他进程 (main.py) 写入的报告通过 version_source 返回的报告表版本
+(MAX(updated_at), MAX(id)) 发现，至多延迟 version_check_seconds。
+只缓存命中的结果，不存在的报告 (loader 返回 None) 不缓存。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.settings import REPORT_CACHE_CONFIG
+
+_MISSING = object()
+
+
+class ReportCache:
+    """线程安全的 TTL/LRU 缓存"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = None,
+        max_entries: int = None,
+        version_source: Optional[Callable[[], Hashable]] = None,
+        version_check_seconds: float = None
+    ):
+        """
+        Args:
+            version_source: 返回数据版本的函数，版本变化时清空缓存 (跨进程失效)
+            version_check_seconds: 两次检查版本的最小间隔
+        """
+        self.ttl_seconds = REPORT_CACHE_CONFIG.get("ttl_seconds", 30) if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries or REPORT_CACHE_CONFIG.get("max_entries", 256)
+        self.version_source = version_source
+        self.version_check_seconds = (
+            REPORT_CACHE_CONFIG.get("version_check_seconds", 1.0)
+            if version_check_seconds is None else version_check_seconds
+        )
+        self._version: Any = _MISSING
+        self._version_checked_at = float("-inf")
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[0]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int = None):
+        """
+        写入缓存
+
+        generation 为读取数据前记录的 self.generation；期间发生过失效时丢弃本次写入，
+        避免把失效前读到的旧数据放回缓存。
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def check_version(self):
+        """数据版本变化 (其他进程写入) 时清空缓存，version_check_seconds 内只检查一次"""
+        if self.version_source is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked_at < self.version_check_seconds:
+                return
+            self._version_checked_at = now
+        version = self.version_source()
+        with self._lock:
+            if version == self._version:
+                return
+            if self._version is not _MISSING:
+                self._entries.clear()
+                self.generation += 1
+            self._version = version
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """命中则返回缓存，否则调用 loader 加载，结果不为 None 时写入"""
+        self.check_version()
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self.generation
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+            }
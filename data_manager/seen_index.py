@@ -0,0 +1,154 @@
+"""
+已采集ID索引 - 布隆过滤器 + SQLite 精确校验，跨运行识别已入库的帖子
+
+- 启动时用 posts 表主键预热布隆过滤器
+- 过滤器判定"不存在"的ID一定是新帖子，无需查库
+- 判定"可能存在"时再到 SQLite 精确确认，排除误判
+- 本次运行新登记的ID同时记入内存集合 (写入线程可能尚未落库)
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+from config.settings import SEEN_INDEX_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """定长位数组布隆过滤器 (双重哈希)"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+
+class SeenIdIndex:
+    """
+    跨运行共享的已采集ID索引 (线程安全)
+
+    提供 in / add_if_new / filter_new，作为 seen_ids 传给采集器，多个采集任务共用以跨分组/账号去重。
+    """
+
+    def __init__(self, storage, capacity: int = None, false_positive_rate: float = None):
+        self.storage = storage
+        self.false_positive_rate = (
+            false_positive_rate or SEEN_INDEX_CONFIG.get("false_positive_rate", 0.001)
+        )
+        self._capacity = capacity
+        self._bloom = BloomFilter(1)
+        self._session_ids = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "warmed": 0,
+            "bloom_negatives": 0,
+            "exact_checks": 0,
+            "false_positives": 0,
+            "known": 0,
+            "new": 0,
+        }
+
+    def warm(self) -> "SeenIdIndex":
+        """用已入库的帖子ID预热布隆过滤器"""
+        started = time.perf_counter()
+        existing = self.storage.count_posts()
+        capacity = self._capacity or max(SEEN_INDEX_CONFIG.get("min_capacity", 100000), existing * 2)
+        bloom = BloomFilter(capacity, self.false_positive_rate)
+        for mblog_id in self.storage.iter_post_ids():
+            bloom.add(mblog_id)
+        with self._lock:
+            self._bloom = bloom
+            self._stats["warmed"] = bloom.count
+        logger.info(
+            f"已采集ID索引预热完成: {bloom.count} 条，容量 {capacity}，"
+            f"占用 {bloom.memory_bytes / 1024:.0f}KB，耗时 {time.perf_counter() - started:.2f}s"
+        )
+        return self
+
+    def _is_known(self, mblog_id: str) -> bool:
+        """调用方需持有锁"""
+        if mblog_id in self._session_ids:
+            return True
+        if mblog_id not in self._bloom:
+            self._stats["bloom_negatives"] += 1
+            return False
+        self._stats["exact_checks"] += 1
+        if self.storage.existing_post_ids([mblog_id]):
+            return True
+        self._stats["false_positives"] += 1
+        return False
+
+    def __contains__(self, mblog_id: str) -> bool:
+        with self._lock:
+            return self._is_known(mblog_id)
+
+    def __len__(self) -> int:
+        return len(self._session_ids)
+
+    def add_if_new(self, mblog_id: str) -> bool:
+        """原子地检查并登记，返回是否为新ID"""
+        with self._lock:
+            if self._is_known(mblog_id):
+                self._stats["known"] += 1
+                return False
+            self._session_ids.add(mblog_id)
+            self._bloom.add(mblog_id)
+            self._stats["new"] += 1
+            return True
+
+    def filter_new(self, mblog_ids: Iterable[str]) -> List[str]:
+        """
+        批量过滤出未入库的ID (不登记)
+
+        布隆过滤器判定可能存在的ID合并为一次 SQLite 查询确认。
+        """
+        mblog_ids = list(mblog_ids)
+        with self._lock:
+            maybe_known = []
+            for mblog_id in mblog_ids:
+                if mblog_id in self._session_ids:
+                    continue
+                if mblog_id in self._bloom:
+                    maybe_known.append(mblog_id)
+                else:
+                    self._stats["bloom_negatives"] += 1
+            stored = set()
+            if maybe_known:
+                self._stats["exact_checks"] += len(maybe_known)
+                stored = self.storage.existing_post_ids(maybe_known)
+                self._stats["false_positives"] += len(maybe_known) - len(stored)
+            return [
+                mblog_id for mblog_id in mblog_ids
+                if mblog_id not in self._session_ids and mblog_id not in stored
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "session_ids": len(self._session_ids)}
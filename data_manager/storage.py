@@ -3,13 +3,20 @@
 """
 import json
 import os
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from contextlib import contextmanager
 
-from config.settings import DATA_DIR, CHECKPOINTS_DIR
+from config.settings import DATA_DIR, CHECKPOINTS_DIR, SQLITE_CONFIG, SEARCH_CONFIG
+from data_manager import raw_codec
+from data_manager.report_cache import ReportCache
+from utils.metrics import get_metrics, timed
+from utils.time_parser import to_epoch
 from utils.logger_config import setup_logging
 import logging
 
@@ -17,11 +24,136 @@ setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class SQLiteConnectionPool:
+    """
+    SQLite 连接池
+
+    - 连接长期复用，避免每次操作都重新连接/关闭
+    - 同一线程内嵌套获取时复用同一连接，只在最外层提交
+    - 连接创建时统一设置 PRAGMA (synchronous/cache_size/mmap_size 等)
+    """
+
+    def __init__(self, db_path: Path, pool_size: int = None, pragmas: Dict[str, Any] = None):
+        self.db_path = db_path
+        self.pool_size = SQLITE_CONFIG.get("pool_size", 8) if pool_size is None else pool_size
+        self.pragmas = pragmas if pragmas is not None else SQLITE_CONFIG
+        self._idle = queue.LifoQueue(maxsize=max(self.pool_size, 1))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all_conns = set()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """新建连接并应用 PRAGMA"""
+        busy_timeout = self.pragmas.get("busy_timeout", 5000)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=busy_timeout / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for name in ("synchronous", "cache_size", "mmap_size", "busy_timeout"):
+            value = self.pragmas.get(name)
+            if value is not None:
+                conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._all_conns.add(conn)
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        """关闭并移除连接"""
+        with self._lock:
+            self._all_conns.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def set_journal_mode(self):
+        """设置日志模式 (WAL 模式持久化在数据库文件中，只需设置一次)"""
+        journal_mode = self.pragmas.get("journal_mode")
+        if not journal_mode:
+            return
+        with self.connection() as conn:
+            mode = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+            logger.debug(f"SQLite journal_mode: {mode}")
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self.pool_size > 0:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+        return self._connect()
+
+    def _release(self, conn: sqlite3.Connection):
+        if self.pool_size <= 0 or self._closed:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """获取连接，退出时提交/回滚并归还连接池"""
+        depth = getattr(self._local, "depth", 0)
+        if depth > 0:
+            # 同一线程嵌套调用，复用外层连接和事务
+            self._local.depth = depth + 1
+            try:
+                yield self._local.conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"数据库操作失败: {e}")
+            raise
+        finally:
+            self._local.depth = 0
+            self._local.conn = None
+            self._release(conn)
+
+    def close(self):
+        """关闭所有连接"""
+        self._closed = True
+        with self._lock:
+            conns = list(self._all_conns)
+            self._all_conns.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+
 class SQLiteManager:
     """SQLite数据库管理器"""
 
-    def __init__(self, db_name: str = "weibo_data.db"):
+    def __init__(self, db_name: str = "weibo_data.db", pool_size: int = None, keyword_matcher=None):
+        """
+        Args:
+            keyword_matcher: 入库时打标用的关键词匹配器 (需提供 version / post_text / find_keywords)，
+                由调用方注入；为空时新帖子不打标 (keyword_version 为 NULL)，之后由 retag_posts 补齐
+        """
         self.db_path = DATA_DIR / db_name
+        self.keyword_matcher = keyword_matcher
+        self.pool = SQLiteConnectionPool(self.db_path, pool_size=pool_size)
+        self.pool.set_journal_mode()
         self._init_db()
 
     def _init_db(self):
@@ -42,18 +174,72 @@ class SQLiteManager:
                     attitudes_count INTEGER,
                     collected_at TEXT,
                     date_key TEXT,
-                    source TEXT DEFAULT 'weibo'
+                    source TEXT DEFAULT 'weibo',
+                    publish_ts INTEGER,
+                    keyword_version TEXT
                 )
             """)
+            added = self._ensure_columns(conn, "posts", {"publish_ts": "INTEGER", "keyword_version": "TEXT"})
+            if "publish_ts" in added:
+                self._backfill_publish_ts(conn)
+            # 入库时预先计算的关键词命中，keyword_version 为打标时的关键词集合版本 (关键词列表哈希)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS post_keywords (
+                    mblog_id TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    PRIMARY KEY (mblog_id, keyword)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_post_keywords_keyword
+                ON post_keywords(keyword, mblog_id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_posts_keyword_version
+                ON posts(keyword_version)
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS post_keywords_ad AFTER DELETE ON posts BEGIN
+                    DELETE FROM post_keywords WHERE mblog_id = old.mblog_id;
+                END
+            """)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS raw_api_responses (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     url TEXT,
                     response_data TEXT,
                     collected_at TEXT,
-                    date_key TEXT
+                    date_key TEXT,
+                    storage_format TEXT DEFAULT 'json',
+                    codec TEXT,
+                    envelope BLOB,
+                    status_refs BLOB
+                )
+            """)
+            self._ensure_columns(conn, "raw_api_responses", {
+                "storage_format": "TEXT DEFAULT 'json'",
+                "codec": "TEXT",
+                "envelope": "BLOB",
+                "status_refs": "BLOB",
+            })
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_raw_responses_date
+                ON raw_api_responses(date_key)
+            """)
+            # 去重后的单条微博原文 (压缩)，last_seen 为最后一次被引用的 date_key
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS raw_statuses (
+                    hash BLOB PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    first_seen TEXT,
+                    last_seen TEXT
                 )
             """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_raw_statuses_last_seen
+                ON raw_statuses(last_seen)
+            """)
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_posts_date 
                 ON posts(date_key)
@@ -62,6 +248,12 @@ class SQLiteManager:
                 CREATE INDEX IF NOT EXISTS idx_posts_time 
                 ON posts(publish_time)
             """)
+            # 跨日时间范围查询 + 键集分页 (整数时间戳)
+            conn.execute("DROP INDEX IF EXISTS idx_posts_source_time")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_posts_source_ts
+                ON posts(source, publish_ts, mblog_id)
+            """)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS analysis_reports (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,83 +263,557 @@ class SQLiteManager:
                     post_count INTEGER DEFAULT 0,
                     time_range_start TEXT,
                     time_range_end TEXT,
-                    source TEXT DEFAULT 'weibo'
+                    source TEXT DEFAULT 'weibo',
+                    run_metrics TEXT,
+                    report_html TEXT,
+                    report_feishu TEXT,
+                    updated_at TEXT
                 )
             """)
+            added = self._ensure_columns(conn, "analysis_reports", {
+                "run_metrics": "TEXT",
+                "report_html": "TEXT",
+                "report_feishu": "TEXT",
+                "updated_at": "TEXT",
+            })
+            if "updated_at" in added:
+                conn.execute("UPDATE analysis_reports SET updated_at = created_at WHERE updated_at IS NULL")
+            # 报告每次写入都更新 updated_at，Web 进程按 MAX(updated_at) 判断其他进程是否写入过报告
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_reports_date 
-                ON analysis_reports(date_key)
+                CREATE INDEX IF NOT EXISTS idx_reports_updated
+                ON analysis_reports(updated_at)
             """)
+            # 报告列表按 (created_at, id) 键集分页，按日期筛选时使用带 date_key 前缀的索引
+            conn.execute("DROP INDEX IF EXISTS idx_reports_date")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reports_created
+                ON analysis_reports(created_at, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reports_date_created
+                ON analysis_reports(date_key, created_at, id)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_access
+                ON llm_cache(last_access)
+            """)
+            # 增量采集的高水位: 每个 数据源/分组 已入库的最新帖子
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    source TEXT NOT NULL,
+                    group_name TEXT NOT NULL,
+                    newest_mblog_id TEXT,
+                    newest_publish_time TEXT,
+                    last_run_at TEXT,
+                    last_run_posts INTEGER DEFAULT 0,
+                    PRIMARY KEY (source, group_name)
+                )
+            """)
+            self.fts_enabled = self._init_search_index(conn)
             logger.info(f"数据库初始化完成: {self.db_path}")
 
-    @contextmanager
+    @staticmethod
+    def _ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> List[str]:
+        """为旧数据库补齐新增字段，返回新添加的字段名"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        added = []
+        for name, decl in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                logger.info(f"已添加字段 {table}.{name}")
+                added.append(name)
+        return added
+
+    @staticmethod
+    def _backfill_publish_ts(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+        """为旧帖子补齐 publish_ts (publish_time 按本机时区理解)"""
+        updated = 0
+        last_id = ""
+        while True:
+            rows = conn.execute("""
+                SELECT mblog_id, publish_time FROM posts
+                WHERE publish_ts IS NULL AND mblog_id > ?
+                ORDER BY mblog_id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            values = [(to_epoch(row[1]), row[0]) for row in rows]
+            values = [v for v in values if v[0] is not None]
+            conn.executemany("UPDATE posts SET publish_ts = ? WHERE mblog_id = ?", values)
+            updated += len(values)
+        if updated:
+            logger.info(f"已为 {updated} 条帖子补齐 publish_ts")
+        return updated
+
+    # 全文索引: 外部内容表 (不重复存储正文)，由触发器与源表保持同步
+    _FTS_TABLES = {
+        "posts_fts": ("posts", ("content", "author"), "content, author"),
+        "reports_fts": ("analysis_reports", ("report_content",), "report_content"),
+    }
+
+    @classmethod
+    def _init_search_index(cls, conn: sqlite3.Connection) -> bool:
+        """创建 FTS5 索引和同步触发器，新建索引时从源表重建；当前 SQLite 不支持时返回 False"""
+        tokenizer = SEARCH_CONFIG.get("tokenizer", "trigram")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for fts, (table, columns, watched) in cls._FTS_TABLES.items():
+            try:
+                conn.execute(f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+                    USING fts5({", ".join(columns)}, content='{table}', tokenize='{tokenizer}')
+                """)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite 不支持 FTS5 ({tokenizer})，全文检索退化为 LIKE 扫描: {e}")
+                return False
+            new_values = ", ".join(f"new.{c}" for c in columns)
+            old_values = ", ".join(f"old.{c}" for c in columns)
+            changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in columns)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts}(rowid, {", ".join(columns)}) VALUES (new.rowid, {new_values});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {", ".join(columns)}) VALUES ('delete', old.rowid, {old_values});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {watched} ON {table}
+                WHEN {changed} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {", ".join(columns)}) VALUES ('delete', old.rowid, {old_values});
+                    INSERT INTO {fts}(rowid, {", ".join(columns)}) VALUES (new.rowid, {new_values});
+                END
+            """)
+            if fts not in existing:
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                logger.info(f"已从 {table} 重建全文索引 {fts}")
+        return True
+
+    def rebuild_search_index(self):
+        """
+        从源表重建全文索引
+
+        posts 没有 INTEGER PRIMARY KEY，VACUUM 可能改变其 rowid，VACUUM 之后需要重建。
+        """
+        if not self.fts_enabled:
+            return
+        with self._get_connection() as conn:
+            for fts in self._FTS_TABLES:
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        logger.info("全文索引重建完成")
+
+    def backfill_report_renderings(self, render_html, render_feishu, batch_size: int = 100) -> int:
+        """
+        为旧报告补齐预渲染的 HTML 和飞书文本
+
+        Args:
+            render_html / render_feishu: Markdown -> HTML / 飞书文本的渲染函数，由调用方提供
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            with self._get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT id, report_content FROM analysis_reports
+                    WHERE id > ? AND (report_html IS NULL OR report_feishu IS NULL)
+                    ORDER BY id LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                updated_at = self._report_timestamp()
+                conn.executemany(
+                    "UPDATE analysis_reports SET report_html = ?, report_feishu = ?, updated_at = ? WHERE id = ?",
+                    [(render_html(row[1]), render_feishu(row[1]), updated_at, row[0]) for row in rows]
+                )
+            updated += len(rows)
+        if updated:
+            logger.info(f"已为 {updated} 份报告补齐预渲染内容")
+        return updated
+
     def _get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"数据库操作失败: {e}")
-            raise
-        finally:
-            conn.close()
+        """获取数据库连接 (来自连接池)"""
+        return self.pool.connection()
 
-    def save_posts(self, posts: List[Dict], date_key: str = None) -> int:
-        """保存微博帖子到数据库"""
+    def close(self):
+        """关闭连接池"""
+        self.pool.close()
+
+    _POST_COLUMNS = (
+        "mblog_id", "author", "author_id", "content", "publish_time", "url",
+        "images", "video", "reposts_count", "comments_count", "attitudes_count",
+        "collected_at", "date_key", "publish_ts", "keyword_version"
+    )
+    # 使用 UPSERT 而不是 INSERT OR REPLACE: REPLACE 删除旧行时不会触发删除触发器 (全文索引会残留旧条目)，
+    # 且会改变 rowid；UPSERT 原地更新，只在正文/作者变化时由更新触发器同步索引
+    _INSERT_POST_SQL = f"""
+        INSERT INTO posts ({", ".join(_POST_COLUMNS)})
+        VALUES ({", ".join("?" * len(_POST_COLUMNS))})
+        ON CONFLICT(mblog_id) DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in _POST_COLUMNS[1:])}
+    """
+
+    @staticmethod
+    def _normalize_post_rows(posts: List[Dict], date_key: str, collected_at: str, keyword_version: str = None):
+        """
+        将帖子字典一次性转换为待写入的行 (keyword_version 为最后一列)
+
+        Returns:
+            (rows, skipped): rows 按 mblog_id 去重(保留最后一条)，skipped 为无ID或重复的条数
+        """
+        rows = {}
+        skipped = 0
+        for post in posts:
+            mblog_id = post.get('mblog_id')
+            if not mblog_id:
+                skipped += 1
+                continue
+            if mblog_id in rows:
+                skipped += 1
+            rows[mblog_id] = (
+                mblog_id,
+                post.get('author'),
+                post.get('author_id'),
+                post.get('content'),
+                post.get('publish_time'),
+                post.get('url'),
+                json.dumps(post.get('images', []), ensure_ascii=False),
+                post.get('video'),
+                post.get('reposts_count', 0),
+                post.get('comments_count', 0),
+                post.get('attitudes_count', 0),
+                collected_at,
+                date_key,
+                post.get('publish_ts') or to_epoch(post.get('publish_time')),
+                keyword_version
+            )
+        return list(rows.values()), skipped
+
+    @staticmethod
+    def _write_post_keywords(conn: sqlite3.Connection, tagged: List[tuple]):
+        """覆盖写入帖子的关键词命中，tagged 为 [(mblog_id, keywords), ...]"""
+        conn.executemany("DELETE FROM post_keywords WHERE mblog_id = ?", [(mblog_id,) for mblog_id, _ in tagged])
+        conn.executemany(
+            "INSERT OR IGNORE INTO post_keywords (mblog_id, keyword) VALUES (?, ?)",
+            [(mblog_id, keyword) for mblog_id, keywords in tagged for keyword in keywords]
+        )
+
+    @staticmethod
+    def _tag_rows(matcher, rows: List[tuple]) -> List[tuple]:
+        """按帖子行 (mblog_id, author, ..., content, ...) 计算关键词命中，没有匹配器时清空命中"""
+        if matcher is None:
+            return [(row[0], []) for row in rows]
+        return [
+            (row[0], matcher.find_keywords(matcher.post_text({"content": row[3], "author": row[1]})))
+            for row in rows
+        ]
+
+    @staticmethod
+    def _existing_posts(conn: sqlite3.Connection, mblog_ids: List[str]) -> Dict[str, tuple]:
+        """查询已存在帖子的 (author, content, keyword_version) (分批以避免超出 SQLite 参数上限)"""
+        existing = {}
+        step = 900
+        for i in range(0, len(mblog_ids), step):
+            part = mblog_ids[i:i + step]
+            cursor = conn.execute(
+                f"SELECT mblog_id, author, content, keyword_version FROM posts "
+                f"WHERE mblog_id IN ({','.join('?' * len(part))})",
+                part
+            )
+            existing.update((row[0], tuple(row[1:])) for row in cursor)
+        return existing
+
+    def _plan_keyword_tagging(self, chunk: List[tuple], existing: Dict[str, tuple]):
+        """
+        确定每行写入的 keyword_version 以及需要重新打标的帖子
+
+        正文、作者都未变化且已按当前版本打标 (或未注入匹配器) 的重复帖子沿用原有结果，
+        不再重新匹配、重写 post_keywords。
+
+        Returns:
+            (rows, retag_ids)
+        """
+        version = self.keyword_matcher.version if self.keyword_matcher else None
+        rows = []
+        retag_ids = set()
+        for row in chunk:
+            old = existing.get(row[0])
+            if old and old[0] == row[1] and old[1] == row[3] and (version is None or old[2] == version):
+                rows.append(row[:-1] + (old[2],))
+            else:
+                rows.append(row[:-1] + (version,))
+                retag_ids.add(row[0])
+        return rows, retag_ids
+
+    @timed("sqlite_write_seconds", table="posts")
+    def bulk_save_posts(
+        self,
+        posts: List[Dict],
+        date_key: str = None,
+        chunk_size: int = None
+    ) -> Dict[str, int]:
+        """
+        批量保存帖子 (单事务 + executemany 分块写入)
+
+        某个分块写入失败时回滚该分块，并逐行重试以定位失败的帖子。
+
+        Args:
+            posts: 帖子列表
+            date_key: 日期标识
+            chunk_size: 每个分块的行数，默认读取 SQLITE_CONFIG['batch_size']
+
+        Returns:
+            {'inserted': 新增数, 'updated': 更新数, 'skipped': 跳过数, 'failed': 失败数}
+        """
         if not date_key:
             date_key = datetime.now().strftime("%Y-%m-%d")
-        
-        saved_count = 0
+        if not chunk_size:
+            chunk_size = SQLITE_CONFIG.get("batch_size", 500)
+
+        collected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # 入库时完成关键词匹配 (注入了匹配器时)，分析时直接按 post_keywords 筛选，不再逐条重新匹配
+        rows, skipped = self._normalize_post_rows(posts, date_key, collected_at)
+        stats = {"inserted": 0, "updated": 0, "skipped": skipped, "failed": 0}
+        if not rows:
+            return stats
+
         with self._get_connection() as conn:
-            for post in posts:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for start in range(0, len(rows), chunk_size):
+                existing = self._existing_posts(conn, [row[0] for row in rows[start:start + chunk_size]])
+                chunk, retag_ids = self._plan_keyword_tagging(rows[start:start + chunk_size], existing)
+                conn.execute("SAVEPOINT save_posts_chunk")
                 try:
-                    conn.execute("""
-                        INSERT OR REPLACE INTO posts 
-                        (mblog_id, author, author_id, content, publish_time, url,
-                         images, video, reposts_count, comments_count, attitudes_count,
-                         collected_at, date_key)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        post.get('mblog_id'),
-                        post.get('author'),
-                        post.get('author_id'),
-                        post.get('content'),
-                        post.get('publish_time'),
-                        post.get('url'),
-                        json.dumps(post.get('images', []), ensure_ascii=False),
-                        post.get('video'),
-                        post.get('reposts_count', 0),
-                        post.get('comments_count', 0),
-                        post.get('attitudes_count', 0),
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        date_key
-                    ))
-                    saved_count += 1
-                except Exception as e:
-                    logger.warning(f"保存帖子失败 {post.get('mblog_id')}: {e}")
-            
-            logger.info(f"成功保存 {saved_count} 条帖子到数据库")
-            return saved_count
+                    conn.executemany(self._INSERT_POST_SQL, chunk)
+                    conn.execute("RELEASE SAVEPOINT save_posts_chunk")
+                    written = chunk
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT save_posts_chunk")
+                    conn.execute("RELEASE SAVEPOINT save_posts_chunk")
+                    logger.warning(f"批量写入分块失败，改为逐行重试 ({len(chunk)} 条): {e}")
+                    written = []
+                    for row in chunk:
+                        try:
+                            conn.execute(self._INSERT_POST_SQL, row)
+                            written.append(row)
+                        except sqlite3.Error as row_error:
+                            stats["failed"] += 1
+                            logger.warning(f"保存帖子失败 {row[0]}: {row_error}")
+
+                self._write_post_keywords(
+                    conn, self._tag_rows(self.keyword_matcher, [row for row in written if row[0] in retag_ids])
+                )
+
+                for row in written:
+                    if row[0] in existing:
+                        stats["updated"] += 1
+                    else:
+                        stats["inserted"] += 1
+
+        get_metrics().inc("sqlite_rows_written", stats["inserted"] + stats["updated"], table="posts")
+        logger.info(
+            f"批量保存帖子完成: 新增 {stats['inserted']}, 更新 {stats['updated']}, "
+            f"跳过 {stats['skipped']}, 失败 {stats['failed']}"
+        )
+        return stats
+
+    def save_posts(self, posts: List[Dict], date_key: str = None) -> int:
+        """保存微博帖子到数据库"""
+        stats = self.bulk_save_posts(posts, date_key)
+        saved_count = stats["inserted"] + stats["updated"]
+        logger.info(f"成功保存 {saved_count} 条帖子到数据库")
+        return saved_count
 
     def save_raw_api_response(self, url: str, response_data: Any, date_key: str = None):
         """保存原始API响应"""
-        if not date_key:
-            date_key = datetime.now().strftime("%Y-%m-%d")
-        
+        self.save_raw_api_responses([(url, response_data, date_key)])
+        logger.debug(f"保存原始API响应: {url}")
+
+    @staticmethod
+    def _store_raw_response(conn: sqlite3.Connection, response_data: Any, date_key: str) -> tuple:
+        """
+        以去重压缩格式写入一条响应中的 statuses
+
+        已存在的 status 只更新 last_seen，不重复压缩。
+
+        Returns:
+            (codec, envelope, status_refs)
+        """
+        codec = raw_codec.DEFAULT_CODEC
+        envelope, statuses = raw_codec.split_response(response_data)
+
+        unique = {}
+        for digest, data in statuses:
+            unique.setdefault(digest, data)
+        existing = set()
+        digests = list(unique)
+        for i in range(0, len(digests), 900):
+            part = digests[i:i + 900]
+            cursor = conn.execute(
+                f"SELECT hash FROM raw_statuses WHERE hash IN ({','.join('?' * len(part))})",
+                part
+            )
+            existing.update(row[0] for row in cursor)
+
+        new_rows = [
+            (digest, codec, raw_codec.compress(data, codec), date_key, date_key)
+            for digest, data in unique.items() if digest not in existing
+        ]
+        if new_rows:
+            conn.executemany("""
+                INSERT OR IGNORE INTO raw_statuses (hash, codec, data, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+            """, new_rows)
+        if existing:
+            conn.executemany("""
+                UPDATE raw_statuses SET last_seen = ?
+                WHERE hash = ? AND (last_seen IS NULL OR last_seen < ?)
+            """, [(date_key, digest, date_key) for digest in existing])
+
+        return (
+            codec,
+            raw_codec.encode_envelope(envelope, codec),
+            raw_codec.pack_refs([digest for digest, _ in statuses])
+        )
+
+    @timed("sqlite_write_seconds", table="raw_api_responses")
+    def save_raw_api_responses(self, responses: List[tuple]) -> int:
+        """
+        批量保存原始API响应 (单事务，去重压缩格式)
+
+        Args:
+            responses: [(url, response_data, date_key), ...]
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        collected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with self._get_connection() as conn:
-            conn.execute("""
-                INSERT INTO raw_api_responses (url, response_data, collected_at, date_key)
-                VALUES (?, ?, ?, ?)
-            """, (
-                url,
-                json.dumps(response_data, ensure_ascii=False),
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                date_key
-            ))
-            logger.debug(f"保存原始API响应: {url}")
+            rows = []
+            for url, response_data, date_key in responses:
+                date_key = date_key or today
+                codec, envelope, status_refs = self._store_raw_response(conn, response_data, date_key)
+                rows.append((url, collected_at, date_key, codec, envelope, status_refs))
+            conn.executemany("""
+                INSERT INTO raw_api_responses
+                (url, collected_at, date_key, storage_format, codec, envelope, status_refs)
+                VALUES (?, ?, ?, 'dedup', ?, ?, ?)
+            """, rows)
+        return len(rows)
+
+    def _load_statuses(self, conn: sqlite3.Connection, digests: List[bytes], cache: Dict) -> Dict:
+        """按哈希读取并解码 statuses，cache 用于跨响应复用"""
+        missing = [d for d in set(digests) if d not in cache]
+        for i in range(0, len(missing), 900):
+            part = missing[i:i + 900]
+            cursor = conn.execute(
+                f"SELECT hash, codec, data FROM raw_statuses WHERE hash IN ({','.join('?' * len(part))})",
+                part
+            )
+            for digest, codec, data in cursor:
+                cache[digest] = raw_codec.decode_blob(data, codec)
+        return cache
+
+    def _rebuild_raw_row(self, conn: sqlite3.Connection, row: sqlite3.Row, cache: Dict) -> Dict:
+        """将数据库行还原为包含原始 response_data 的字典"""
+        record = {
+            "id": row["id"],
+            "url": row["url"],
+            "collected_at": row["collected_at"],
+            "date_key": row["date_key"],
+        }
+        if row["storage_format"] == "dedup":
+            digests = raw_codec.unpack_refs(row["status_refs"])
+            self._load_statuses(conn, digests, cache)
+            statuses = []
+            for digest in digests:
+                if digest in cache:
+                    statuses.append(cache[digest])
+                else:
+                    logger.warning(f"原始响应 {row['id']} 引用的 status 已不存在")
+            envelope = raw_codec.decode_blob(row["envelope"], row["codec"])
+            record["response_data"] = raw_codec.rebuild_response(envelope, statuses)
+        else:
+            record["response_data"] = json.loads(row["response_data"]) if row["response_data"] else None
+        return record
+
+    def get_raw_api_response(self, response_id: int) -> Optional[Dict]:
+        """按ID读取并重建原始API响应"""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM raw_api_responses WHERE id = ?", (response_id,)
+            ).fetchone()
+            if not row:
+                return None
+            return self._rebuild_raw_row(conn, row, {})
+
+    def iter_raw_api_responses(
+        self,
+        date_key: str = None,
+        start_time: str = None,
+        end_time: str = None,
+        batch_size: int = 200
+    ):
+        """
+        按采集顺序逐条重建原始API响应 (生成器)
+
+        Args:
+            date_key: 日期标识
+            start_time / end_time: 按 collected_at 过滤
+            batch_size: 每次从数据库读取的行数
+        """
+        conditions = []
+        params = []
+        if date_key:
+            conditions.append("date_key = ?")
+            params.append(date_key)
+        if start_time:
+            conditions.append("collected_at >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("collected_at <= ?")
+            params.append(end_time)
+        where = f" AND {' AND '.join(conditions)}" if conditions else ""
+
+        last_id = 0
+        cache: Dict[bytes, Any] = {}
+        while True:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    f"SELECT * FROM raw_api_responses WHERE id > ?{where} ORDER BY id LIMIT ?",
+                    [last_id] + params + [batch_size]
+                ).fetchall()
+                records = [self._rebuild_raw_row(conn, row, cache) for row in rows]
+            if not records:
+                return
+            # 相邻批次的 status 重叠最多，只保留最近一批的缓存
+            if len(cache) > batch_size * 50:
+                cache.clear()
+            for record in records:
+                yield record
+            last_id = records[-1]["id"]
+
+    @staticmethod
+    def _row_to_post(row: sqlite3.Row) -> Dict:
+        """数据库行转换为帖子字典，images 解码为列表"""
+        post = dict(zip(row.keys(), row))
+        raw = post.get('images')
+        if isinstance(raw, str) or raw is None:
+            # 大部分帖子没有图片，跳过 json.loads
+            post['images'] = json.loads(raw) if raw and raw != "[]" else []
+        return post
 
     def get_posts_by_time_range(
         self, 
@@ -155,33 +821,188 @@ class SQLiteManager:
         end_time: str = None,
         date_key: str = None
     ) -> List[Dict]:
-        """按时间范围获取帖子"""
-        if not date_key:
+        """
+        按时间范围获取帖子
+
+        指定 date_key 时只查该日期的帖子；只给出时间范围时按 publish_ts 跨日查询；
+        都未指定时返回当天的帖子。
+        """
+        if not date_key and not (start_time or end_time):
             date_key = datetime.now().strftime("%Y-%m-%d")
         
+        if not date_key:
+            return list(self.iter_posts_by_time_range(start_time, end_time))
+        
         query = "SELECT * FROM posts WHERE date_key = ?"
         params = [date_key]
         
         if start_time:
-            query += " AND publish_time >= ?"
-            params.append(start_time)
+            query += " AND publish_ts >= ?"
+            params.append(to_epoch(start_time))
         if end_time:
-            query += " AND publish_time <= ?"
-            params.append(end_time)
+            query += " AND publish_ts <= ?"
+            params.append(to_epoch(end_time))
         
-        query += " ORDER BY publish_time DESC"
+        query += " ORDER BY publish_ts DESC"
         
         with self._get_connection() as conn:
             cursor = conn.execute(query, params)
             rows = cursor.fetchall()
             
-            posts = []
-            for row in rows:
-                post = dict(row)
-                post['images'] = json.loads(post['images']) if post['images'] else []
-                posts.append(post)
-            
-            return posts
+            return [self._row_to_post(row) for row in rows]
+
+    def get_posts_page(
+        self,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = 'weibo',
+        limit: int = 500,
+        after: tuple = None,
+        relevant_only: bool = False
+    ) -> tuple:
+        """
+        按 publish_ts 跨日分页查询帖子 (键集分页，按时间倒序)
+
+        Args:
+            start_time / end_time: 时间范围 (含边界)，时间字符串 / datetime / 时间戳
+            source: 数据来源
+            limit: 每页条数
+            after: 上一页返回的游标 (publish_ts, mblog_id)
+            relevant_only: 只返回命中关键词的帖子 (按 post_keywords 筛选)，帖子附 keywords 列表
+
+        Returns:
+            (posts, next_cursor): 没有更多数据时 next_cursor 为 None
+        """
+        if relevant_only:
+            query = """
+                SELECT posts.*, (
+                    SELECT group_concat(keyword, char(31)) FROM post_keywords k WHERE k.mblog_id = posts.mblog_id
+                ) AS keywords
+                FROM posts
+                WHERE source = ? AND EXISTS (SELECT 1 FROM post_keywords k WHERE k.mblog_id = posts.mblog_id)
+            """
+        else:
+            query = "SELECT * FROM posts WHERE source = ?"
+        params = [source]
+        if start_time:
+            query += " AND publish_ts >= ?"
+            params.append(to_epoch(start_time))
+        # 游标与结束时间合并为唯一的 publish_ts 上界，索引扫描才能从游标处开始，
+        # 而不是每页都从结束时间扫过已返回的行
+        upper = to_epoch(end_time) if end_time else None
+        if after:
+            upper = after[0] if upper is None else min(upper, after[0])
+        if upper is not None:
+            query += " AND publish_ts <= ?"
+            params.append(upper)
+        if after:
+            query += " AND (publish_ts, mblog_id) < (?, ?)"
+            params.extend(after)
+        query += " ORDER BY publish_ts DESC, mblog_id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        posts = [self._row_to_post(row) for row in rows]
+        if relevant_only:
+            for post in posts:
+                post['keywords'] = post['keywords'].split("\x1f")
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = (rows[-1]['publish_ts'], rows[-1]['mblog_id'])
+        return posts, next_cursor
+
+    def iter_posts_by_time_range(
+        self,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = 'weibo',
+        page_size: int = 500,
+        relevant_only: bool = False
+    ):
+        """按时间范围逐页读取帖子 (生成器)，内存占用与窗口长度无关"""
+        cursor = None
+        while True:
+            posts, cursor = self.get_posts_page(start_time, end_time, source, page_size, cursor, relevant_only)
+            yield from posts
+            if cursor is None:
+                return
+
+    def count_posts_in_range(self, start_time: str = None, end_time: str = None, source: str = 'weibo') -> int:
+        """时间范围内的帖子数"""
+        query = "SELECT COUNT(*) FROM posts WHERE source = ?"
+        params: List[Any] = [source]
+        if start_time:
+            query += " AND publish_ts >= ?"
+            params.append(to_epoch(start_time))
+        if end_time:
+            query += " AND publish_ts <= ?"
+            params.append(to_epoch(end_time))
+        with self._get_connection() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def retag_posts(
+        self,
+        matcher=None,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = None,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        增量重新打标: 只处理 keyword_version 与当前关键词集合版本不一致的帖子 (含未打标的旧帖子)
+
+        关键词配置未变化时只需一次索引查询。每批单独提交，中断后重新运行会从剩余帖子继续。
+
+        Args:
+            matcher: 关键词匹配器，默认使用构造时注入的匹配器
+            start_time / end_time / source: 只处理该范围内的帖子 (分析前按窗口补齐)
+
+        Returns:
+            重新打标的帖子数
+        """
+        matcher = matcher or self.keyword_matcher
+        if matcher is None:
+            raise ValueError("未注入关键词匹配器，无法重新打标")
+        # 用 < / > 而不是 <>，三个条件都能走 idx_posts_keyword_version (MULTI-INDEX OR)
+        conditions = ["(keyword_version IS NULL OR keyword_version < ? OR keyword_version > ?)"]
+        params: List[Any] = [matcher.version, matcher.version]
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if start_time:
+            conditions.append("publish_ts >= ?")
+            params.append(to_epoch(start_time))
+        if end_time:
+            conditions.append("publish_ts <= ?")
+            params.append(to_epoch(end_time))
+        query = f"""
+            SELECT mblog_id, author, content FROM posts
+            WHERE {" AND ".join(conditions)}
+            LIMIT ?
+        """
+        params.append(batch_size)
+
+        retagged = 0
+        while True:
+            with self._get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+                if not rows:
+                    break
+                tagged = [
+                    (row["mblog_id"], matcher.find_keywords(matcher.post_text(dict(row))))
+                    for row in rows
+                ]
+                self._write_post_keywords(conn, tagged)
+                conn.executemany(
+                    "UPDATE posts SET keyword_version = ? WHERE mblog_id = ?",
+                    [(matcher.version, row["mblog_id"]) for row in rows]
+                )
+            retagged += len(rows)
+        if retagged:
+            logger.info(f"已按关键词版本 {matcher.version} 重新打标 {retagged} 条帖子")
+        return retagged
 
     def get_last_post_info(self, date_key: str = None) -> Optional[Dict]:
         """获取指定日期的最后一条帖子信息（用于断点续传）"""
@@ -208,6 +1029,7 @@ class SQLiteManager:
         
         return self.get_posts_by_time_range(date_key=date_key)
 
+    @timed("sqlite_write_seconds", table="analysis_reports")
     def save_analysis_report(
         self, 
         report_content: str, 
@@ -215,17 +1037,25 @@ class SQLiteManager:
         date_key: str = None,
         time_range_start: str = None,
         time_range_end: str = None,
-        source: str = 'weibo'
+        source: str = 'weibo',
+        run_metrics: Dict = None,
+        report_html: str = None,
+        report_feishu: str = None
     ) -> int:
-        """保存AI分析报告"""
+        """
+        保存AI分析报告，run_metrics 为本次运行的指标快照
+
+        report_html / report_feishu 为调用方预渲染的 HTML 和飞书格式文本，详情页和通知直接使用
+        """
         if not date_key:
             date_key = datetime.now().strftime("%Y-%m-%d")
         
         with self._get_connection() as conn:
             cursor = conn.execute("""
                 INSERT INTO analysis_reports 
-                (date_key, report_content, created_at, post_count, time_range_start, time_range_end, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                (date_key, report_content, created_at, post_count, time_range_start, time_range_end, source,
+                 run_metrics, report_html, report_feishu, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 date_key,
                 report_content,
@@ -233,11 +1063,52 @@ class SQLiteManager:
                 post_count,
                 time_range_start,
                 time_range_end,
-                source
+                source,
+                json.dumps(run_metrics, ensure_ascii=False) if run_metrics else None,
+                report_html,
+                report_feishu,
+                self._report_timestamp()
             ))
             logger.info(f"已保存AI分析报告: {date_key}, 分析了 {post_count} 条帖子")
             return cursor.lastrowid
 
+    def update_report_run_metrics(self, report_id: int, run_metrics: Dict):
+        """更新报告的运行指标 (分析之后的阶段，如 Webhook 通知，完成后补写)"""
+        with self._get_connection() as conn:
+            conn.execute(
+                "UPDATE analysis_reports SET run_metrics = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(run_metrics, ensure_ascii=False), self._report_timestamp(), report_id)
+            )
+
+    @staticmethod
+    def _report_timestamp() -> str:
+        """报告 updated_at (精确到微秒，同一秒内的多次写入也能区分)"""
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def get_reports_version(self) -> tuple:
+        """报告表的版本标识 (MAX(updated_at), MAX(id))，任何进程写入报告后都会变化，两项都走索引"""
+        with self._get_connection() as conn:
+            return tuple(conn.execute(
+                "SELECT (SELECT MAX(updated_at) FROM analysis_reports), (SELECT MAX(id) FROM analysis_reports)"
+            ).fetchone())
+
+    def get_latest_run_metrics(self) -> Optional[Dict]:
+        """最近一次带运行指标的报告: {'report_id', 'created_at', 'run_metrics'}"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT id, created_at, run_metrics FROM analysis_reports
+                WHERE run_metrics IS NOT NULL
+                ORDER BY id DESC
+                LIMIT 1
+            """).fetchone()
+        if not row:
+            return None
+        return {
+            "report_id": row["id"],
+            "created_at": row["created_at"],
+            "run_metrics": json.loads(row["run_metrics"]),
+        }
+
     def get_analysis_reports(self, date_key: str = None, limit: int = 10) -> List[Dict]:
         """获取AI分析报告"""
         with self._get_connection() as conn:
@@ -258,6 +1129,55 @@ class SQLiteManager:
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
 
+    # 列表只返回摘要字段，不读取完整的报告正文
+    _REPORT_SUMMARY_COLUMNS = (
+        "id, date_key, created_at, post_count, time_range_start, time_range_end, source, "
+        "substr(report_content, 1, ?) AS preview, length(report_content) AS content_length"
+    )
+
+    def get_report_summaries_page(
+        self,
+        date_key: str = None,
+        limit: int = 20,
+        after: tuple = None,
+        preview_chars: int = 200
+    ) -> tuple:
+        """
+        按 (created_at, id) 倒序键集分页查询报告摘要
+
+        Args:
+            date_key: 只查该日期的报告
+            limit: 每页条数
+            after: 上一页返回的游标 (created_at, id)
+            preview_chars: 摘要中保留的正文字符数
+
+        Returns:
+            (summaries, next_cursor): 没有更多数据时 next_cursor 为 None
+        """
+        query = f"SELECT {self._REPORT_SUMMARY_COLUMNS} FROM analysis_reports"
+        params: List[Any] = [preview_chars]
+        conditions = []
+        if date_key:
+            conditions.append("date_key = ?")
+            params.append(date_key)
+        if after:
+            # 单独给出 created_at 上界，索引扫描从游标处开始
+            conditions.append("created_at <= ? AND (created_at, id) < (?, ?)")
+            params.extend([after[0], after[0], after[1]])
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        summaries = [dict(row) for row in rows]
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        return summaries, next_cursor
+
     def get_analysis_report_by_id(self, report_id: int) -> Optional[Dict]:
         """根据ID获取分析报告"""
         with self._get_connection() as conn:
@@ -270,6 +1190,307 @@ class SQLiteManager:
                 return dict(row)
             return None
 
+    @staticmethod
+    def _search_terms(query: str) -> List[str]:
+        """查询按空白拆分为多个词 (同时命中，AND)"""
+        return [term for term in (query or "").split() if term]
+
+    def _use_fts(self, terms: List[str]) -> bool:
+        # trigram 分词无法匹配少于 3 个字符的词，此时退化为 LIKE 扫描
+        return self.fts_enabled and all(len(term) >= 3 for term in terms)
+
+    @staticmethod
+    def _fts_query(terms: List[str]) -> str:
+        """每个词作为短语加引号，避免 FTS5 查询语法注入"""
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    @staticmethod
+    def _search_time_bound(value, name: str) -> int:
+        """检索时间范围参数转换为时间戳，无法解析时抛出 ValueError"""
+        epoch = to_epoch(value)
+        if epoch is None:
+            raise ValueError(f"无法解析的时间 {name}: {value!r}")
+        return epoch
+
+    @staticmethod
+    def _like_pattern(term: str) -> str:
+        return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    @timed("search_seconds", kind="posts")
+    def search_posts(
+        self,
+        query: str,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = 'weibo',
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank"
+    ) -> List[Dict]:
+        """
+        全文检索帖子正文和作者
+
+        Args:
+            query: 检索词，多个词用空格分隔 (需同时命中)
+            start_time / end_time: 发布时间范围 (含边界)
+            order: rank 按相关度 (bm25)，time 按发布时间倒序
+
+        Returns:
+            帖子列表，附 snippet (命中片段) 和 rank (越小越相关，LIKE 扫描时为 None)
+
+        Raises:
+            ValueError: 时间范围无法解析
+        """
+        terms = self._search_terms(query)
+        if not terms:
+            return []
+        columns = (
+            "p.mblog_id, p.author, p.author_id, p.content, p.publish_time, p.url, "
+            "p.reposts_count, p.comments_count, p.attitudes_count"
+        )
+        conditions = ["p.source = ?"]
+        filters: List[Any] = [source]
+        if start_time:
+            conditions.append("p.publish_ts >= ?")
+            filters.append(self._search_time_bound(start_time, "start_time"))
+        if end_time:
+            conditions.append("p.publish_ts <= ?")
+            filters.append(self._search_time_bound(end_time, "end_time"))
+
+        if self._use_fts(terms):
+            mark_open, mark_close = SEARCH_CONFIG.get("highlight", ("[", "]"))
+            query_sql = f"""
+                SELECT {columns},
+                       snippet(posts_fts, -1, ?, ?, '…', ?) AS snippet, bm25(posts_fts) AS rank
+                FROM posts_fts JOIN posts p ON p.rowid = posts_fts.rowid
+                WHERE posts_fts MATCH ? AND {" AND ".join(conditions)}
+                ORDER BY {"rank" if order == "rank" else "p.publish_ts DESC"}
+                LIMIT ? OFFSET ?
+            """
+            params = [mark_open, mark_close, SEARCH_CONFIG.get("snippet_tokens", 24), self._fts_query(terms)]
+        else:
+            for _ in terms:
+                conditions.append("(p.content LIKE ? ESCAPE '\\' OR p.author LIKE ? ESCAPE '\\')")
+            query_sql = f"""
+                SELECT {columns}, substr(p.content, 1, ?) AS snippet, NULL AS rank
+                FROM posts p
+                WHERE {" AND ".join(conditions)}
+                ORDER BY p.publish_ts DESC
+                LIMIT ? OFFSET ?
+            """
+            params = [SEARCH_CONFIG.get("snippet_tokens", 24) * 2]
+            for term in terms:
+                filters.extend([self._like_pattern(term)] * 2)
+        params.extend(filters)
+        params.extend([limit, offset])
+
+        with self._get_connection() as conn:
+            return [dict(row) for row in conn.execute(query_sql, params)]
+
+    @timed("search_seconds", kind="reports")
+    def search_reports(
+        self,
+        query: str,
+        start_time: str = None,
+        end_time: str = None,
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank"
+    ) -> List[Dict]:
+        """
+        全文检索分析报告正文
+
+        Args:
+            query: 检索词，多个词用空格分隔 (需同时命中)
+            start_time / end_time: 报告生成时间范围 (含边界)
+            order: rank 按相关度 (bm25)，time 按生成时间倒序
+
+        Returns:
+            报告摘要列表 (不含完整正文)，附 snippet 和 rank
+
+        Raises:
+            ValueError: 时间范围无法解析
+        """
+        terms = self._search_terms(query)
+        if not terms:
+            return []
+        columns = "r.id, r.date_key, r.created_at, r.post_count, r.time_range_start, r.time_range_end, r.source"
+        conditions = []
+        filters: List[Any] = []
+        # created_at 为本地时间字符串，统一格式后按字符串比较
+        if start_time:
+            conditions.append("r.created_at >= ?")
+            filters.append(
+                datetime.fromtimestamp(self._search_time_bound(start_time, "start_time")).strftime("%Y-%m-%d %H:%M:%S")
+            )
+        if end_time:
+            conditions.append("r.created_at <= ?")
+            filters.append(
+                datetime.fromtimestamp(self._search_time_bound(end_time, "end_time")).strftime("%Y-%m-%d %H:%M:%S")
+            )
+
+        if self._use_fts(terms):
+            mark_open, mark_close = SEARCH_CONFIG.get("highlight", ("[", "]"))
+            where = " AND ".join(["reports_fts MATCH ?"] + conditions)
+            query_sql = f"""
+                SELECT {columns},
+                       snippet(reports_fts, 0, ?, ?, '…', ?) AS snippet, bm25(reports_fts) AS rank
+                FROM reports_fts JOIN analysis_reports r ON r.id = reports_fts.rowid
+                WHERE {where}
+                ORDER BY {"rank" if order == "rank" else "r.created_at DESC, r.id DESC"}
+                LIMIT ? OFFSET ?
+            """
+            params = [mark_open, mark_close, SEARCH_CONFIG.get("snippet_tokens", 24), self._fts_query(terms)]
+        else:
+            for term in terms:
+                conditions.append("r.report_content LIKE ? ESCAPE '\\'")
+                filters.append(self._like_pattern(term))
+            where = " WHERE " + " AND ".join(conditions)
+            query_sql = f"""
+                SELECT {columns}, substr(r.report_content, 1, ?) AS snippet, NULL AS rank
+                FROM analysis_reports r{where}
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT ? OFFSET ?
+            """
+            params = [SEARCH_CONFIG.get("snippet_tokens", 24) * 2]
+        params.extend(filters)
+        params.extend([limit, offset])
+
+        with self._get_connection() as conn:
+            return [dict(row) for row in conn.execute(query_sql, params)]
+
+    def get_llm_cache(self, cache_key: str, ttl_seconds: float = None) -> Optional[str]:
+        """读取LLM响应缓存，命中时刷新访问时间；过期条目直接删除"""
+        now = time.time()
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+            if ttl_seconds and now - row["created_at"] > ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (cache_key,))
+                return None
+            conn.execute("""
+                UPDATE llm_cache SET last_access = ?, hit_count = hit_count + 1
+                WHERE cache_key = ?
+            """, (now, cache_key))
+            return row["response"]
+
+    def put_llm_cache(
+        self,
+        cache_key: str,
+        model: str,
+        response: str,
+        ttl_seconds: float = None,
+        max_entries: int = None,
+        max_bytes: int = None
+    ):
+        """写入LLM响应缓存，并按 TTL / 条数 / 总大小淘汰 (最近最少访问优先)"""
+        now = time.time()
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO llm_cache
+                (cache_key, model, response, size, created_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+            """, (cache_key, model, response, len(response.encode("utf-8")), now, now))
+
+            if ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - ttl_seconds,))
+
+            count, total_size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            excess_entries = count - max_entries if max_entries else 0
+            excess_bytes = total_size - max_bytes if max_bytes else 0
+            if excess_entries <= 0 and excess_bytes <= 0:
+                return
+
+            evict_keys = []
+            rows = conn.execute(
+                "SELECT cache_key, size FROM llm_cache WHERE cache_key != ? ORDER BY last_access",
+                (cache_key,)
+            ).fetchall()
+            for key, size in rows:
+                if excess_entries <= 0 and excess_bytes <= 0:
+                    break
+                evict_keys.append((key,))
+                excess_entries -= 1
+                excess_bytes -= size
+            conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", evict_keys)
+            logger.debug(f"LLM缓存淘汰 {len(evict_keys)} 条")
+
+    def count_posts(self) -> int:
+        """帖子总数"""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def iter_post_ids(self, batch_size: int = 5000):
+        """逐批读取全部帖子ID (只扫描主键索引)"""
+        last_id = ""
+        while True:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT mblog_id FROM posts WHERE mblog_id > ? ORDER BY mblog_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0]
+            last_id = rows[-1][0]
+
+    def existing_post_ids(self, mblog_ids: List[str]) -> set:
+        """返回其中已入库的帖子ID"""
+        if not mblog_ids:
+            return set()
+        with self._get_connection() as conn:
+            return set(self._existing_posts(conn, list(mblog_ids)))
+
+    def get_crawl_state(self, source: str, group_name: str) -> Optional[Dict]:
+        """读取 数据源/分组 的采集高水位"""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM crawl_state WHERE source = ? AND group_name = ?",
+                (source, group_name)
+            ).fetchone()
+            return dict(row) if row else None
+
+    def update_crawl_state(
+        self,
+        source: str,
+        group_name: str,
+        newest_mblog_id: Optional[str],
+        newest_publish_time: Optional[str],
+        run_posts: int = 0
+    ):
+        """
+        更新采集高水位
+
+        高水位只前进不后退: 本次最新帖子不比已记录的新时只更新运行时间和数量。
+        """
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT INTO crawl_state (
+                    source, group_name, newest_mblog_id, newest_publish_time,
+                    last_run_at, last_run_posts
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source, group_name) DO UPDATE SET
+                    newest_mblog_id = CASE
+                        WHEN crawl_state.newest_publish_time IS NULL
+                             OR excluded.newest_publish_time > crawl_state.newest_publish_time
+                        THEN excluded.newest_mblog_id ELSE crawl_state.newest_mblog_id END,
+                    newest_publish_time = CASE
+                        WHEN crawl_state.newest_publish_time IS NULL
+                             OR excluded.newest_publish_time > crawl_state.newest_publish_time
+                        THEN excluded.newest_publish_time ELSE crawl_state.newest_publish_time END,
+                    last_run_at = excluded.last_run_at,
+                    last_run_posts = excluded.last_run_posts
+            """, (
+                source, group_name, newest_mblog_id, newest_publish_time,
+                datetime.now().isoformat(), run_posts
+            ))
+
     def cleanup_old_data(self, days: int = 7):
         """清理旧数据"""
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
@@ -277,15 +1498,18 @@ class SQLiteManager:
         with self._get_connection() as conn:
             conn.execute("DELETE FROM posts WHERE date_key < ?", (cutoff_date,))
             conn.execute("DELETE FROM raw_api_responses WHERE date_key < ?", (cutoff_date,))
+            conn.execute("DELETE FROM raw_statuses WHERE last_seen < ?", (cutoff_date,))
             logger.info(f"已清理 {cutoff_date} 之前的数据")
 
 
 class StorageManager:
     """存储管理器 - 支持JSON和SQLite双模式"""
 
-    def __init__(self, use_sqlite: bool = True):
-        self.sqlite = SQLiteManager() if use_sqlite else None
+    def __init__(self, use_sqlite: bool = True, keyword_matcher=None):
+        self.sqlite = SQLiteManager(keyword_matcher=keyword_matcher) if use_sqlite else None
         self.checkpoints_dir = CHECKPOINTS_DIR
+        # 报告读取缓存，本实例写入报告时立即失效，其他进程写入时按报告表版本失效
+        self.report_cache = ReportCache(version_source=self.sqlite.get_reports_version if self.sqlite else None)
 
     def _ensure_dirs(self):
         """确保必要的目录存在"""
@@ -333,6 +1557,56 @@ class StorageManager:
                 logger.error(f"读取断点失败: {e}")
         return None
 
+    def count_posts(self) -> int:
+        """帖子总数"""
+        if self.sqlite:
+            return self.sqlite.count_posts()
+        return 0
+
+    def iter_post_ids(self):
+        """逐批读取全部帖子ID"""
+        if self.sqlite:
+            yield from self.sqlite.iter_post_ids()
+
+    def existing_post_ids(self, mblog_ids: List[str]) -> set:
+        """返回其中已入库的帖子ID"""
+        if self.sqlite:
+            return self.sqlite.existing_post_ids(mblog_ids)
+        return set()
+
+    def get_crawl_state(self, source: str, group_name: str) -> Optional[Dict]:
+        """读取 数据源/分组 的采集高水位"""
+        if self.sqlite:
+            return self.sqlite.get_crawl_state(source, group_name)
+        return None
+
+    def update_crawl_state(self, source: str, group_name: str, posts: List[Dict], advance: bool = True):
+        """
+        用本次采集到的帖子推进 数据源/分组 的高水位
+
+        Args:
+            advance: 本次是否完整采集到了上次的高水位；未完整采集 (中断/超时) 时
+                只记录运行信息，不推进高水位，避免下次跳过中间缺失的帖子
+        """
+        if not self.sqlite:
+            return
+        newest = None
+        if advance:
+            newest = max(
+                (p for p in posts if p.get("publish_time")),
+                key=lambda p: p["publish_time"],
+                default=None
+            )
+        self.sqlite.update_crawl_state(
+            source,
+            group_name,
+            newest.get("mblog_id") if newest else None,
+            newest.get("publish_time") if newest else None,
+            run_posts=len(posts)
+        )
+        if newest:
+            logger.info(f"采集高水位 [{source}/{group_name}]: {newest.get('mblog_id')} @ {newest['publish_time']}")
+
     def save_posts(
         self, 
         posts: List[Dict], 
@@ -350,13 +1624,27 @@ class StorageManager:
         if not date_key:
             date_key = datetime.now().strftime("%Y-%m-%d")
         
-        count = 0
-        if self.sqlite:
-            count = self.sqlite.save_posts(posts, date_key)
+        stats = self.bulk_save_posts(posts, date_key=date_key)
         
         self.save_raw_data_json(posts, date_key=date_key)
         
-        return count
+        return stats["inserted"] + stats["updated"]
+
+    def bulk_save_posts(
+        self,
+        posts: List[Dict],
+        date_key: str = None,
+        chunk_size: int = None
+    ) -> Dict[str, int]:
+        """
+        批量保存帖子
+
+        Returns:
+            {'inserted': 新增数, 'updated': 更新数, 'skipped': 跳过数, 'failed': 失败数}
+        """
+        if self.sqlite:
+            return self.sqlite.bulk_save_posts(posts, date_key, chunk_size)
+        return {"inserted": 0, "updated": 0, "skipped": len(posts), "failed": 0}
 
     def save_api_response_batch(
         self, 
@@ -371,16 +1659,48 @@ class StorageManager:
         
         self.save_raw_api_response(url, response_data, sequence, date_key)
 
+    def save_raw_api_responses(self, responses: List[tuple]) -> int:
+        """批量保存原始API响应: [(url, response_data, date_key), ...]"""
+        if self.sqlite:
+            return self.sqlite.save_raw_api_responses(responses)
+        return 0
+
+    def get_raw_api_response(self, response_id: int) -> Optional[Dict]:
+        """按ID读取并重建原始API响应"""
+        if self.sqlite:
+            return self.sqlite.get_raw_api_response(response_id)
+        return None
+
+    def iter_raw_api_responses(
+        self,
+        date_key: str = None,
+        start_time: str = None,
+        end_time: str = None
+    ):
+        """逐条读取并重建原始API响应"""
+        if self.sqlite:
+            yield from self.sqlite.iter_raw_api_responses(date_key, start_time, end_time)
+
+    @contextmanager
+    def transaction(self):
+        """在同一事务中执行多次写入 (用于组提交)"""
+        if self.sqlite:
+            with self.sqlite._get_connection() as conn:
+                yield conn
+        else:
+            yield None
+
     def load_posts(
         self, 
         date_key: str = None,
         start_time: str = None,
         end_time: str = None
     ) -> List[Dict]:
-        """加载帖子数据"""
-        if not date_key:
-            date_key = datetime.now().strftime("%Y-%m-%d")
-        
+        """
+        加载帖子数据
+
+        只给出时间范围时按 publish_time 跨日查询，不再局限于当天的 date_key。
+        """
         if self.sqlite:
             return self.sqlite.get_posts_by_time_range(
                 start_time=start_time,
@@ -388,6 +1708,9 @@ class StorageManager:
                 date_key=date_key
             )
         
+        if not date_key:
+            date_key = datetime.now().strftime("%Y-%m-%d")
+        
         filepath = self.raw_dir / f"weibo_{date_key}.json"
         if filepath.exists():
             with open(filepath, 'r', encoding='utf-8') as f:
@@ -395,6 +1718,39 @@ class StorageManager:
         
         return []
 
+    def iter_posts(
+        self,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = 'weibo',
+        page_size: int = 500,
+        relevant_only: bool = False
+    ):
+        """按时间范围流式读取帖子 (跨日，键集分页)，relevant_only 时只读取命中关键词的帖子"""
+        if self.sqlite:
+            yield from self.sqlite.iter_posts_by_time_range(start_time, end_time, source, page_size, relevant_only)
+
+    def count_posts_in_range(self, start_time: str = None, end_time: str = None, source: str = 'weibo') -> int:
+        """时间范围内的帖子数"""
+        if self.sqlite:
+            return self.sqlite.count_posts_in_range(start_time, end_time, source)
+        return 0
+
+    def retag_posts(self, start_time: str = None, end_time: str = None, source: str = None) -> int:
+        """关键词配置变化后增量重新打标，返回处理的帖子数"""
+        if self.sqlite:
+            return self.sqlite.retag_posts(start_time=start_time, end_time=end_time, source=source)
+        return 0
+
+    def backfill_report_renderings(self, render_html, render_feishu) -> int:
+        """为旧报告补齐预渲染的 HTML 和飞书文本，返回补齐的报告数"""
+        if self.sqlite:
+            updated = self.sqlite.backfill_report_renderings(render_html, render_feishu)
+            if updated:
+                self.report_cache.invalidate()
+            return updated
+        return 0
+
     def save_analysis_report(
         self, 
         report_content: str, 
@@ -402,28 +1758,105 @@ class StorageManager:
         date_key: str = None,
         time_range_start: str = None,
         time_range_end: str = None,
-        source: str = 'weibo'
+        source: str = 'weibo',
+        run_metrics: Dict = None,
+        report_html: str = None,
+        report_feishu: str = None
     ) -> int:
-        """保存AI分析报告"""
+        """保存AI分析报告 (report_html / report_feishu 为预渲染结果)"""
         if self.sqlite:
-            return self.sqlite.save_analysis_report(
-                report_content, post_count, date_key, 
-                time_range_start, time_range_end, source
-            )
+            try:
+                return self.sqlite.save_analysis_report(
+                    report_content, post_count, date_key, 
+                    time_range_start, time_range_end, source, run_metrics,
+                    report_html, report_feishu
+                )
+            finally:
+                self.report_cache.invalidate()
         return 0
 
+    def update_report_run_metrics(self, report_id: int, run_metrics: Dict):
+        """更新报告的运行指标"""
+        if self.sqlite and report_id:
+            try:
+                self.sqlite.update_report_run_metrics(report_id, run_metrics)
+            finally:
+                self.report_cache.invalidate()
+
+    def get_latest_run_metrics(self) -> Optional[Dict]:
+        """最近一次运行的指标快照"""
+        if self.sqlite:
+            return self.sqlite.get_latest_run_metrics()
+        return None
+
     def get_analysis_reports(self, date_key: str = None, limit: int = 10) -> List[Dict]:
         """获取AI分析报告"""
         if self.sqlite:
             return self.sqlite.get_analysis_reports(date_key, limit)
         return []
 
+    def get_report_summaries_page(
+        self,
+        date_key: str = None,
+        limit: int = 20,
+        after: tuple = None
+    ) -> tuple:
+        """报告摘要键集分页 (created_at, id 倒序)，返回 (summaries, next_cursor)"""
+        if self.sqlite:
+            return self.sqlite.get_report_summaries_page(date_key, limit, after)
+        return [], None
+
     def get_analysis_report_by_id(self, report_id: int) -> Optional[Dict]:
         """根据ID获取分析报告"""
         if self.sqlite:
             return self.sqlite.get_analysis_report_by_id(report_id)
         return None
 
+    def search_posts(
+        self,
+        query: str,
+        start_time: str = None,
+        end_time: str = None,
+        source: str = 'weibo',
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank"
+    ) -> List[Dict]:
+        """全文检索帖子 (FTS5)，order: rank 相关度 / time 时间倒序"""
+        if self.sqlite:
+            return self.sqlite.search_posts(query, start_time, end_time, source, limit, offset, order)
+        return []
+
+    def search_reports(
+        self,
+        query: str,
+        start_time: str = None,
+        end_time: str = None,
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank"
+    ) -> List[Dict]:
+        """全文检索分析报告 (FTS5)，order: rank 相关度 / time 时间倒序"""
+        if self.sqlite:
+            return self.sqlite.search_reports(query, start_time, end_time, limit, offset, order)
+        return []
+
+    def get_llm_cache(self, cache_key: str, ttl_seconds: float = None) -> Optional[str]:
+        """读取LLM响应缓存"""
+        if self.sqlite:
+            return self.sqlite.get_llm_cache(cache_key, ttl_seconds)
+        return None
+
+    def put_llm_cache(self, cache_key: str, model: str, response: str, **limits):
+        """写入LLM响应缓存 (limits: ttl_seconds / max_entries / max_bytes)"""
+        if self.sqlite:
+            self.sqlite.put_llm_cache(cache_key, model, response, **limits)
+
+    def close(self):
+        """释放数据库连接"""
+        if self.sqlite:
+            self.sqlite.close()
+
     def cleanup_old_data(self, days: int = 7):
         """清理旧数据"""
         if self.sqlite:
@@ -437,6 +1870,6 @@ class StorageManager:
                 logger.info(f"已清理目录: {date_dir}")
 
 
-def create_storage_manager(use_sqlite: bool = True) -> StorageManager:
-    """工厂函数"""
-    return StorageManager(use_sqlite=use_sqlite)
+def create_storage_manager(use_sqlite: bool = True, keyword_matcher=None) -> StorageManager:
+    """工厂函数，keyword_matcher 为入库打标用的关键词匹配器 (写入帖子的进程传入)"""
+    return StorageManager(use_sqlite=use_sqlite, keyword_matcher=keyword_matcher)
@@ -0,0 +1,305 @@
+"""
+异步写入器 - 采集循环只负责入队，由后台线程合并后组提交到数据库
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config.settings import WRITE_BEHIND_CONFIG
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+_KIND_RAW = "raw"
+_KIND_POSTS = "posts"
+_KIND_FLUSH = "flush"
+_KIND_STOP = "stop"
+
+
+class WriteBehindError(Exception):
+    """异步写入有任务在重试后仍然失败"""
+
+    def __init__(self, failures: List[Dict[str, Any]]):
+        self.failures = failures
+        lost_posts = sum(f["items"] for f in failures if f["kind"] == _KIND_POSTS)
+        lost_raw = sum(f["items"] for f in failures if f["kind"] == _KIND_RAW)
+        super().__init__(
+            f"{len(failures)} 个写入任务失败 (帖子 {lost_posts} 条, 原始响应 {lost_raw} 条): {failures[0]['error']}"
+        )
+
+
+class AsyncStorageWriter:
+    """
+    后台写入线程
+
+    - 原始API响应和帖子批次先进入有界队列，采集线程不直接访问磁盘
+    - 后台线程每次取出多条任务，在同一事务中写入 (组提交)；组提交失败时逐个任务单独重试，
+      只有重试仍失败的任务才记为失败
+    - 队列满时入队最多阻塞 enqueue_timeout 秒；仍无法入队时改为同步写入
+    - 写入失败记录在 failures() 中，close() 默认以 WriteBehindError 抛出，调用方据此判断数据是否完整入库
+    """
+
+    def __init__(
+        self,
+        storage,
+        max_queue_size: int = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        enqueue_timeout: float = None
+    ):
+        self.storage = storage
+        self.max_queue_size = max_queue_size or WRITE_BEHIND_CONFIG.get("max_queue_size", 256)
+        self.batch_size = batch_size or WRITE_BEHIND_CONFIG.get("batch_size", 64)
+        self.flush_interval = flush_interval or WRITE_BEHIND_CONFIG.get("flush_interval", 0.5)
+        self.enqueue_timeout = (
+            enqueue_timeout if enqueue_timeout is not None
+            else WRITE_BEHIND_CONFIG.get("enqueue_timeout", 2.0)
+        )
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._metrics_lock = threading.Lock()
+        self._failures: List[Dict[str, Any]] = []
+        self._metrics = {
+            "enqueued_raw": 0,
+            "enqueued_posts": 0,
+            "written_raw": 0,
+            "written_posts": 0,
+            "group_commits": 0,
+            "write_errors": 0,
+            "retried_tasks": 0,
+            "blocked_enqueues": 0,
+            "blocked_seconds": 0.0,
+            "sync_fallback_raw": 0,
+            "sync_fallback_posts": 0,
+            "max_queue_depth": 0,
+        }
+
+    def start(self) -> "AsyncStorageWriter":
+        """启动后台写入线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="AsyncStorageWriter", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # 已有异常时不再用写入失败覆盖它
+        self.close(raise_on_error=exc_type is None)
+
+    # ---------- 生产者接口 ----------
+
+    def submit_raw_response(self, url: str, response_data: Any, date_key: str = None) -> bool:
+        """原始API响应入队，队列持续满时退化为同步写入；返回是否成功入队"""
+        item = (url, response_data, date_key)
+        if self._put((_KIND_RAW, item)):
+            self._incr("enqueued_raw")
+            return True
+        self._incr("sync_fallback_raw")
+        logger.warning(f"写入队列已满，同步写入原始API响应: {url}")
+        self._write_raw([item])
+        return False
+
+    def submit_posts(self, posts: List[Dict], date_key: str = None) -> bool:
+        """帖子批次入队，队列持续满时退化为同步写入；返回是否成功入队"""
+        if not posts:
+            return True
+        if self._put((_KIND_POSTS, (list(posts), date_key))):
+            self._incr("enqueued_posts", len(posts))
+            return True
+        self._incr("sync_fallback_posts", len(posts))
+        logger.warning(f"写入队列已满，同步写入 {len(posts)} 条帖子")
+        self._write_posts(posts, date_key)
+        return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """阻塞直到此前入队的任务全部写入"""
+        if not self._thread or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((_KIND_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None, raise_on_error: bool = True):
+        """
+        写完剩余任务并停止后台线程
+
+        Args:
+            raise_on_error: 有任务重试后仍写入失败时抛出 WriteBehindError
+        """
+        if self._thread:
+            if self._thread.is_alive():
+                self._queue.put((_KIND_STOP, None))
+                self._thread.join(timeout)
+            self._thread = None
+            metrics = self.metrics()
+            logger.info(
+                f"写入线程已停止: 原始响应 {metrics['written_raw']}, 帖子 {metrics['written_posts']}, "
+                f"组提交 {metrics['group_commits']} 次, 背压阻塞 {metrics['blocked_enqueues']} 次"
+                f"({metrics['blocked_seconds']:.2f}s), 同步写入 响应 {metrics['sync_fallback_raw']} / "
+                f"帖子 {metrics['sync_fallback_posts']}, 失败任务 {metrics['write_errors']}"
+            )
+        failures = self.failures()
+        if failures and raise_on_error:
+            raise WriteBehindError(failures)
+
+    def failures(self) -> List[Dict[str, Any]]:
+        """重试后仍写入失败的任务: [{'kind', 'items', 'date_key', 'error'}, ...]"""
+        with self._metrics_lock:
+            return list(self._failures)
+
+    def metrics(self) -> Dict[str, Any]:
+        """返回写入/背压指标快照"""
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["queue_depth"] = self._queue.qsize()
+        return snapshot
+
+    # ---------- 内部实现 ----------
+
+    def _incr(self, name: str, value=1):
+        with self._metrics_lock:
+            self._metrics[name] += value
+
+    def _put(self, item) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            try:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+                return True
+            except queue.Full:
+                return False
+            finally:
+                with self._metrics_lock:
+                    self._metrics["blocked_enqueues"] += 1
+                    self._metrics["blocked_seconds"] += time.perf_counter() - started
+        finally:
+            depth = self._queue.qsize()
+            with self._metrics_lock:
+                if depth > self._metrics["max_queue_depth"]:
+                    self._metrics["max_queue_depth"] = depth
+        return True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            raw_items = []
+            post_batches = []
+            waiters = []
+            for kind, payload in batch:
+                if kind == _KIND_RAW:
+                    raw_items.append(payload)
+                elif kind == _KIND_POSTS:
+                    post_batches.append(payload)
+                elif kind == _KIND_FLUSH:
+                    waiters.append(payload)
+                elif kind == _KIND_STOP:
+                    stopping = True
+
+            self._commit(raw_items, post_batches)
+            for done in waiters:
+                done.set()
+
+            # 停止前写完队列中剩余的任务
+            if stopping:
+                self._drain_remaining()
+
+    def _drain_remaining(self):
+        raw_items = []
+        post_batches = []
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == _KIND_RAW:
+                raw_items.append(payload)
+            elif kind == _KIND_POSTS:
+                post_batches.append(payload)
+            elif kind == _KIND_FLUSH:
+                payload.set()
+        self._commit(raw_items, post_batches)
+
+    def _record_failure(self, kind: str, items: int, date_key: Optional[str], error: str):
+        with self._metrics_lock:
+            self._metrics["write_errors"] += 1
+            self._failures.append({"kind": kind, "items": items, "date_key": date_key, "error": error})
+        logger.error(f"写入失败 ({'帖子' if kind == _KIND_POSTS else '原始响应'} {items} 条): {error}")
+
+    def _write_raw(self, raw_items: List[tuple]):
+        """单独写入一批原始响应 (独立事务)，失败时记录"""
+        try:
+            self.storage.save_raw_api_responses(raw_items)
+        except Exception as e:
+            self._record_failure(_KIND_RAW, len(raw_items), raw_items[0][2], str(e))
+            return
+        self._incr("written_raw", len(raw_items))
+
+    def _write_posts(self, posts: List[Dict], date_key: Optional[str]):
+        """单独写入一批帖子 (独立事务，bulk_save_posts 内部会逐行重试失败的分块)，失败时记录"""
+        try:
+            stats = self.storage.bulk_save_posts(posts, date_key=date_key) or {}
+        except Exception as e:
+            self._record_failure(_KIND_POSTS, len(posts), date_key, str(e))
+            return
+        failed = stats.get("failed", 0)
+        if failed:
+            self._record_failure(_KIND_POSTS, failed, date_key, f"{failed} 条帖子逐行写入失败")
+        self._incr("written_posts", len(posts) - failed)
+
+    def _commit(self, raw_items: List[tuple], post_batches: List[tuple]):
+        """在同一事务中写入一组任务，失败时回滚并逐个任务单独重试"""
+        if not raw_items and not post_batches:
+            return
+
+        # 同一 date_key 的帖子合并为一次批量写入
+        posts_by_date: Dict[Optional[str], List[Dict]] = {}
+        for posts, date_key in post_batches:
+            posts_by_date.setdefault(date_key, []).extend(posts)
+
+        row_failures = {}
+        try:
+            with get_metrics().timer("write_behind_commit_seconds"), self.storage.transaction():
+                if raw_items:
+                    self.storage.save_raw_api_responses(raw_items)
+                for date_key, posts in posts_by_date.items():
+                    stats = self.storage.bulk_save_posts(posts, date_key=date_key) or {}
+                    if stats.get("failed"):
+                        row_failures[date_key] = stats["failed"]
+        except Exception as e:
+            logger.warning(
+                f"组提交失败 (响应 {len(raw_items)} 条, 帖子批次 {len(post_batches)} 个)，逐个任务重试: {e}"
+            )
+            self._incr("retried_tasks", len(raw_items) + len(post_batches))
+            for item in raw_items:
+                self._write_raw([item])
+            for posts, date_key in post_batches:
+                self._write_posts(posts, date_key)
+            return
+
+        for date_key, failed in row_failures.items():
+            self._record_failure(_KIND_POSTS, failed, date_key, f"{failed} 条帖子逐行写入失败")
+        with self._metrics_lock:
+            self._metrics["group_commits"] += 1
+            self._metrics["written_raw"] += len(raw_items)
+            self._metrics["written_posts"] += sum(len(p) for p in posts_by_date.values()) - sum(row_failures.values())
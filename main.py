@@ -2,6 +2,8 @@
 AI热点监控系统 - 主程序入口
 """
 import argparse
+import itertools
+import json
 import logging
 import sys
 import os
@@ -11,8 +13,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from crawlers.weibo_crawler import WeiboCrawler
 from data_manager.storage import create_storage_manager
 from analyzer.content_analyzer import ContentAnalyzer
+from analyzer.keyword_matcher import get_keyword_matcher
 from utils.logger_config import setup_logging
+from utils.metrics import get_metrics, summary_lines
 from utils.notifier import send_feishu_notification
+from utils.report_renderer import HTML_RENDERING_AVAILABLE, render_feishu, render_html
 
 setup_logging(logging.INFO)
 logger = logging.getLogger("Main")
@@ -26,6 +31,91 @@ def handle_error(error_msg: str):
         data={}
     )
 
+def use_orchestrator(args) -> bool:
+    """指定了多个分组/账号时使用并行采集"""
+    from config.settings import CRAWL_ORCHESTRATOR_CONFIG
+    groups = args.groups or CRAWL_ORCHESTRATOR_CONFIG["groups"]
+    accounts = args.accounts or CRAWL_ORCHESTRATOR_CONFIG["accounts"]
+    return len(groups) > 1 or len(accounts) > 1 or bool(args.accounts)
+
+def crawl_with_orchestrator(args, fetch_kwargs: dict, storage):
+    """多分组/多账号并行采集"""
+    from crawlers.orchestrator import CrawlOrchestrator
+    accounts = None
+    if args.accounts:
+        accounts = {}
+        for item in args.accounts:
+            name, _, path = item.partition("=")
+            accounts[name] = path or None
+    
+    orchestrator = CrawlOrchestrator(
+        accounts=accounts,
+        groups=args.groups,
+        max_concurrency=args.max_concurrency,
+        headless=args.headless
+    )
+    try:
+        results = orchestrator.run(storage=storage, **fetch_kwargs)
+        total = sum(len(posts) for posts in results.values())
+        if total:
+            logger.info(f"抓取了 {total} 篇帖子 ({len(results)} 个任务)。")
+        else:
+            logger.warning("未找到帖子。")
+        if orchestrator.last_stats.get("failed"):
+            handle_error(f"部分采集任务失败: {orchestrator.last_stats['errors']}")
+    except Exception as e:
+        handle_error(f"抓取失败: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if args.close_browser:
+            orchestrator.close()
+        else:
+            logger.info("浏览器保持打开状态，请手动关闭或使用 --close-browser 参数")
+
+def log_run_metrics():
+    """打印本次运行各阶段的耗时分布"""
+    lines = summary_lines(get_metrics().snapshot())
+    if lines:
+        logger.info("运行指标:\n  " + "\n  ".join(lines))
+
+def run_replay(args, storage):
+    """离线回放: 原始响应 -> 解析 -> 入库 (-> 分析)"""
+    from datetime import datetime
+    from crawlers.replay import ReplayEngine
+    
+    date_key = args.replay_date
+    if not date_key and not (args.replay_start or args.replay_end):
+        date_key = datetime.now().strftime("%Y-%m-%d")
+    logger.info(f"开始离线回放: 日期 {date_key or '-'}，采集时间 {args.replay_start or '-'} ~ {args.replay_end or '-'}")
+    
+    engine = ReplayEngine(storage, dry_run=args.replay_dry_run)
+    if not args.analyze:
+        engine.run(date_key, args.replay_start, args.replay_end)
+        print(json.dumps(engine.last_stats, ensure_ascii=False, indent=2))
+        return
+    
+    posts = engine.iter_posts(date_key, args.replay_start, args.replay_end)
+    first_post = next(posts, None)
+    if first_post is None:
+        logger.error("没有可回放的数据。")
+        return
+    
+    time_range_start = args.replay_start or f"{date_key} 00:00:00"
+    time_range_end = args.replay_end or f"{date_key} 23:59:59"
+    analyzer = ContentAnalyzer()
+    report = analyzer.analyze_posts(
+        itertools.chain([first_post], posts),
+        storage=None if args.replay_dry_run else storage,
+        time_range_start=time_range_start,
+        time_range_end=time_range_end,
+        source='weibo'
+    )
+    print(json.dumps(engine.last_stats, ensure_ascii=False, indent=2))
+    print("\n" + "="*40)
+    print(report)
+    print("="*40 + "\n")
+
 def main():
     parser = argparse.ArgumentParser(description="微博 AI 热点智能体")
     parser.add_argument("--login", action="store_true", help="运行登录流程")
@@ -37,10 +127,29 @@ def main():
     parser.add_argument("--max-duration", type=int, default=None, help="最大采集时长(秒)")
     parser.add_argument("--strict-time", action="store_true", help="严格时间模式，仅根据时间判断停止，忽略checkpoint ID")
     parser.add_argument("--close-browser", action="store_true", help="完成后关闭浏览器")
+    parser.add_argument("--fetch-mode", choices=["browser", "http"], default=None,
+                        help="采集方式: browser 滚动页面 / http 复用 Cookie 直接分页请求接口 (默认读取配置)")
+    parser.add_argument("--groups", nargs="+", default=None, help="并行采集的关注分组名 (默认读取 WEIBO_GROUPS)")
+    parser.add_argument("--accounts", nargs="+", default=None, metavar="NAME=USER_DATA_PATH",
+                        help="并行采集的账号及其浏览器用户数据目录 (默认读取 WEIBO_ACCOUNTS)")
+    parser.add_argument("--full-refetch", action="store_true", help="忽略上次采集的高水位，重新采集整个回溯窗口")
+    parser.add_argument("--replay", action="store_true", help="离线回放已保存的原始API响应 (解析 -> 入库，配合 --analyze 继续分析)")
+    parser.add_argument("--replay-date", default=None, help="回放的日期 (YYYY-MM-DD)，默认当天")
+    parser.add_argument("--replay-start", default=None, help="回放的采集起始时间 (按 collected_at 过滤)")
+    parser.add_argument("--replay-end", default=None, help="回放的采集结束时间 (按 collected_at 过滤)")
+    parser.add_argument("--replay-dry-run", action="store_true", help="回放时只解析不写库 (吞吐基准)")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="并行采集任务数上限")
+    parser.add_argument("--retag", action="store_true",
+                        help="config/keywords.py 修改后为全部帖子增量重新打标 (只处理关键词版本不一致的帖子)")
     
     args = parser.parse_args()
+    # 指标按运行统计: 同一进程内多次调用 main() 时不累加上一次运行的计数
+    get_metrics().reset()
     
-    storage = create_storage_manager()
+    # 入库时按 config/keywords.py 打标；旧报告补齐预渲染内容 (已补齐时只有一次查询)
+    storage = create_storage_manager(keyword_matcher=get_keyword_matcher())
+    if HTML_RENDERING_AVAILABLE:
+        storage.backfill_report_renderings(render_html, render_feishu)
     
     if args.login:
         crawler = WeiboCrawler(headless=False)
@@ -50,33 +159,47 @@ def main():
             crawler.close()
             
     if args.crawl or args.all:
-        crawler = WeiboCrawler(headless=args.headless)
-        try:
-            crawler.login()
-            
-            posts = crawler.fetch_latest_posts(
-                lookback_hours=args.lookback_hours,
-                max_duration_seconds=args.max_duration,
-                strict_time_mode=args.strict_time
-            )
-            
-            if posts:
-                logger.info(f"抓取了 {len(posts)} 篇帖子。")
-                storage.save_posts(posts)
-            else:
-                logger.warning("未找到帖子。")
-        except Exception as e:
-            error_msg = f"抓取失败: {e}"
-            handle_error(error_msg)
-            import traceback
-            traceback.print_exc()
-        finally:
-            if args.close_browser:
-                crawler.close()
-            else:
-                logger.info("浏览器保持打开状态，请手动关闭或使用 --close-browser 参数")
+        fetch_kwargs = dict(
+            lookback_hours=args.lookback_hours,
+            max_duration_seconds=args.max_duration,
+            strict_time_mode=args.strict_time,
+            fetch_mode=args.fetch_mode,
+            full_refetch=args.full_refetch
+        )
+        
+        if use_orchestrator(args):
+            crawl_with_orchestrator(args, fetch_kwargs, storage)
+        else:
+            crawler = WeiboCrawler(headless=args.headless)
+            try:
+                crawler.login()
+                
+                posts = crawler.fetch_latest_posts(storage=storage, **fetch_kwargs)
+                
+                if posts:
+                    # 帖子已在采集过程中由后台写入线程保存
+                    logger.info(f"抓取了 {len(posts)} 篇帖子。")
+                else:
+                    logger.warning("未找到帖子。")
+            except Exception as e:
+                error_msg = f"抓取失败: {e}"
+                handle_error(error_msg)
+                import traceback
+                traceback.print_exc()
+            finally:
+                if args.close_browser:
+                    crawler.close()
+                else:
+                    logger.info("浏览器保持打开状态，请手动关闭或使用 --close-browser 参数")
             
-    if args.analyze or args.all:
+    if args.replay:
+        run_replay(args, storage)
+
+    if args.retag:
+        retagged = storage.retag_posts()
+        logger.info(f"关键词重新打标完成: {retagged} 条帖子")
+    
+    if (args.analyze or args.all) and not args.replay:
         # 计算时间范围
         from datetime import datetime, timedelta
         end_time = datetime.now()
@@ -86,41 +209,56 @@ def main():
         
         logger.info(f"加载分析数据，时间范围: {time_range_start} - {time_range_end}")
         
-        data = storage.load_posts(
-            start_time=time_range_start,
-            end_time=time_range_end
-        )
-        
-        if not data:
+        total_posts = storage.count_posts_in_range(time_range_start, time_range_end)
+        if total_posts == 0:
             logger.error("未找到可分析的数据。")
             return
+
+        # 关键词配置变化后，先为窗口内的帖子补齐打标，再直接在 SQL 中筛选命中关键词的帖子
+        storage.retag_posts(time_range_start, time_range_end, source='weibo')
+        # 流式读取 (跨日、分页)，长时间窗口也不会一次性载入内存
+        data = storage.iter_posts(
+            start_time=time_range_start,
+            end_time=time_range_end,
+            relevant_only=True
+        )
             
         analyzer = ContentAnalyzer()
         report = analyzer.analyze_posts(
-            data, 
+            data,
             storage=storage,
             time_range_start=time_range_start,
             time_range_end=time_range_end,
-            source='weibo'
+            source='weibo',
+            total_posts=total_posts
         )
         
         print("\n" + "="*40)
         print(report)
         print("="*40 + "\n")
         
-        # 发送飞书通知 (成功)
+        # 发送飞书通知 (成功)，优先使用保存报告时预渲染的飞书格式文本
+        saved = storage.get_analysis_report_by_id(analyzer.last_report_id) if analyzer.last_report_id else None
+        feishu_content = saved.get("report_feishu") if saved else None
         send_feishu_notification(
             success=True,
             message="AI热点监控完成",
             data={
-                "post_count": len(data),
+                "post_count": analyzer.last_stats["total_posts"],
                 "start_time": time_range_start,
                 "end_time": time_range_end,
-                "content": report
-            }
+                "content": feishu_content or report
+            },
+            preformatted=feishu_content is not None
         )
+        
+        # 通知完成后补写完整的运行指标 (含 Webhook 耗时)
+        storage.update_report_run_metrics(analyzer.last_report_id, get_metrics().snapshot())
+
+    if any([args.crawl, args.analyze, args.all, args.replay]):
+        log_run_metrics()
 
-    if not any([args.login, args.crawl, args.analyze, args.all]):
+    if not any([args.login, args.crawl, args.analyze, args.all, args.replay, args.retag]):
         parser.print_help()
 
 
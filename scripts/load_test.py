@@ -0,0 +1,138 @@
+"""
+Web 压测脚本 - 对本地运行的实例并发请求，统计每个接口的 请求/秒 和 p50/p95/p99 延迟
+
+用法:
+    python web/serve.py                           # 先启动服务
+    python scripts/load_test.py --concurrency 32 --duration 15
+    python scripts/load_test.py --etag            # 模拟轮询方携带 If-None-Match
+"""
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def discover_report_id(base_url: str) -> Optional[int]:
+    """取最新一份报告的ID，用于压测详情页"""
+    try:
+        response = requests.get(f"{base_url}/api/reports", params={"limit": 1}, timeout=10)
+        response.raise_for_status()
+        reports = response.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"获取报告列表失败: {e}")
+        return None
+    return reports[0]["id"] if reports else None
+
+
+def run_endpoint(base_url: str, path: str, concurrency: int, duration: float, use_etag: bool) -> Dict:
+    """在 duration 秒内用 concurrency 个线程循环请求同一路径"""
+    url = f"{base_url}{path}"
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        etag = None
+        local_latencies = []
+        local_statuses: Dict[int, int] = {}
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            headers = {"If-None-Match": etag} if use_etag and etag else {}
+            started = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=30)
+                response.content
+            except requests.RequestException:
+                local_errors += 1
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[response.status_code] = local_statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                local_errors += 1
+            etag = response.headers.get("ETag", etag)
+        session.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            errors += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PulseAI Web 压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发线程数")
+    parser.add_argument("--duration", type=float, default=10, help="每个接口的压测时长(秒)")
+    parser.add_argument("--etag", action="store_true", help="携带上次响应的 ETag (模拟轮询，预期大部分为 304)")
+    parser.add_argument("--output", help="结果保存为 JSON 文件")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    paths = ["/", "/api/reports"]
+    report_id = discover_report_id(base_url)
+    if report_id is not None:
+        paths.insert(1, f"/report/{report_id}")
+    else:
+        print("没有报告，跳过 /report/<id>")
+
+    results = []
+    print(f"压测 {base_url}: 并发 {args.concurrency}，每个接口 {args.duration:.0f}s")
+    print(f"{'路径':<20}{'请求/秒':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'错误':>8}")
+    for path in paths:
+        result = run_endpoint(base_url, path, args.concurrency, args.duration, args.etag)
+        results.append(result)
+        print(
+            f"{path:<20}{result['requests_per_sec']:>12,.1f}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}"
+        )
+
+    if args.output:
+        report = {
+            "base_url": base_url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "etag": args.etag,
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 """
-数据库迁移脚本 - 添加时间段和数据源字段
+数据库迁移脚本 - 添加时间段和数据源字段、转换原始API响应存储格式
 """
+import json
 import sqlite3
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent.parent))
+
 def migrate_database():
     """迁移数据库，添加新字段"""
     db_path = Path(__file__).parent.parent / "data" / "weibo_data.db"
@@ -63,5 +67,76 @@ def migrate_database():
     finally:
         conn.close()
 
+def migrate_raw_api_responses(batch_size: int = 200):
+    """将旧格式(整段 JSON 文本)的原始API响应转换为去重压缩格式"""
+    db_path = Path(__file__).parent.parent / "data" / "weibo_data.db"
+    
+    if not db_path.exists():
+        print(f"数据库不存在: {db_path}")
+        return
+    
+    from data_manager.storage import SQLiteManager
+    
+    # 初始化时会补齐 raw_statuses 表和新增字段
+    manager = SQLiteManager(str(db_path))
+    print(f"开始转换原始API响应: {db_path}")
+    
+    converted = 0
+    failed = 0
+    last_id = 0
+    try:
+        while True:
+            with manager._get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT id, response_data, date_key FROM raw_api_responses
+                    WHERE id > ? AND (storage_format IS NULL OR storage_format = 'json')
+                    ORDER BY id LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                
+                for row in rows:
+                    last_id = row["id"]
+                    try:
+                        response_data = json.loads(row["response_data"]) if row["response_data"] else None
+                    except (TypeError, ValueError) as e:
+                        print(f"跳过无法解析的响应 {row['id']}: {e}")
+                        failed += 1
+                        continue
+                    
+                    codec, envelope, status_refs = manager._store_raw_response(
+                        conn, response_data, row["date_key"]
+                    )
+                    conn.execute("""
+                        UPDATE raw_api_responses
+                        SET storage_format = 'dedup', codec = ?, envelope = ?,
+                            status_refs = ?, response_data = NULL
+                        WHERE id = ?
+                    """, (codec, envelope, status_refs, row["id"]))
+                    converted += 1
+            print(f"已转换 {converted} 条...")
+        
+        with manager._get_connection() as conn:
+            status_count = conn.execute("SELECT COUNT(*) FROM raw_statuses").fetchone()[0]
+        print(f"\n✅ 原始API响应转换完成: {converted} 条, 失败 {failed} 条, 去重后 status {status_count} 条")
+        
+        # 释放旧 JSON 文本占用的空间
+        if converted:
+            print("正在执行 VACUUM 回收空间...")
+            manager.close()
+            conn = sqlite3.connect(db_path)
+            conn.execute("VACUUM")
+            conn.close()
+            print("✓ VACUUM 完成")
+            # VACUUM 可能改变 posts 的 rowid，全文索引需要重建
+            manager = SQLiteManager(str(db_path))
+            manager.rebuild_search_index()
+            print("✓ 全文索引重建完成")
+    except Exception as e:
+        print(f"\n❌ 转换失败: {e}")
+    finally:
+        manager.close()
+
 if __name__ == "__main__":
     migrate_database()
+    migrate_raw_api_responses()
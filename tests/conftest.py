@@ -0,0 +1,19 @@
+"""
+测试公共配置 - 项目根目录加入 sys.path，提供临时 SQLite 数据库
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager.storage import SQLiteManager
+
+
+@pytest.fixture
+def sqlite_manager(tmp_path):
+    """临时目录中的 SQLiteManager (db_name 为绝对路径时不使用 DATA_DIR)"""
+    manager = SQLiteManager(str(tmp_path / "test.db"))
+    yield manager
+    manager.close()
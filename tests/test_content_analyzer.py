@@ -0,0 +1,86 @@
+"""
+分块分析 (map) + 分层合并 (reduce)
+"""
+import re
+import threading
+
+import pytest
+
+from analyzer import content_analyzer
+from analyzer.content_analyzer import ContentAnalyzer
+
+_TOPIC_RE = re.compile(r"TOPIC-\d+")
+_PADDING = "x" * 40
+
+
+def _report(prompt):
+    """报告为提示词中全部话题标记加上固定长度的正文"""
+    return " ".join(sorted(set(_TOPIC_RE.findall(prompt)))) + " " + _PADDING
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    # 每组最多容纳两份分块报告，8 个分块需要多轮合并
+    monkeypatch.setitem(content_analyzer.ANALYSIS_CONFIG, "reduce_token_budget", 30)
+    monkeypatch.setitem(content_analyzer.ANALYSIS_CONFIG, "max_parallel", 2)
+    return ContentAnalyzer()
+
+
+def _fake_llm(fail_first_reduce_with=None):
+    """map 返回分块的话题标记，reduce 返回输入报告中全部话题标记的合并"""
+    lock = threading.Lock()
+    state = {"failed": False, "reduce_calls": 0}
+
+    def call_llm(prompt):
+        if "===== 分块报告" not in prompt:
+            return _report(prompt)
+        with lock:
+            state["reduce_calls"] += 1
+            should_fail = (
+                fail_first_reduce_with and not state["failed"] and fail_first_reduce_with in prompt
+            )
+            if should_fail:
+                state["failed"] = True
+        if should_fail:
+            raise RuntimeError("reduce failed")
+        return _report(prompt)
+
+    return call_llm, state
+
+
+def _topics(report):
+    return set(_TOPIC_RE.findall(report))
+
+
+def test_map_reduce_merges_all_chunks(analyzer):
+    analyzer._call_llm, _ = _fake_llm()
+    chunks = [f"@a | t | u | TOPIC-{i}" for i in range(8)]
+
+    report = analyzer._map_reduce(iter(chunks))
+
+    assert _topics(report) == {f"TOPIC-{i}" for i in range(8)}
+
+
+def test_failed_reduce_group_keeps_its_reports(analyzer):
+    analyzer._call_llm, state = _fake_llm(fail_first_reduce_with="TOPIC-2")
+    chunks = [f"@a | t | u | TOPIC-{i}" for i in range(8)]
+
+    report = analyzer._map_reduce(iter(chunks))
+
+    assert state["failed"]
+    assert state["reduce_calls"] > 4
+    assert _topics(report) == {f"TOPIC-{i}" for i in range(8)}
+
+
+def test_all_reduce_calls_failing_falls_back_to_concatenation(analyzer):
+    def call_llm(prompt):
+        if "===== 分块报告" in prompt:
+            raise RuntimeError("reduce failed")
+        return _report(prompt)
+
+    analyzer._call_llm = call_llm
+    chunks = [f"@a | t | u | TOPIC-{i}" for i in range(5)]
+
+    report = analyzer._map_reduce(iter(chunks))
+
+    assert _topics(report) == {f"TOPIC-{i}" for i in range(5)}
@@ -0,0 +1,86 @@
+"""
+HTTP 客户端熔断器 - 半开状态只放行一个探测请求
+"""
+import threading
+import time
+
+import pytest
+import requests
+
+from utils.http_client import CircuitOpenError, HttpClient
+
+
+def _ok_response():
+    response = requests.Response()
+    response.status_code = 200
+    return response
+
+
+def test_non_probe_request_does_not_release_in_flight_probe():
+    client = HttpClient(failure_threshold=1, reset_timeout=0.05)
+    breaker = client._get_breaker("api")
+    stale_started, stale_release = threading.Event(), threading.Event()
+    probe_started, probe_release = threading.Event(), threading.Event()
+
+    def fake_request(method, url, **kwargs):
+        if url.endswith("stale"):
+            stale_started.set()
+            stale_release.wait(2)
+            raise requests.exceptions.InvalidURL("bad url")
+        probe_started.set()
+        probe_release.wait(2)
+        return _ok_response()
+
+    client.session.request = fake_request
+    results = {}
+
+    def run(name):
+        try:
+            results[name] = client.get(f"http://host/{name}", endpoint="api", retries=0).status_code
+        except Exception as e:
+            results[name] = type(e).__name__
+
+    # 熔断器关闭时放行的普通请求，在熔断打开并进入半开后才以非网络异常结束
+    stale = threading.Thread(target=run, args=("stale",))
+    stale.start()
+    assert stale_started.wait(2)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    probe = threading.Thread(target=run, args=("probe",))
+    probe.start()
+    assert probe_started.wait(2)
+
+    stale_release.set()
+    stale.join(2)
+    assert results["stale"] == "InvalidURL"
+
+    # 探测仍在进行，其他请求必须被拒绝
+    with pytest.raises(CircuitOpenError):
+        client.get("http://host/other", endpoint="api", retries=0)
+
+    probe_release.set()
+    probe.join(2)
+    assert results["probe"] == 200
+    assert breaker.state == "closed"
+
+
+def test_probe_released_after_unexpected_exception():
+    client = HttpClient(failure_threshold=1, reset_timeout=0.05)
+    breaker = client._get_breaker("api")
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            raise requests.exceptions.InvalidURL("bad url")
+        return _ok_response()
+
+    client.session.request = fake_request
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    with pytest.raises(requests.exceptions.InvalidURL):
+        client.get("http://host/a", endpoint="api", retries=0)
+    assert client.get("http://host/b", endpoint="api", retries=0).status_code == 200
+    assert breaker.state == "closed"
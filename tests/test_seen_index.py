@@ -0,0 +1,64 @@
+"""
+已采集ID索引 - 布隆过滤器判定可能存在时回退到 SQLite 精确校验
+"""
+from data_manager.seen_index import SeenIdIndex
+
+
+def _save_post(manager, mblog_id):
+    manager.bulk_save_posts([{
+        "mblog_id": mblog_id,
+        "author": "作者",
+        "content": "DeepSeek 发布新模型",
+        "publish_time": "2026-10-01 10:00:00",
+    }])
+
+
+def test_existing_post_ids_returns_stored_ids(sqlite_manager):
+    _save_post(sqlite_manager, "100")
+    assert sqlite_manager.existing_post_ids(["100", "200"]) == {"100"}
+    assert sqlite_manager.existing_post_ids([]) == set()
+
+
+def test_filter_new_excludes_stored_post_in_bloom(sqlite_manager):
+    _save_post(sqlite_manager, "100")
+    index = SeenIdIndex(sqlite_manager, capacity=1000).warm()
+
+    assert index.filter_new(["100", "200"]) == ["200"]
+    assert "100" in index
+    assert not index.add_if_new("100")
+    stats = index.stats()
+    assert stats["exact_checks"] >= 2
+    assert stats["false_positives"] == 0
+
+
+def test_bloom_false_positive_is_treated_as_new(sqlite_manager):
+    _save_post(sqlite_manager, "100")
+    index = SeenIdIndex(sqlite_manager, capacity=1000).warm()
+    # 模拟误判: 只在过滤器中、未入库
+    index._bloom.add("300")
+
+    assert "300" not in index
+    assert index.filter_new(["300", "100"]) == ["300"]
+    assert index.stats()["false_positives"] == 2
+    assert index.add_if_new("300")
+    assert not index.add_if_new("300")
+
+
+def test_bloom_true_positive_is_confirmed_by_database(sqlite_manager):
+    _save_post(sqlite_manager, "100")
+    _save_post(sqlite_manager, "101")
+    index = SeenIdIndex(sqlite_manager, capacity=1000).warm()
+
+    assert "100" in index
+    assert index.filter_new(["100", "101"]) == []
+    stats = index.stats()
+    assert stats["exact_checks"] == 3
+    assert stats["false_positives"] == 0
+    assert stats["bloom_negatives"] == 0
+
+
+def test_bloom_negative_skips_database(sqlite_manager):
+    index = SeenIdIndex(sqlite_manager, capacity=1000).warm()
+
+    assert index.filter_new(["400"]) == ["400"]
+    assert index.stats()["exact_checks"] == 0
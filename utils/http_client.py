@@ -0,0 +1,308 @@
+"""
+共享 HTTP 客户端 - 连接池复用、分离的连接/读取超时、退避重试、熔断和按端点的延迟统计
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import HTTP_CLIENT_CONFIG
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """端点熔断中，请求未发出"""
+
+
+class CircuitBreaker:
+    """
+    简单熔断器
+
+    连续失败达到阈值后打开，reset_timeout 秒内直接拒绝请求；
+    之后放行一个探测请求 (半开)，成功则关闭，失败则重新打开。
+    探测名额只由取得它的请求 (allow_request 返回 probe=True) 释放。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow_request(self) -> Tuple[bool, bool]:
+        """
+        Returns:
+            (是否放行, 本次请求是否为半开状态下的探测请求)
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True, False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False, False
+            self._probing = True
+            return True, True
+
+    def allow(self) -> bool:
+        return self.allow_request()[0]
+
+    def record_success(self, probe: bool = False):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            if probe:
+                self._probing = False
+
+    def record_failure(self, probe: bool = False):
+        with self._lock:
+            self._failures += 1
+            if probe or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            if probe:
+                self._probing = False
+
+    def release_probe(self):
+        """探测请求以非网络异常结束时释放探测名额，熔断状态不变，下一个请求可以重新探测 (仅由探测请求调用)"""
+        with self._lock:
+            self._probing = False
+
+
+class EndpointStats:
+    """单个端点的请求计数与延迟分布"""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, ok: bool):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._latencies.append(seconds)
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            data = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "total_seconds": round(self.total_seconds, 4),
+                "max_seconds": round(self.max_seconds, 4),
+            }
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 4)
+
+        data.update({"p50_seconds": percentile(0.5), "p95_seconds": percentile(0.95)})
+        return data
+
+
+class HttpClient:
+    """带连接池的 HTTP 客户端 (线程安全)"""
+
+    def __init__(self, **overrides):
+        config = {**HTTP_CLIENT_CONFIG, **overrides}
+        self.timeouts: Dict[str, Tuple[float, float]] = config["timeouts"]
+        self.max_retries = config["max_retries"]
+        self.backoff_base = config["backoff_base"]
+        self.backoff_max = config["backoff_max"]
+        self.retry_statuses = set(config["retry_statuses"])
+        self.failure_threshold = config["failure_threshold"]
+        self.reset_timeout = config["reset_timeout"]
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config["pool_connections"],
+            pool_maxsize=config["pool_maxsize"],
+            max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _endpoint_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path}"
+
+    def _get_breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._stats[endpoint] = EndpointStats()
+            return self._breakers[endpoint]
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """解析 Retry-After 头 (秒数或 HTTP 日期)"""
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """带抖动的指数退避 (full jitter)，服务端给出 Retry-After 时优先遵循"""
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        endpoint: str = None,
+        timeout: Tuple[float, float] = None,
+        retries: int = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        发送请求
+
+        Args:
+            endpoint: 统计/熔断使用的端点名，默认取 host+path
+            timeout: (连接超时, 读取超时)，也可以是 timeouts 配置中的名称
+            retries: 最大重试次数；GET 等幂等请求默认读取配置，POST 等非幂等请求默认不重试
+                (读取超时时服务端可能已处理，重试会重复提交)，需要重试时由调用方显式传入
+
+        连接错误、超时和可重试状态码 (429/5xx) 会退避重试；重试用尽后
+        异常照常抛出，可重试状态码的最后一个响应原样返回，由调用方 raise_for_status。
+        """
+        endpoint = endpoint or self._endpoint_key(url)
+        if timeout is None or isinstance(timeout, str):
+            timeout = self.timeouts.get(timeout or endpoint, self.timeouts["default"])
+        if retries is None:
+            retries = self.max_retries if method.upper() in _IDEMPOTENT_METHODS else 0
+
+        # 含重试和退避的完整调用耗时 (LLM / Webhook / 微博接口延迟)
+        with get_metrics().timer("http_request_seconds", endpoint=endpoint):
+            return self._send(method, url, endpoint, timeout, retries, **kwargs)
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        timeout: Tuple[float, float],
+        retries: int,
+        **kwargs
+    ) -> requests.Response:
+        breaker = self._get_breaker(endpoint)
+        stats = self._stats[endpoint]
+
+        for attempt in range(retries + 1):
+            allowed, probe = breaker.allow_request()
+            if not allowed:
+                stats.incr("rejected")
+                raise CircuitOpenError(f"端点 {endpoint} 熔断中，暂停请求")
+
+            started = time.perf_counter()
+            response = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                stats.observe(time.perf_counter() - started, ok=False)
+                breaker.record_failure(probe)
+                if attempt >= retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"请求 {endpoint} 失败: {e}，{delay:.1f}s 后第 {attempt + 1} 次重试")
+            else:
+                elapsed = time.perf_counter() - started
+                if response.status_code not in self.retry_statuses:
+                    stats.observe(elapsed, ok=response.ok)
+                    breaker.record_success(probe)
+                    return response
+                stats.observe(elapsed, ok=False)
+                breaker.record_failure(probe)
+                if attempt >= retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                logger.warning(
+                    f"请求 {endpoint} 返回 {response.status_code}，{delay:.1f}s 后第 {attempt + 1} 次重试"
+                )
+                response.close()
+            finally:
+                # 其他异常 (如 InvalidURL、解码错误) 不计入熔断，但本次取得的探测名额必须释放，否则熔断器永久打开；
+                # 非探测请求不能释放，否则会清掉其他线程正在进行的探测
+                if probe:
+                    breaker.release_probe()
+
+            stats.incr("retries")
+            get_metrics().inc("http_retries", endpoint=endpoint)
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """按端点返回延迟与错误统计"""
+        with self._lock:
+            items = list(self._stats.items())
+            breakers = dict(self._breakers)
+        return {
+            endpoint: {**stats.snapshot(), "circuit": breakers[endpoint].state}
+            for endpoint, stats in items
+        }
+
+
+_clients: Dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name: str = "default") -> HttpClient:
+    """获取进程内共享的 HTTP 客户端"""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = HttpClient()
+        return _clients[name]
@@ -0,0 +1,231 @@
+"""
+运行指标 - 进程内计数器和直方图 (线程安全)，支持上下文管理器/装饰器计时，
+可导出为 JSON 快照 (随报告保存) 或 Prometheus 文本格式 (/metrics)
+
+注意：process 解析模式下工作进程中的指标不会回传主进程。
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import METRICS_CONFIG
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _failure_name(name: str) -> str:
+    """计时指标对应的失败计数名: crawler_login_seconds -> crawler_login_failures"""
+    base = name[:-len("_seconds")] if name.endswith("_seconds") else name
+    return f"{base}_failures"
+
+
+class Histogram:
+    """固定桶直方图，另保留最近的样本用于计算分位数"""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int):
+        self.bounds = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 4)
+
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.bounds + ("+Inf",), self.bucket_counts):
+            cumulative += count
+            buckets.append([bound, cumulative])
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "max": round(self.max, 4),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    """计数器 + 直方图注册表"""
+
+    def __init__(self, enabled: bool = None, buckets: Tuple[float, ...] = None, window: int = None):
+        self.enabled = METRICS_CONFIG.get("enabled", True) if enabled is None else enabled
+        self.buckets = buckets or tuple(METRICS_CONFIG.get("buckets", (0.01, 0.1, 1, 10)))
+        self.window = window or METRICS_CONFIG.get("sample_window", 1000)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        清空全部指标
+
+        main.py 在每次运行开始时调用，随报告保存的快照只包含本次运行；
+        Web 进程不调用，/metrics 中的本进程指标为进程启动以来的累计值。
+        """
+        with self._lock:
+            self._counters: Dict[str, Dict[LabelKey, float]] = {}
+            self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+            self.started_at = datetime.now()
+            self._started = time.monotonic()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一个样本 (通常为秒)"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets, self.window)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """计时上下文，耗时记入直方图 name，抛出异常时另计 <name>_failures"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(_failure_name(name), **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出可 JSON 序列化的快照"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in sorted(self._counters.items())
+            }
+            histograms = {
+                name: [{"labels": dict(key), **hist.snapshot()} for key, hist in series.items()]
+                for name, series in sorted(self._histograms.items())
+            }
+        return {
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime_seconds": round(time.monotonic() - self._started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, Any], extra: Dict[str, Any] = None) -> str:
+    items = {**labels, **(extra or {})}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def render_prometheus(snapshot: Dict[str, Any], prefix: str = "pulseai_") -> str:
+    """把快照渲染为 Prometheus 文本格式"""
+    lines: List[str] = []
+    lines.append(f"# TYPE {prefix}uptime_seconds gauge")
+    lines.append(f"{prefix}uptime_seconds {snapshot.get('uptime_seconds', 0)}")
+
+    for name, series in snapshot.get("counters", {}).items():
+        metric = f"{prefix}{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for item in series:
+            lines.append(f"{metric}{_format_labels(item['labels'])} {item['value']}")
+
+    for name, series in snapshot.get("histograms", {}).items():
+        metric = f"{prefix}{name}"
+        lines.append(f"# TYPE {metric} histogram")
+        for item in series:
+            labels = item["labels"]
+            for bound, cumulative in item["buckets"]:
+                lines.append(f"{metric}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {item['sum']}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {item['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def summary_lines(snapshot: Dict[str, Any]) -> List[str]:
+    """各直方图的可读摘要 (按总耗时倒序)，用于运行结束时打印"""
+    rows = []
+    for name, series in snapshot.get("histograms", {}).items():
+        for item in series:
+            label = ",".join(f"{k}={v}" for k, v in item["labels"].items())
+            rows.append((item["sum"], f"{name}{'[' + label + ']' if label else ''}: "
+                         f"{item['count']} 次, 合计 {item['sum']:.2f}s, "
+                         f"p50 {item['p50']}s, p95 {item['p95']}s, 最大 {item['max']}s"))
+    return [text for _, text in sorted(rows, key=lambda row: row[0], reverse=True)]
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+
+def inc(name: str, value: float = 1, **labels):
+    get_metrics().inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    get_metrics().observe(name, value, **labels)
+
+
+def timer(name: str, **labels):
+    return get_metrics().timer(name, **labels)
+
+
+def timed(name: str, **labels):
+    """计时装饰器: @timed("crawler_login_seconds")"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
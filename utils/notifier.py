@@ -1,16 +1,17 @@
-import requests
 import json
 import logging
-import re
 from typing import Dict, Any
 from config.settings import WEBHOOK_ADDRESS
+from utils.http_client import get_http_client
+from utils.report_renderer import render_feishu
 
 logger = logging.getLogger(__name__)
 
 def send_feishu_notification(
     success: bool,
     message: str,
-    data: Dict[str, Any] = None
+    data: Dict[str, Any] = None,
+    preformatted: bool = False
 ):
     """
     发送飞书 Webhook 通知
@@ -19,6 +20,7 @@ def send_feishu_notification(
         success: 是否成功
         message: 消息提示
         data: 数据内容, 包含 content, start_time, end_time, post_count 等
+        preformatted: content 已是保存报告时预渲染的飞书格式文本，不再转换
     """
     if not WEBHOOK_ADDRESS:
         logger.debug("未配置 Webhook_address，跳过飞书通知")
@@ -35,17 +37,16 @@ def send_feishu_notification(
     }
     
     # 飞书消息格式优化：将Markdown标题转换为绿色字体
-    if payload["data"] and "content" in payload["data"] and isinstance(payload["data"]["content"], str):
-        payload["data"]["content"] = re.sub(
-            r"^##\s+(.+)$", 
-            r"<font color='green'>\1</font>", 
-            payload["data"]["content"], 
-            flags=re.MULTILINE
-        )
+    content = payload["data"].get("content")
+    if not preformatted and isinstance(content, str):
+        payload["data"]["content"] = render_feishu(content)
     
     try:
         logger.info(f"正在发送飞书通知: {json.dumps(payload, ensure_ascii=False)}")
-        response = requests.post(WEBHOOK_ADDRESS, headers=headers, json=payload, timeout=10)
+        # Webhook 不重试: 读取超时时消息可能已送达，重试会重复推送
+        response = get_http_client().post(
+            WEBHOOK_ADDRESS, headers=headers, json=payload, endpoint="webhook"
+        )
         response.raise_for_status()
         logger.info("飞书通知发送成功")
     except Exception as e:
@@ -0,0 +1,84 @@
+"""
+报告渲染 - 在保存报告时把 LLM 输出的 Markdown 一次性转换为 HTML 和飞书格式文本
+
+HTML 由 markdown 包渲染 (表格、围栏代码、段落内换行渲染为 <br>，与前端 marked 的 breaks: true 一致)，
+再经 nh3 按白名单清洗：只保留报告用到的标签，链接只允许 http/https/mailto 和站内地址。
+LLM 输出按 GFM 书写，段落后常直接跟列表，渲染前补上 markdown 包要求的空行。
+两个依赖任一未安装时 render_html 返回 None，详情页退回浏览器端 marked 渲染。
+"""
+import logging
+import re
+from typing import Optional
+
+try:
+    import markdown
+    import nh3
+except ImportError:  # 可选依赖，未安装时不预渲染 HTML
+    markdown = None
+    nh3 = None
+
+HTML_RENDERING_AVAILABLE = markdown is not None and nh3 is not None
+
+logger = logging.getLogger(__name__)
+
+_MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "nl2br", "sane_lists"]
+
+_ALLOWED_TAGS = {
+    "h1", "h2", "h3", "h4", "h5", "h6", "p", "br", "hr", "blockquote",
+    "ul", "ol", "li", "pre", "code", "strong", "em", "a",
+    "table", "thead", "tbody", "tr", "th", "td",
+}
+_ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "ol": {"start"},
+    "code": {"class"},
+    "th": {"style"},
+    "td": {"style"},
+}
+_URL_SCHEMES = {"http", "https", "mailto"}
+
+_LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+]|\d{1,9}[.)])\s+")
+_FENCE_RE = re.compile(r"^\s{0,3}(?:```|~~~)")
+_FEISHU_HEADING_RE = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+
+
+def _separate_lists(text: str) -> str:
+    """在紧跟段落的列表前插入空行 (围栏代码内除外)"""
+    lines = []
+    in_fence = False
+    for line in text.split("\n"):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif (
+            not in_fence and lines and _LIST_ITEM_RE.match(line) and lines[-1].strip()
+            and not _LIST_ITEM_RE.match(lines[-1]) and not lines[-1][:1].isspace()
+        ):
+            lines.append("")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_html(text: str) -> Optional[str]:
+    """Markdown 转换为清洗后的 HTML 片段，依赖未安装时返回 None"""
+    if not HTML_RENDERING_AVAILABLE:
+        logger.warning("未安装 markdown/nh3，跳过报告 HTML 预渲染")
+        return None
+    if not text:
+        return ""
+    raw_html = markdown.markdown(_separate_lists(text), extensions=_MARKDOWN_EXTENSIONS)
+    return nh3.clean(
+        raw_html,
+        tags=_ALLOWED_TAGS,
+        attributes=_ALLOWED_ATTRIBUTES,
+        url_schemes=_URL_SCHEMES,
+        link_rel="noopener noreferrer",
+        set_tag_attribute_values={"a": {"target": "_blank"}},
+        filter_style_properties={"text-align"},
+    )
+
+
+def render_feishu(text: str) -> str:
+    """飞书消息格式: 二级标题转换为绿色字体"""
+    if not text:
+        return text or ""
+    return _FEISHU_HEADING_RE.sub(r"<font color='green'>\1</font>", text)
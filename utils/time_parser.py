@@ -0,0 +1,100 @@
+"""
+时间解析 - 微博 created_at 手写快速解析 + LRU 缓存，统一转换为本地时间和 Unix 时间戳
+
+微博接口的 created_at 形如 "Fri Oct 17 06:08:58 +0800 2026"。strptime 的 %a %b
+依赖 locale 且逐个格式试错较慢，这里按固定位置切分直接构造 datetime。
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+_MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+
+_CACHE_SIZE = 65536
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=64)
+def _offset_seconds(offset: str) -> Optional[int]:
+    """解析 +0800 / -0530 形式的时区偏移 (秒)"""
+    if len(offset) != 5 or offset[0] not in "+-" or not offset[1:].isdigit():
+        return None
+    seconds = int(offset[1:3]) * 3600 + int(offset[3:5]) * 60
+    return seconds if offset[0] == "+" else -seconds
+
+
+def _parse_weibo_format(time_str: str) -> Optional[int]:
+    """解析 "Fri Oct 17 06:08:58 +0800 2026"，返回 Unix 时间戳"""
+    parts = time_str.split()
+    if len(parts) != 6:
+        return None
+    _, month, day, clock, offset, year = parts
+    month_num = _MONTHS.get(month)
+    offset_seconds = _offset_seconds(offset)
+    if not month_num or offset_seconds is None or len(clock) != 8:
+        return None
+    try:
+        wall = datetime(
+            int(year), month_num, int(day),
+            int(clock[0:2]), int(clock[3:5]), int(clock[6:8])
+        )
+    except ValueError:
+        return None
+    return (wall - _EPOCH) // timedelta(seconds=1) - offset_seconds
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_time_with_epoch(time_str: str) -> Optional[Tuple[datetime, int]]:
+    """
+    解析时间字符串
+
+    支持微博 created_at 格式、"%Y-%m-%d %H:%M:%S" 和 "%Y-%m-%d"；
+    带时区的时间先换算到本机时区，不带时区的按本机时区理解。
+
+    Returns:
+        (本地时间 naive datetime, Unix 时间戳秒)，无法解析时返回 None
+    """
+    if not time_str:
+        return None
+    time_str = time_str.strip()
+
+    if time_str[:1].isalpha():
+        epoch = _parse_weibo_format(time_str)
+        if epoch is None:
+            return None
+        return datetime.fromtimestamp(epoch), epoch
+
+    try:
+        dt = datetime.fromisoformat(time_str)
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        epoch = int(dt.timestamp())
+        return datetime.fromtimestamp(epoch), epoch
+    return dt, int(dt.timestamp())
+
+
+def parse_time(time_str: str) -> Optional[datetime]:
+    """解析为本地时间 (naive datetime)"""
+    parsed = parse_time_with_epoch(time_str) if time_str else None
+    return parsed[0] if parsed else None
+
+
+def to_epoch(value: Union[str, datetime, int, float, None]) -> Optional[int]:
+    """时间字符串 / datetime / 时间戳统一转换为 Unix 时间戳秒"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    parsed = parse_time_with_epoch(value)
+    return parsed[1] if parsed else None
+
+
+def format_time(dt: datetime) -> str:
+    """统一的 publish_time 字符串格式"""
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
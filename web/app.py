@@ -1,44 +1,273 @@
 """
 AI热点监控系统 - Web展示界面
 """
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, abort, render_template, request, g
+from datetime import datetime, timezone
+import base64
+import binascii
+import gzip
+import hashlib
+import json
 import sys
 import os
+import threading
+import time
+from urllib.parse import urlencode
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import REPORT_CACHE_CONFIG, SEARCH_CONFIG
 from data_manager.storage import create_storage_manager
+from utils.metrics import get_metrics, render_prometheus
+from utils.time_parser import to_epoch
 
 app = Flask(__name__)
-storage = create_storage_manager()
+
+_storage = None
+_storage_pid = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    当前进程的存储实例
+
+    多进程部署时主进程 fork 出的工作进程不能复用父进程的 SQLite 连接，
+    因此按进程号在各工作进程中首次使用时各自创建。
+    """
+    global _storage, _storage_pid
+    pid = os.getpid()
+    if _storage is None or _storage_pid != pid:
+        with _storage_lock:
+            if _storage is None or _storage_pid != pid:
+                _storage = create_storage_manager()
+                _storage_pid = pid
+    return _storage
+
+
+def warm_templates(flask_app):
+    """预编译全部模板，首个请求无需再编译"""
+    for name in flask_app.jinja_env.list_templates():
+        flask_app.jinja_env.get_template(name)
+
+
+def create_app():
+    """生产环境入口 (gunicorn "web.app:create_app()" / web/serve.py)"""
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
+    app.jinja_env.auto_reload = False
+    warm_templates(app)
+    return app
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        get_metrics().observe(
+            "web_request_seconds", time.perf_counter() - started,
+            endpoint=request.endpoint or "unknown", status=response.status_code
+        )
+    return response
+
+
+def encode_cursor(cursor):
+    """(created_at, id) 游标编码为 URL 安全的字符串"""
+    if not cursor:
+        return None
+    raw = json.dumps(list(cursor), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """解析游标，格式错误时返回 400"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, report_id = json.loads(raw)
+        return str(created_at), int(report_id)
+    except (binascii.Error, ValueError, TypeError):
+        abort(400, description="无效的分页游标")
+
+
+def build_cached_body(body, mimetype, last_modified=None, headers=None):
+    """
+    预先计算一次 ETag / gzip，之后命中缓存的请求只需比较 ETag 或直接返回字节
+
+    Args:
+        body: 响应正文
+        last_modified: 最后修改时间 (报告 created_at 字符串)
+        headers: 附加的响应头
+    """
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    epoch = to_epoch(last_modified) if last_modified else None
+    return {
+        "body": data,
+        "gzip": gzip.compress(data, 6) if len(data) >= REPORT_CACHE_CONFIG.get("gzip_min_bytes", 1024) else None,
+        "etag": hashlib.sha1(data).hexdigest(),
+        "last_modified": datetime.fromtimestamp(epoch, timezone.utc) if epoch else None,
+        "mimetype": mimetype,
+        "headers": headers or {},
+    }
+
+
+def send_cached_body(entry):
+    """返回缓存的响应，支持 If-None-Match / If-Modified-Since (304) 和 gzip"""
+    use_gzip = entry["gzip"] is not None and request.accept_encodings["gzip"] > 0
+    response = Response(entry["gzip"] if use_gzip else entry["body"], mimetype=entry["mimetype"])
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.set_etag(entry["etag"] + ("-gz" if use_gzip else ""), weak=True)
+    if entry["last_modified"]:
+        response.last_modified = entry["last_modified"]
+    # 允许缓存但每次都需重新验证，轮询方通过 304 几乎零成本
+    response.cache_control.no_cache = True
+    response.headers.update(entry["headers"])
+    return response.make_conditional(request)
+
+
+def cached_response(key, loader):
+    """读取 (或生成并缓存) 响应，loader 返回 None 表示 404 (不缓存)"""
+    entry = get_storage().report_cache.get_or_load(key, loader)
+    if entry is None:
+        abort(404, description="报告未找到")
+    return send_cached_body(entry)
+
+
+def newest_created_at(summaries):
+    return max((s["created_at"] for s in summaries), default=None)
 
 
 @app.route('/')
 def index():
-    """首页 - 显示最新报告列表"""
-    reports = storage.get_analysis_reports(limit=20)
-    return render_template('index.html', reports=reports)
+    """首页 - 显示最新报告列表 (只读取摘要)"""
+    token = request.args.get('cursor')
+    cursor = decode_cursor(token)
+
+    def load():
+        reports, next_cursor = get_storage().get_report_summaries_page(
+            limit=REPORT_CACHE_CONFIG.get("page_size", 20), after=cursor
+        )
+        html = render_template(
+            'index.html', reports=reports,
+            next_cursor=encode_cursor(next_cursor), is_paged=cursor is not None
+        )
+        return build_cached_body(html, "text/html", newest_created_at(reports))
+
+    return cached_response(("index", cursor), load)
 
 
 @app.route('/report/<int:report_id>')
 def report_detail(report_id):
     """报告详情页"""
-    report = storage.get_analysis_report_by_id(report_id)
-    if report:
-        return render_template('report.html', report=report)
-    return "报告未找到", 404
+    def load():
+        report = get_storage().get_analysis_report_by_id(report_id)
+        if not report:
+            return None
+        return build_cached_body(
+            render_template('report.html', report=report), "text/html", report["created_at"]
+        )
+
+    return cached_response(("report_html", report_id), load)
 
 
 @app.route('/api/reports')
 def api_reports():
-    """API接口 - 获取报告列表"""
-    limit = request.args.get('limit', 10, type=int)
+    """
+    API接口 - 获取报告摘要列表 (不含完整正文)
+
+    参数: limit 每页条数, date 日期筛选, cursor 上一页响应头 X-Next-Cursor 中的游标
+    """
+    max_limit = REPORT_CACHE_CONFIG.get("max_page_size", 100)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), max_limit)
     date_key = request.args.get('date', None)
-    reports = storage.get_analysis_reports(date_key=date_key, limit=limit)
-    return jsonify(reports)
+    cursor = decode_cursor(request.args.get('cursor'))
+
+    def load():
+        summaries, next_cursor = get_storage().get_report_summaries_page(date_key, limit, cursor)
+        headers = {}
+        token = encode_cursor(next_cursor)
+        if token:
+            params = {"limit": limit, "cursor": token}
+            if date_key:
+                params["date"] = date_key
+            headers = {"X-Next-Cursor": token, "Link": f'</api/reports?{urlencode(params)}>; rel="next"'}
+        body = json.dumps(summaries, ensure_ascii=False)
+        return build_cached_body(body, "application/json", newest_created_at(summaries), headers)
+
+    return cached_response(("api_reports", date_key, limit, cursor), load)
+
+
+@app.route('/api/reports/<int:report_id>')
+def api_report_detail(report_id):
+    """API接口 - 获取单个报告的完整内容"""
+    def load():
+        report = get_storage().get_analysis_report_by_id(report_id)
+        if not report:
+            return None
+        body = json.dumps(report, ensure_ascii=False)
+        return build_cached_body(body, "application/json", report["created_at"])
+
+    return cached_response(("api_report", report_id), load)
+
+
+@app.route('/api/search')
+def api_search():
+    """
+    API接口 - 全文检索帖子或报告
+
+    参数: q 检索词 (空格分隔，需同时命中), type posts/reports, start/end 时间范围,
+          order rank/time, limit, offset
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        abort(400, description="缺少检索词 q")
+    kind = request.args.get('type', 'posts')
+    if kind not in ('posts', 'reports'):
+        abort(400, description="type 只能为 posts 或 reports")
+    order = request.args.get('order', 'rank')
+    if order not in ('rank', 'time'):
+        abort(400, description="order 只能为 rank 或 time")
+    limit = min(max(request.args.get('limit', SEARCH_CONFIG.get("default_limit", 20), type=int), 1),
+                SEARCH_CONFIG.get("max_limit", 100))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    start_time = request.args.get('start') or None
+    end_time = request.args.get('end') or None
+    for name, value in (('start', start_time), ('end', end_time)):
+        if value and to_epoch(value) is None:
+            abort(400, description=f"无法解析的时间参数 {name}: {value}")
+
+    storage = get_storage()
+    if kind == 'posts':
+        results = storage.search_posts(query, start_time, end_time, limit=limit, offset=offset, order=order)
+    else:
+        results = storage.search_reports(query, start_time, end_time, limit=limit, offset=offset, order=order)
+    body = json.dumps({"query": query, "type": kind, "results": results}, ensure_ascii=False)
+    return Response(body, mimetype="application/json")
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 指标: 本进程的实时指标 + 最近一次采集/分析运行的指标快照"""
+    body = render_prometheus(get_metrics().snapshot())
+    latest = get_storage().get_latest_run_metrics()
+    if latest:
+        body += (
+            "# TYPE pulseai_last_run_report_id gauge\n"
+            f"pulseai_last_run_report_id {latest['report_id']}\n"
+        )
+        body += render_prometheus(latest["run_metrics"], prefix="pulseai_last_run_")
+    return Response(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == '__main__':
+    # 开发服务器 (单进程、带调试器)，生产部署请使用 python web/serve.py
     print("=" * 50)
     print("AI热点监控系统 - Web界面")
     print("访问地址: http://localhost:8000")
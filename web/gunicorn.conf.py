@@ -0,0 +1,29 @@
+"""
+gunicorn 配置 (Linux / macOS)
+
+    gunicorn -c web/gunicorn.conf.py "web.app:create_app()"
+
+参数均读取 config.settings.WEB_CONFIG (环境变量 WEB_HOST / WEB_PORT / WEB_WORKERS / WEB_THREADS / WEB_TIMEOUT)。
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import WEB_CONFIG
+
+bind = f"{WEB_CONFIG['host']}:{WEB_CONFIG['port']}"
+workers = WEB_CONFIG["workers"]
+# 多线程工作进程: 报告页面主要是 SQLite 读和缓存命中，线程足以覆盖 I/O 等待
+worker_class = "gthread"
+threads = WEB_CONFIG["threads"]
+timeout = WEB_CONFIG["timeout"]
+graceful_timeout = WEB_CONFIG["timeout"]
+keepalive = 5
+# 主进程预加载应用并预编译模板，fork 后各工作进程共享；存储在工作进程中首次使用时各自创建
+preload_app = True
+# 定期重启工作进程，避免长期运行的内存增长 (重启会清空进程内报告缓存，不宜过于频繁)
+max_requests = 20000
+max_requests_jitter = 2000
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,71 @@
+"""
+Web 生产环境启动入口
+
+    python web/serve.py                      # Linux/macOS 使用 gunicorn，Windows 使用 waitress
+    python web/serve.py --server waitress --threads 8
+
+gunicorn: 多进程 x 多线程 (web/gunicorn.conf.py)；waitress: 单进程多线程，支持 Windows。
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import WEB_CONFIG
+
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import Application
+
+    class DashboardApplication(Application):
+        def load_config(self):
+            self.load_config_from_file(GUNICORN_CONFIG)
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("threads", args.threads)
+
+        def load(self):
+            from web.app import create_app
+            return create_app()
+
+    DashboardApplication().run()
+
+
+def run_waitress(args):
+    from waitress import serve
+    from web.app import create_app
+
+    print(f"waitress 启动: http://{args.host}:{args.port} (线程 {args.threads})")
+    serve(create_app(), host=args.host, port=args.port, threads=args.threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI热点监控系统 - Web 生产部署")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "waitress"], default="auto",
+                        help="WSGI 服务器 (auto: Windows 使用 waitress，其他系统使用 gunicorn)")
+    parser.add_argument("--host", default=WEB_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=WEB_CONFIG["port"])
+    parser.add_argument("--workers", type=int, default=WEB_CONFIG["workers"], help="工作进程数 (仅 gunicorn)")
+    parser.add_argument("--threads", type=int, default=WEB_CONFIG["threads"], help="每个进程的线程数")
+    args = parser.parse_args()
+
+    server = args.server
+    if server == "auto":
+        server = "waitress" if os.name == "nt" else "gunicorn"
+
+    if importlib.util.find_spec(server) is None:
+        print(f"未安装 {server}，请先执行: pip install -r web/requirements.txt")
+        sys.exit(1)
+
+    if server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_waitress(args)
+
+
+if __name__ == "__main__":
+    main()